@@ -1,7 +1,9 @@
 import streamlit as st
 
-from components.sidebar import show_sidebar
-from database import DatabaseManager, db_manager
+from components.sidebar import show_sidebar, show_rerun_profile
+from services.metrics import start_metrics_server
+from database import db_manager
+from services.identity import load_identity
 
 def login_page():
     """Login page"""
@@ -54,12 +56,17 @@ def login_page():
                     else:
                         # Database authentication
                         try:
-                            db_manager = DatabaseManager()
                             user_data = db_manager.authenticate_user(username, password)
                             if user_data:
                                 # Get all user roles
                                 user_roles = db_manager.get_user_roles(user_data['id'])
                                 
+                                # Roles, team and permissions resolved once for the session (see services/identity)
+                                st.session_state.identity = load_identity(
+                                    db_manager, user_data['id'],
+                                    user_roles[0]['name'] if user_roles else user_data['role_name'],
+                                    roles=user_roles, user=user_data)
+                                
                                 # Store basic information in session
                                 st.session_state.authenticated = True
                                 st.session_state.username = username
@@ -267,6 +274,8 @@ def home_page():
             else:
                 st.write(f"{notification['icon']} {notification['message']}")
 
+    show_rerun_profile("home_page")
+
 def main():
     """Main function"""
     st.set_page_config(
@@ -276,6 +285,9 @@ def main():
         initial_sidebar_state="collapsed"
     )
     
+    # /metrics server (FIXTOP_METRICS_PORT), started once per process
+    start_metrics_server()
+
     # Initialize session variables
     if 'logged_in' not in st.session_state:
         st.session_state.logged_in = False
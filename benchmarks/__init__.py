@@ -0,0 +1,6 @@
+"""
+Benchmarks and load tools for Fixtop Agent Manager.
+
+Each module is a runnable script, e.g.:
+    python -m benchmarks.bench_fetch_frame --problems 200000
+"""
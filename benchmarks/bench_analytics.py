@@ -0,0 +1,86 @@
+"""
+Statistics rollups on SQLite (raw rows, problems_cube) vs on the DuckDB mirror,
+plus the cost of loading and incrementally refreshing the mirror.
+
+Usage:
+    python -m benchmarks.bench_analytics --problems 5000000 --repeat 3
+
+Requires the optional duckdb package. Generating 5M tickets takes a few
+minutes; smaller volumes give the trend. The raw-row case holds every ticket
+as Python objects while the frame is built (about 1.3 GB at 1M tickets):
+--skip-rows leaves it out on machines with less memory than that needs.
+"""
+
+import argparse
+import os
+import time
+
+from benchmarks.bench_cube import cube_summary
+from benchmarks.common import measure, print_table
+from benchmarks.datagen import temporary_database
+from database import DatabaseManager
+from services.analytics.duckdb_mirror import DuckDBMirror
+from services.tickets import cube
+from services.tickets.commissions import summarize_tickets
+
+UPDATED_TICKETS = 1_000
+
+
+def mirror_summary(mirror: DuckDBMirror):
+    """Same four rollups as cube_summary, answered by DuckDB"""
+    mirror.rollup(group_by=("is_paid",))
+    mirror.rollup(group_by=("agent_id", "agent_name", "team_name"))
+    mirror.rollup(group_by=("team_id", "team_name"))
+    mirror.rollup(grain="month", group_by=("period",))
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - started, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--problems", type=int, nargs="+", default=[5_000_000])
+    parser.add_argument("--users", type=int, default=None, help="default: one per 50 tickets (datagen)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip-rows", action="store_true", help="leave out the raw-row baseline")
+    args = parser.parse_args()
+
+    for problems in args.problems:
+        path = temporary_database(problems, users=args.users)
+        mirror = None
+        try:
+            db = DatabaseManager(path)
+            cube_seconds, _ = timed(lambda: cube.ensure_cube(db))
+            # Same storage as the application: a DuckDB file next to the database (engine.py)
+            mirror = DuckDBMirror(path, f"{path}.duckdb")
+            load_seconds, _ = timed(mirror.refresh)
+
+            with db.get_connection() as conn:
+                conn.execute(
+                    "UPDATE problems SET amount = amount * 2, is_paid = 1 - is_paid WHERE id IN "
+                    "(SELECT id FROM problems ORDER BY random() LIMIT ?)", (UPDATED_TICKETS,)
+                )
+            refresh_seconds, changes = timed(mirror.refresh)
+
+            results = {}
+            if not args.skip_rows:
+                results["sqlite rows (load + summarize)"] = measure(
+                    lambda: summarize_tickets(db.get_all_problems_frame()), args.repeat)
+            results["sqlite cube (4 rollups)"] = measure(lambda: cube_summary(db), args.repeat)
+            results["duckdb mirror (4 rollups)"] = measure(lambda: mirror_summary(mirror), args.repeat)
+            print_table(f"summary - {problems:,} tickets", results)
+            print(f"cube backfill: {cube_seconds:.2f}s | mirror initial load: {load_seconds:.2f}s | "
+                  f"refresh after {UPDATED_TICKETS:,} updates: {refresh_seconds:.3f}s ({changes})")
+        finally:
+            if mirror is not None:
+                mirror.close()
+            for leftover in (path, f"{path}.duckdb", f"{path}.duckdb.wal"):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+
+
+if __name__ == "__main__":
+    main()
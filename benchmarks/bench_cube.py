@@ -0,0 +1,54 @@
+"""
+Statistics summary from raw ticket rows vs from the pre-aggregated cube
+(problems_cube), for growing ticket volumes.
+
+Usage:
+    python -m benchmarks.bench_cube --problems 100000 400000 --users 20 --repeat 5
+
+The cube has at most one row per (agent, day, craft, paid): once that grid is
+filled, its size (and the rollup time) stops growing with the ticket count.
+"""
+
+import argparse
+import os
+
+from benchmarks.common import measure, print_table
+from benchmarks.datagen import temporary_database
+from database import DatabaseManager
+from services.tickets import cube
+from services.tickets.commissions import summarize_tickets
+
+
+def cube_summary(db: DatabaseManager):
+    """Uncached equivalent of cube.summarize_cube: totals, per agent, per team, per month"""
+    cube.rollup(group_by=("is_paid",), db=db)
+    cube.rollup(group_by=("agent_id", "agent_name", "team_name"), db=db)
+    cube.rollup(group_by=("team_id", "team_name"), db=db)
+    cube.rollup(grain="month", group_by=("period",), db=db)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--problems", type=int, nargs="+", default=[50_000, 200_000])
+    parser.add_argument("--users", type=int, default=None, help="default: one per 50 tickets (datagen)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for problems in args.problems:
+        path = temporary_database(problems, users=args.users)
+        try:
+            db = DatabaseManager(path)
+            results = {
+                "rows (load + summarize)": measure(
+                    lambda: summarize_tickets(db.get_all_problems_frame()), args.repeat),
+                "cube (4 rollups)": measure(lambda: cube_summary(db), args.repeat),
+            }
+            with db.get_connection() as conn:
+                cells = conn.execute(f"SELECT COUNT(*) FROM {cube.CUBE_TABLE}").fetchone()[0]
+            print_table(f"summary - {problems:,} tickets, {cells:,} cube rows", results)
+        finally:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+Latency of the DatabaseManager hot methods at several dataset sizes, compared
+with a stored JSON baseline.
+
+Each size is a database built by benchmarks/datagen (same seed, same rows).
+For every case: p50/p95 latency, Python allocation peak of one call, and the
+number of SQL statements per call (services/query_log statistics). A case
+regresses when its p50 or its allocation peak grows by more than --threshold
+(and by more than a small absolute margin, to ignore noise), or when it runs
+more statements than in the baseline.
+
+Usage:
+    python -m benchmarks.bench_database --sizes 10000,100000 --save       # record the baseline
+    python -m benchmarks.bench_database --sizes 10000,100000               # compare, exit 1 on regression
+    python -m benchmarks.bench_database --data-dir /tmp/fixtop_data        # keep the generated databases
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import sys
+import tempfile
+from datetime import datetime
+
+from benchmarks.common import ROOT_DIR, measure_latency
+from benchmarks.datagen import DEFAULT_PASSWORD, generate_bench_database
+from database import DatabaseManager
+from services import query_log
+
+DEFAULT_BASELINE = os.path.join(ROOT_DIR, "benchmarks", "baselines", "bench_database.json")
+
+# Regressions smaller than these are noise, whatever the ratio
+MIN_REGRESSION_MS = 0.5
+MIN_REGRESSION_MB = 0.5
+
+
+def dataset_path(problems: int, seed: int, data_dir: str) -> str:
+    """Generated database for this size, reused when data_dir already holds it"""
+    path = os.path.join(data_dir, f"fixtop_{problems}_{seed}.db")
+    if not os.path.exists(path):
+        generate_bench_database(path, problems, seed=seed)
+    return path
+
+
+def fixtures(path: str) -> dict:
+    """Ids used by the cases: the largest team, its manager (manager role only) and its busiest agent"""
+    conn = sqlite3.connect(path)
+    try:
+        team_id, manager_id = conn.execute("""
+            SELECT t.id, t.manager_id
+            FROM team t
+            JOIN team_member tm ON tm.team_id = t.id AND tm.is_active = 1
+            WHERE t.is_active = 1
+              AND NOT EXISTS (SELECT 1 FROM user_role ur
+                              WHERE ur.user_id = t.manager_id AND ur.role_id = 1)
+            GROUP BY t.id
+            ORDER BY COUNT(*) DESC, t.id
+            LIMIT 1
+        """).fetchone()
+        # The agent with the most tickets: the pages show the same branches (own tickets) at every size
+        member_id = conn.execute("""
+            SELECT tm.member_id
+            FROM team_member tm
+            LEFT JOIN problems p ON p.created_by = tm.member_id
+            WHERE tm.team_id = ? AND tm.is_active = 1
+            GROUP BY tm.member_id
+            ORDER BY COUNT(p.id) DESC, tm.member_id
+            LIMIT 1
+        """, (team_id,)).fetchone()[0]
+        problem_id = conn.execute("SELECT MAX(id) FROM problems WHERE created_by = ?", (member_id,)).fetchone()[0]
+        email = conn.execute("SELECT email FROM user WHERE id = 1").fetchone()[0]
+    finally:
+        conn.close()
+    return {"team_id": team_id, "manager_id": manager_id, "member_id": member_id,
+            "problem_id": problem_id, "email": email}
+
+
+def cases(db: DatabaseManager, ids: dict) -> dict:
+    amounts = iter(range(10**9))
+    return {
+        "get_all_problems": db.get_all_problems,
+        "get_all_users": db.get_all_users,
+        "get_teams": db.get_teams,
+        "get_team_members": lambda: db.get_team_members(ids["team_id"]),
+        "get_dashboard_stats": db.get_dashboard_stats,
+        "get_dashboard_stats(last_month)": lambda: db.get_dashboard_stats("last_month"),
+        "get_recent_notifications": db.get_recent_notifications,
+        "can_delete_ticket(manager)": lambda: db.can_delete_ticket(ids["manager_id"], ids["member_id"]),
+        "authenticate_user": lambda: db.authenticate_user(ids["email"], DEFAULT_PASSWORD),
+        "create_problem": lambda: db.create_problem(
+            "Bench customer", "0800000000", "Benchmark ticket", ids["member_id"], amount=25_000,
+            craft_ids="1", speciality_ids="1"),
+        "update_problem": lambda: db.update_problem(
+            ids["problem_id"], amount=float(next(amounts) % 60_000), updated_by=ids["member_id"]),
+    }
+
+
+def queries_per_call(fn) -> int:
+    """SQL statements run by one call (DatabaseManager cursors, see services/query_log)"""
+    query_log.reset_statement_stats()
+    fn()
+    return int(query_log.statement_stats()["count"].sum())
+
+
+def run_size(path: str, repeat: int, selected) -> dict:
+    db = DatabaseManager(path)
+    results = {}
+    for name, fn in cases(db, fixtures(path)).items():
+        if selected and name not in selected:
+            continue
+        result = measure_latency(fn, repeat)
+        result["queries"] = queries_per_call(fn)
+        results[name] = result
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """(size, case, message) for every regression against the baseline"""
+    regressions = []
+    for size, size_results in results.items():
+        for name, result in size_results.items():
+            reference = baseline.get(size, {}).get(name)
+            if reference is None:
+                continue
+            if (result["p50_ms"] > reference["p50_ms"] * (1 + threshold)
+                    and result["p50_ms"] - reference["p50_ms"] > MIN_REGRESSION_MS):
+                regressions.append((size, name, f"p50 {reference['p50_ms']:.1f} -> {result['p50_ms']:.1f} ms"))
+            if (result["peak_mb"] > reference["peak_mb"] * (1 + threshold)
+                    and result["peak_mb"] - reference["peak_mb"] > MIN_REGRESSION_MB):
+                regressions.append((size, name, f"peak {reference['peak_mb']:.1f} -> {result['peak_mb']:.1f} MB"))
+            if result["queries"] > reference["queries"]:
+                regressions.append((size, name, f"queries {reference['queries']} -> {result['queries']}"))
+    return regressions
+
+
+def print_results(size: str, results: dict, baseline: dict):
+    print(f"\n{int(size):,} tickets")
+    print(f"{'case':<34}{'p50 (ms)':>10}{'p95 (ms)':>10}{'peak (MB)':>11}{'queries':>9}{'vs base':>9}")
+    for name, result in results.items():
+        reference = baseline.get(size, {}).get(name)
+        change = f"{result['p50_ms'] / reference['p50_ms'] - 1:+.0%}" if reference and reference["p50_ms"] else ""
+        print(f"{name:<34}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}"
+              f"{result['peak_mb']:>11.2f}{result['queries']:>9}{change:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000", help="ticket counts, comma-separated")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--cases", help="only these cases, comma-separated")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="tolerated relative slowdown")
+    parser.add_argument("--data-dir", help="keep the generated databases here and reuse them")
+    args = parser.parse_args()
+
+    # The benchmark measures the statements, not the slow-query log
+    query_log.SLOW_QUERY_MS = -1
+    selected = set(args.cases.split(",")) if args.cases else None
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)["results"]
+
+    work_dir = tempfile.mkdtemp(prefix="fixtop_bench_")
+    data_dir = args.data_dir or work_dir
+    os.makedirs(data_dir, exist_ok=True)
+    results = {}
+    try:
+        for problems in (int(size) for size in args.sizes.split(",")):
+            # The write cases run on a copy: the kept dataset stays identical between runs
+            path = os.path.join(work_dir, "bench.db")
+            shutil.copyfile(dataset_path(problems, args.seed, data_dir), path)
+            results[str(problems)] = run_size(path, args.repeat, selected)
+            os.remove(path)
+            print_results(str(problems), results[str(problems)], baseline)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.save:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as baseline_file:
+            json.dump({
+                "date": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "sqlite": sqlite3.sqlite_version,
+                "machine": platform.machine(),
+                "seed": args.seed,
+                "repeat": args.repeat,
+                "results": results,
+            }, baseline_file, indent=2)
+        print(f"\nBaseline saved: {args.baseline}")
+        return
+
+    if not baseline:
+        print(f"\nNo baseline at {args.baseline} (run with --save to record one)")
+        return
+    regressions = compare(results, baseline, args.threshold)
+    for size, name, message in regressions:
+        print(f"REGRESSION {int(size):,} tickets - {name}: {message}")
+    if regressions:
+        sys.exit(1)
+    print(f"\nNo regression beyond {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Excel export of the ticket statistics table: the previous cell-by-cell
+workbook (every value as str, widths from a rescan of every cell) vs the
+write-only streaming exporter (services.export_common.write_excel).
+
+Usage:
+    python -m benchmarks.bench_excel_export --rows 20000 100000 --repeat 3
+
+openpyxl serializes much faster when lxml is installed; both cases benefit.
+"""
+
+import argparse
+import io
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.utils import get_column_letter
+
+from benchmarks.common import measure, print_table
+from services.export_common import write_excel
+
+
+def make_frame(rows: int, seed: int = 42) -> pd.DataFrame:
+    """Same columns and types as the statistics tab table"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "Ticket ID": np.arange(1, rows + 1, dtype="int32"),
+        "Agent": pd.Categorical(rng.choice([f"Agent {i}" for i in range(50)], rows)),
+        "Customer Name": [f"Customer {i}" for i in rng.integers(0, rows // 3 + 1, rows)],
+        "Phone": [f"080{value:08d}" for value in rng.integers(0, 10**8, rows)],
+        "Problem Description": ["Problem description of the customer..."] * rows,
+        "Amount (₦)": np.round(rng.lognormal(9.8, 0.8, rows), 2),
+        "Creation Date": pd.Timestamp("2022-01-01") + pd.to_timedelta(rng.integers(0, 3 * 365 * 1440, rows), "min"),
+    })
+
+
+def legacy_excel(frame: pd.DataFrame) -> bytes:
+    """Previous export_to_excel body (without the styling)"""
+    buffer = io.BytesIO()
+    wb = Workbook()
+    ws = wb.active
+    start_row = 4
+    for col_idx, column_name in enumerate(frame.columns, 1):
+        ws.cell(row=start_row, column=col_idx, value=column_name)
+    for row_idx, row in enumerate(frame.itertuples(index=False, name=None), start_row + 1):
+        for col_idx, value in enumerate(row, 1):
+            ws.cell(row=row_idx, column=col_idx, value=str(value))
+    for col_idx in range(1, len(frame.columns) + 1):
+        max_length = 0
+        for row_idx in range(start_row, ws.max_row + 1):
+            cell_value = ws.cell(row=row_idx, column=col_idx).value
+            if cell_value:
+                max_length = max(max_length, len(str(cell_value)))
+        ws.column_dimensions[get_column_letter(col_idx)].width = min(max_length + 2, 50)
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[20_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        frame = make_frame(rows)
+        results = {
+            "cell by cell": measure(lambda: legacy_excel(frame), args.repeat),
+            "write-only stream": measure(lambda: write_excel({"Tickets": frame}, "Report"), args.repeat),
+        }
+        print_table(f"excel export - {rows:,} rows x {len(frame.columns)} columns", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Compare the legacy loader path (fetchall -> list of dicts -> DataFrame -> to_datetime)
+with DatabaseManager.fetch_frame on a generated database.
+
+Usage:
+    python -m benchmarks.bench_fetch_frame --problems 200000 --repeat 5
+"""
+
+import argparse
+import os
+
+import pandas as pd
+
+from benchmarks.common import measure, print_table
+from benchmarks.datagen import temporary_database
+from database import DatabaseManager
+
+
+def legacy_problems_frame(db: DatabaseManager) -> pd.DataFrame:
+    """Reproduces the previous loader path used by the statistics tab"""
+    df = pd.DataFrame(db.get_all_problems())
+    for column in ("created_at", "updated_at"):
+        df[column] = pd.to_datetime(df[column])
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--problems", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    path = temporary_database(args.problems)
+    try:
+        db = DatabaseManager(path)
+        results = {
+            "legacy (list of dicts)": measure(lambda: legacy_problems_frame(db), args.repeat),
+            "fetch_frame (DataFrame)": measure(db.get_all_problems_frame, args.repeat),
+            "fetch_frame (Arrow)": measure(lambda: db.get_all_problems_frame(as_arrow=True), args.repeat),
+        }
+        print_table(f"get_all_problems - {args.problems:,} tickets", results)
+
+        legacy = legacy_problems_frame(db)
+        typed = db.get_all_problems_frame()
+        print(f"\nDataFrame memory: legacy {legacy.memory_usage(deep=True).sum() / 1024 ** 2:.1f} MB, "
+              f"fetch_frame {typed.memory_usage(deep=True).sum() / 1024 ** 2:.1f} MB")
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""
+Headless page-render benchmark (streamlit.testing.v1.AppTest) at several dataset sizes.
+
+Every page of pages/ is rendered as admin, manager and agent (the pages the
+role can view), plus typical filter combinations of the ticket and team
+statistics tabs. For each scenario: first render with empty caches, then
+p50/p95 of the following reruns, Python allocation peak of one rerun, and
+the time of each tab (display() calls recorded by services/profiler).
+
+Each size runs in its own process (FIXTOP_DB_PATH, FIXTOP_PROFILE=1) on a
+database built by benchmarks/datagen; the report shows how each scenario
+scales with the ticket count.
+
+Usage:
+    python -m benchmarks.bench_pages --sizes 5000,50000 --repeat 5
+    python -m benchmarks.bench_pages --roles admin --pages 05_ticket --output /tmp/pages.json
+"""
+
+import argparse
+import json
+import math
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.bench_database import dataset_path, fixtures
+from benchmarks.common import ROOT_DIR
+
+PAGES_DIR = os.path.join(ROOT_DIR, "pages")
+
+# Page file -> page name of PermissionManager.ROLE_PERMISSIONS
+PAGES = {
+    "01_user": "user_page",
+    "02_teams": "teams_page",
+    "03_manager": "manager_page",
+    "04_agent": "agent_page",
+    "05_ticket": "ticket_page",
+}
+ROLES = ("admin", "manager", "agent")
+
+# Statistics tab filters: (page, page name, [(widget, key, value)]); a list value "first:N"
+# selects the first N options of the widget
+FILTERS = {
+    "paid, 2 crafts": ("05_ticket", "ticket_page", [
+        ("selectbox", "stats_payment_filter", "Paid"),
+        ("multiselect", "stats_domain_filter", "first:2"),
+    ]),
+    "3 agents, created in range": ("05_ticket", "ticket_page", [
+        ("multiselect", "stats_created_by_filter", "first:3"),
+        ("selectbox", "stats_date_filter", "Creation Date"),
+    ]),
+    "1 team, search": ("05_ticket", "ticket_page", [
+        ("multiselect", "stats_team_filter", "first:1"),
+        ("text_input", "stats_search_ticket", "Keita"),
+    ]),
+    "yearly chart": ("05_ticket", "ticket_page", [
+        ("selectbox", "stats_chart_grain", "year"),
+    ]),
+    "2 managers, modified in range": ("02_teams", "teams_page", [
+        ("multiselect", "statistics_manager_filter", "first:2"),
+        ("selectbox", "statistics_date_filter", "Modification Date"),
+    ]),
+    "team search, 5 agents": ("02_teams", "teams_page", [
+        ("text_input", "stats_search_team", "TEAM0"),
+        ("multiselect", "statistics_agent_filter", "first:5"),
+    ]),
+}
+
+
+# ==================== WORKER (one dataset) ====================
+
+def _sessions(db_path: str) -> dict:
+    """Session state of a logged-in admin, manager and agent of the generated database"""
+    from database import DatabaseManager
+
+    db = DatabaseManager(db_path)
+    ids = fixtures(db_path)
+    sessions = {}
+    for role, user_id in (("admin", 1), ("manager", ids["manager_id"]), ("agent", ids["member_id"])):
+        user = db.get_user_by_id(user_id)
+        roles = db.get_user_roles(user_id)
+        sessions[role] = {
+            "logged_in": True,
+            "authenticated": True,
+            "username": user["email"],
+            "user_id": user_id,
+            "user_name": user["name"],
+            "user_role": role,
+            "user_roles": roles,
+            "selected_role_id": next(r["id"] for r in roles if r["name"] == role),
+        }
+    return sessions
+
+
+def _scenarios(roles, pages) -> list:
+    """(name, role, page file, filters) of every scenario the roles can run"""
+    from permissions import PermissionManager
+
+    def allowed(role, page_name, action):
+        return PermissionManager.ROLE_PERMISSIONS[role].get(page_name, {}).get(action, False)
+
+    scenarios = []
+    for role in roles:
+        for page, page_name in PAGES.items():
+            if page in pages and allowed(role, page_name, "can_view"):
+                scenarios.append((f"{page} ({role})", role, page, []))
+        for name, (page, page_name, filters) in FILTERS.items():
+            if page in pages and allowed(role, page_name, "can_view_stats"):
+                scenarios.append((f"{page} ({role}) {name}", role, page, filters))
+    return scenarios
+
+
+def _apply_filters(app, filters):
+    for widget, key, value in filters:
+        element = getattr(app, widget)(key=key)
+        if isinstance(value, str) and value.startswith("first:"):
+            value = element.options[:int(value.split(":")[1])]
+        element.set_value(value)
+
+
+def _profiled_reruns(profile_log: str) -> list:
+    """Reruns recorded by services/profiler so far (a rerun stopped by st.stop() is not recorded)"""
+    from services.profiler import read_log
+
+    return read_log(profile_log) if os.path.exists(profile_log) else []
+
+
+def _tab_times(reruns: list) -> dict:
+    """Median time of each tab over the given reruns"""
+    times = {}
+    for rerun in reruns:
+        for call in rerun["calls"]:
+            if call["kind"] == "tab":
+                name = call["name"].replace("components.", "").replace(".display", "")
+                times.setdefault(name, []).append(call["ms"])
+    return {name: round(statistics.median(values), 2) for name, values in times.items()}
+
+
+def run_scenario(session: dict, page: str, filters, repeat: int, profile_log: str) -> dict:
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    app = AppTest.from_file(os.path.join(PAGES_DIR, f"{page}.py"), default_timeout=600)
+    for key, value in session.items():
+        app.session_state[key] = value
+
+    started = time.perf_counter()
+    app.run()
+    cold_ms = (time.perf_counter() - started) * 1000
+    if filters:
+        _apply_filters(app, filters)
+        app.run()
+
+    recorded = len(_profiled_reruns(profile_log))
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        app.run()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+
+    reruns = _profiled_reruns(profile_log)[recorded:]
+
+    tracemalloc.start()
+    try:
+        app.run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "cold_ms": cold_ms,
+        "p50_ms": statistics.median(timings),
+        "p95_ms": timings[min(len(timings) - 1, round(0.95 * (len(timings) - 1)))],
+        "peak_mb": peak / 1024 / 1024,
+        "tabs": _tab_times(reruns),
+        # Reruns ended early by st.stop(): the tabs after the stop were not rendered
+        "stopped": repeat - len(reruns),
+        "errors": [str(exception.value)[:200] for exception in app.exception],
+    }
+
+
+def worker(args):
+    """Runs every scenario on FIXTOP_DB_PATH and writes the results as JSON"""
+    sessions = _sessions(os.environ["FIXTOP_DB_PATH"])
+    results = {}
+    for name, role, page, filters in _scenarios(args.roles.split(","), args.pages.split(",")):
+        results[name] = run_scenario(sessions[role], page, filters, args.repeat,
+                                     os.environ["FIXTOP_PROFILE_LOG"])
+        print(f"  {name:<52}{results[name]['p50_ms']:>10.0f} ms", file=sys.stderr, flush=True)
+    with open(args.worker, "w") as output:
+        json.dump(results, output)
+
+
+# ==================== REPORT ====================
+
+def run_size(path: str, args, work_dir: str) -> dict:
+    output = os.path.join(work_dir, "results.json")
+    profile_log = os.path.join(work_dir, "profile.jsonl")
+    env = dict(os.environ, FIXTOP_DB_PATH=path, FIXTOP_PROFILE="1", FIXTOP_PROFILE_LOG=profile_log,
+               FIXTOP_SLOW_QUERY_MS="-1", PYTHONPATH=ROOT_DIR)
+    subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_pages", "--worker", output, "--repeat", str(args.repeat),
+         "--roles", args.roles, "--pages", args.pages],
+        cwd=ROOT_DIR, env=env, check=True,
+    )
+    with open(output) as results:
+        return json.load(results)
+
+
+def print_report(results: dict):
+    sizes = list(results)
+    scenarios = list(results[sizes[0]])
+
+    print("\nRerun p50 (ms) by ticket count")
+    header = "".join(f"{int(size):>12,}" for size in sizes)
+    print(f"{'scenario':<52}{header}{'scaling':>10}{'peak MB':>10}")
+    for name in scenarios:
+        p50 = [results[size][name]["p50_ms"] for size in sizes]
+        # Exponent of the growth: 1.0 means linear in the ticket count
+        scaling = ""
+        if len(sizes) > 1 and p50[0] > 0:
+            scaling = f"{math.log(p50[-1] / p50[0]) / math.log(int(sizes[-1]) / int(sizes[0])):.2f}"
+        errors = " ERROR" if any(results[size][name]["errors"] for size in sizes) else ""
+        if any(results[size][name]["stopped"] for size in sizes):
+            errors += " STOPPED"
+        print(f"{name:<52}{''.join(f'{value:>12.0f}' for value in p50)}{scaling:>10}"
+              f"{results[sizes[-1]][name]['peak_mb']:>10.1f}{errors}")
+
+    if any(result["stopped"] for size in sizes for result in results[size].values()):
+        print("STOPPED: st.stop() ended the reruns before the last tab, the following tabs were not rendered")
+
+    largest = results[sizes[-1]]
+    print(f"\nFirst render and slowest tabs at {int(sizes[-1]):,} tickets")
+    for name in scenarios:
+        tabs = sorted(largest[name]["tabs"].items(), key=lambda item: -item[1])[:3]
+        print(f"{name:<52}{largest[name]['cold_ms']:>10.0f} ms   "
+              + ", ".join(f"{tab} {ms:.0f}" for tab, ms in tabs))
+        for error in largest[name]["errors"]:
+            print(f"    error: {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="5000,50000", help="ticket counts, comma-separated")
+    parser.add_argument("--repeat", type=int, default=5, help="timed reruns per scenario")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--roles", default=",".join(ROLES))
+    parser.add_argument("--pages", default=",".join(PAGES))
+    parser.add_argument("--data-dir", help="keep the generated databases here and reuse them")
+    parser.add_argument("--output", help="also write the results as JSON")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args)
+        return
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="fixtop_pages_") as work_dir:
+        data_dir = args.data_dir or work_dir
+        os.makedirs(data_dir, exist_ok=True)
+        for problems in (int(size) for size in args.sizes.split(",")):
+            print(f"{problems:,} tickets", file=sys.stderr)
+            # Pages may write (cube table, caches): they run on a copy of the kept dataset
+            path = os.path.join(work_dir, "bench.db")
+            shutil.copyfile(dataset_path(problems, args.seed, data_dir), path)
+            results[str(problems)] = run_size(path, args, work_dir)
+            os.remove(path)
+
+    print_report(results)
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
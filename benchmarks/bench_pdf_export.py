@@ -0,0 +1,70 @@
+"""
+PDF export of the ticket statistics table: the previous single reportlab
+Table filled from iterrows() vs the LongTable chunk engine
+(services.pdf_report), rendered in-process so both are timed alike.
+
+Usage:
+    python -m benchmarks.bench_pdf_export --rows 5000 20000 --repeat 1
+"""
+
+import argparse
+import io
+
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import SimpleDocTemplate, Table
+
+from benchmarks.bench_excel_export import make_frame
+from benchmarks.common import measure, print_table
+from services.pdf_report import PAGE_MARGINS, render_report, table_style, truncate_frame
+from services.tickets.export_utils import PDF_COLUMN_LIMITS, PDF_DEFAULT_LIMIT
+
+
+def legacy_pdf(frame) -> bytes:
+    """Previous export_to_pdf body: per-cell truncation, one Table for every row"""
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, **PAGE_MARGINS)
+    table_data = [list(frame.columns)]
+    for _, row in frame.iterrows():
+        processed_row = []
+        for i, cell in enumerate(row):
+            cell_str = str(cell)
+            if i == 0:
+                processed_row.append(cell_str[:8])
+            elif i == 1:
+                processed_row.append(cell_str[:15])
+            elif i == 2:
+                processed_row.append(cell_str[:12])
+            elif i == 3:
+                processed_row.append(cell_str[:25] + "..." if len(cell_str) > 25 else cell_str)
+            else:
+                processed_row.append(cell_str[:15])
+        table_data.append(processed_row)
+    col_width = (A4[0] - 60) / len(frame.columns)
+    table = Table(table_data, colWidths=[col_width] * len(frame.columns))
+    table.setStyle(table_style())
+    doc.build([table])
+    return buffer.getvalue()
+
+
+def chunked_pdf(frame) -> bytes:
+    rows = truncate_frame(frame, PDF_COLUMN_LIMITS, PDF_DEFAULT_LIMIT)
+    return render_report("Report", [(None, rows)], "")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[5_000, 20_000])
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        frame = make_frame(rows)
+        results = {
+            "single Table": measure(lambda: legacy_pdf(frame), args.repeat),
+            "LongTable chunks": measure(lambda: chunked_pdf(frame), args.repeat),
+        }
+        print_table(f"pdf export - {rows:,} rows x {len(frame.columns)} columns", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Start-up cost of each page, in a fresh interpreter per page:
+- import time of what the page loads (python -X importtime), per top-level package
+- time to first render (AppTest run of the page, streamlit import included)
+
+Usage:
+    python -m benchmarks.bench_startup --pages 05_ticket 02_teams --role agent
+
+Every run appends one JSON line per page to --history and prints the change
+since the previous run of the same page and role, so the numbers can be
+tracked over time (commit the history file to keep them).
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from benchmarks.common import ROOT_DIR
+
+PAGES_DIR = os.path.join(ROOT_DIR, "pages")
+DEFAULT_HISTORY = os.path.join(ROOT_DIR, "benchmarks", "startup_history.jsonl")
+
+# Runs in the child interpreter: logs in with the given role and renders the page once
+CHILD_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+page, role = sys.argv[1], sys.argv[2]
+at = AppTest.from_file(page, default_timeout=120)
+at.session_state["logged_in"] = True
+at.session_state["username"] = "bench@fixtop.com"
+at.session_state["user_name"] = "Bench"
+at.session_state["user_id"] = 1
+at.session_state["user_role"] = role
+at.run()
+print(json.dumps({
+    "first_render_s": time.perf_counter() - started,
+    "exceptions": [str(exception.value)[:200] for exception in at.exception],
+}))
+"""
+
+
+def parse_importtime(stderr: str) -> dict:
+    """Import time (seconds) per top-level package: sum of the self time of its modules"""
+    packages = defaultdict(float)
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_time, _, name = line[len("import time:"):].split("|")
+        packages[name.strip().split(".")[0]] += int(self_time) / 1e6
+    return dict(packages)
+
+
+def measure_page(page: str, role: str) -> dict:
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD_SCRIPT, os.path.join(PAGES_DIR, f"{page}.py"), role],
+        cwd=ROOT_DIR, capture_output=True, text=True, env={**os.environ, "PYTHONPATH": ROOT_DIR},
+    )
+    wall = time.perf_counter() - started
+    output = [line for line in result.stdout.splitlines() if line.startswith("{")]
+    if result.returncode != 0 or not output:
+        raise RuntimeError(f"{page}: child failed\n{result.stderr[-2000:]}")
+
+    packages = parse_importtime(result.stderr)
+    return {
+        "page": page,
+        "role": role,
+        "process_s": round(wall, 3),
+        **{key: value for key, value in json.loads(output[-1]).items()},
+        "import_s": round(sum(packages.values()), 3),
+        "top_imports": {name: round(seconds, 3) for name, seconds in
+                        sorted(packages.items(), key=lambda item: -item[1])[:8]},
+    }
+
+
+def previous_run(history: str, page: str, role: str):
+    if not os.path.exists(history):
+        return None
+    last = None
+    with open(history) as history_file:
+        for line in history_file:
+            record = json.loads(line)
+            if record["page"] == page and record["role"] == role:
+                last = record
+    return last
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR,
+                              capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def main():
+    pages = sorted(name[:-3] for name in os.listdir(PAGES_DIR) if name[:2].isdigit() and name.endswith(".py"))
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", nargs="+", default=pages, choices=pages)
+    parser.add_argument("--role", default="admin")
+    parser.add_argument("--history", default=DEFAULT_HISTORY)
+    parser.add_argument("--no-history", action="store_true", help="do not record this run")
+    args = parser.parse_args()
+
+    revision = git_revision()
+    print(f"{'page':<14}{'first render (s)':>18}{'imports (s)':>13}{'vs previous':>14}  top imports")
+    for page in args.pages:
+        record = measure_page(page, args.role)
+        before = previous_run(args.history, page, args.role)
+        delta = f"{record['first_render_s'] - before['first_render_s']:+.3f}" if before else "-"
+        top = ", ".join(f"{name} {seconds:.2f}" for name, seconds in list(record["top_imports"].items())[:4])
+        print(f"{page:<14}{record['first_render_s']:>18.3f}{record['import_s']:>13.3f}{delta:>14}  {top}")
+        for exception in record["exceptions"]:
+            print(f"    exception: {exception}")
+
+        if not args.no_history:
+            record.update(date=datetime.now().isoformat(timespec="seconds"), revision=revision)
+            with open(args.history, "a") as history_file:
+                history_file.write(json.dumps(record) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Filter and groupby times on the tickets DataFrame, with and without the ticket
+schema (PROBLEM_DTYPES: categoricals, bool flags, int32 ids, parsed dates).
+
+"without" is the previous loader path: list of dicts -> DataFrame -> to_datetime,
+i.e. object strings and int64 flags.
+
+Usage:
+    python -m benchmarks.bench_ticket_schema --problems 200000 --repeat 5
+"""
+
+import argparse
+import os
+
+from benchmarks.bench_fetch_frame import legacy_problems_frame
+from benchmarks.common import measure, print_table
+from benchmarks.datagen import temporary_database
+from database import DatabaseManager
+
+
+def filter_tickets(df, agents, crafts, start, end):
+    """Same predicates as the statistics tab: payment, agent, domain and date range"""
+    mask = (
+        (df["is_paid"] == 1)
+        & df["created_by_name"].isin(agents)
+        & df["craft_ids"].isin(crafts)
+        & (df["created_at"] >= start)
+        & (df["created_at"] < end)
+    )
+    return df[mask]
+
+
+def group_tickets(df):
+    """Typical statistics aggregations: per agent and per month"""
+    per_agent = df.groupby("created_by_name", observed=True)["amount"].agg(["count", "sum"])
+    per_month = df.groupby([df["created_at"].dt.to_period("M"), "is_paid"], observed=True)["amount"].sum()
+    return per_agent, per_month
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--problems", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    path = temporary_database(args.problems)
+    try:
+        db = DatabaseManager(path)
+        frames = {
+            "without schema": legacy_problems_frame(db),
+            "with schema": db.get_all_problems_frame(),
+        }
+
+        sample = frames["with schema"]
+        agents = list(sample["created_by_name"].dropna().unique()[:50])
+        crafts = ["1", "3"]
+        start, end = sample["created_at"].quantile(0.25), sample["created_at"].quantile(0.75)
+
+        filter_results, group_results = {}, {}
+        for name, df in frames.items():
+            filter_results[name] = measure(lambda: filter_tickets(df, agents, crafts, start, end), args.repeat)
+            group_results[name] = measure(lambda: group_tickets(df), args.repeat)
+
+        print_table(f"filter - {args.problems:,} tickets", filter_results)
+        print_table(f"groupby - {args.problems:,} tickets", group_results)
+
+        print()
+        for name, df in frames.items():
+            print(f"DataFrame memory {name}: {df.memory_usage(deep=True).sum() / 1024 ** 2:.1f} MB")
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Write and read-back times and file sizes of the ticket export formats:
+CSV (stream_csv) vs Parquet (zstd, snappy) vs Arrow IPC, on a typed frame.
+
+Usage:
+    python -m benchmarks.bench_typed_export --rows 200000 --repeat 3
+"""
+
+import argparse
+import io
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from benchmarks.bench_excel_export import make_frame
+from benchmarks.common import measure, print_table
+from services.export_common import stream_csv, write_parquet, write_arrow
+
+
+def to_bytes(write, frame, **kwargs) -> bytes:
+    buffer = io.BytesIO()
+    write(frame, buffer, **kwargs)
+    return buffer.getvalue()
+
+
+def csv_bytes(frame) -> bytes:
+    with stream_csv(frame) as spool:
+        return spool.read()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    frame = make_frame(args.rows)
+    writers = {
+        "csv": (lambda: csv_bytes(frame), lambda data: pd.read_csv(io.BytesIO(data))),
+        "parquet zstd": (lambda: to_bytes(write_parquet, frame, compression="zstd"),
+                         lambda data: pq.read_table(io.BytesIO(data)).to_pandas()),
+        "parquet snappy": (lambda: to_bytes(write_parquet, frame, compression="snappy"),
+                           lambda data: pq.read_table(io.BytesIO(data)).to_pandas()),
+        "arrow ipc": (lambda: to_bytes(write_arrow, frame),
+                      lambda data: pa.ipc.open_file(pa.BufferReader(data)).read_pandas()),
+    }
+
+    write_results, read_results = {}, {}
+    for name, (write, read) in writers.items():
+        data = write()
+        write_results[f"{name} ({len(data) / 1e6:.1f} MB)"] = measure(write, args.repeat)
+        read_results[name] = measure(lambda: read(data), args.repeat)
+    print_table(f"write - {args.rows:,} rows", write_results)
+    print_table(f"read back with pandas - {args.rows:,} rows", read_results)
+
+
+if __name__ == "__main__":
+    main()
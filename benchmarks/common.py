@@ -0,0 +1,73 @@
+"""
+Shared helpers for the benchmark scripts: paths and measurements (databases: benchmarks/datagen).
+"""
+
+import os
+import statistics
+import time
+import tracemalloc
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE_DB = os.path.join(ROOT_DIR, "fixtop_agent_copy.db")
+
+
+def measure(fn, repeat: int = 5) -> dict:
+    """
+    Run fn several times and report wall time (median, min) and the Python
+    allocation peak of a single run (tracemalloc).
+    """
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "median_s": statistics.median(timings),
+        "min_s": min(timings),
+        "peak_mb": peak / 1024 / 1024,
+    }
+
+
+def measure_latency(fn, repeat: int = 20, warmup: int = 1) -> dict:
+    """
+    Run fn repeat times (after warmup runs) and report latency percentiles (ms),
+    plus the Python allocation peak of a single run (tracemalloc).
+    """
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "p50_ms": statistics.median(timings),
+        "p95_ms": timings[min(len(timings) - 1, round(0.95 * (len(timings) - 1)))],
+        "peak_mb": peak / 1024 / 1024,
+    }
+
+
+def print_table(title: str, results: dict):
+    """Print {name: measure()} results as an aligned text table."""
+    print(f"\n{title}")
+    print(f"{'case':<28}{'median (ms)':>14}{'min (ms)':>12}{'peak (MB)':>12}")
+    for name, result in results.items():
+        print(f"{name:<28}{result['median_s'] * 1000:>14.1f}"
+              f"{result['min_s'] * 1000:>12.1f}{result['peak_mb']:>12.1f}")
@@ -0,0 +1,332 @@
+"""
+Synthetic production-scale database with the exact schema of fixtop_agent_copy.db
+
+The schema (tables, indexes, triggers) is copied from the reference database,
+as are the reference rows (roles, crafts, specialities). The ticket cube
+(problems_cube, its triggers) is left out: it is derived data, built from the
+generated tickets by ensure_cube on first use. Users, user roles,
+teams, memberships, customers and problems are generated from a seed: the
+same arguments always produce the same rows.
+
+- users: 1 admin per 1000, one manager per team plus a few spares, agents;
+  about 5% of the managers also hold the agent role (user_role)
+- teams: one distinct manager each; about 85% of the agents belong to one
+  active team, some have an older, inactive membership
+- problems: multi-year timestamps with a growing volume, agents of uneven
+  activity, one craft (as the ticket forms store) with 1-3 of its specialities, amounts
+  clustered around the commission thresholds (manager bonus from 20,000,
+  agent cap reached at 50,000), fewer recent tickets paid
+
+Rows are bulk-loaded with executemany in large transactions, without journal;
+indexes and triggers are created once the tables are filled, so the *_log
+tables start empty (--log-rows loads with the triggers instead).
+
+    python -m benchmarks.datagen /tmp/fixtop_1m.db --problems 1000000 --users 20000 --teams 2000
+    FIXTOP_DB_PATH=/tmp/fixtop_1m.db streamlit run app.py
+"""
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+from benchmarks.common import SOURCE_DB
+from services.password_policy import hash_password
+from services.tickets.commissions import AGENT_COMMISSION_CAP, AGENT_COMMISSION_RATE, MANAGER_COMMISSION_THRESHOLD
+from services.tickets.cube import CUBE_TABLE
+
+# Tables copied as is from the reference database
+REFERENCE_TABLES = ("role", "craft", "speciality")
+ROLE_IDS = {"agent": 1, "manager": 2, "admin": 3}
+
+DEFAULT_PASSWORD = "Fixtop@2025"
+BATCH_ROWS = 50_000
+
+PROBLEM_COLUMNS = ("id", "customer_name", "customer_phone", "problem_desc", "craft_ids", "speciality_ids", "amount",
+                   "is_active", "is_paid", "created_by", "updated_by", "created_at", "updated_at")
+
+# Amount at which the agent commission reaches its cap
+AGENT_CAP_AMOUNT = AGENT_COMMISSION_CAP / AGENT_COMMISSION_RATE
+
+FIRST_NAMES = ("Amina", "Chinedu", "Fatou", "Ibrahim", "Kemi", "Moussa", "Ngozi", "Oumar", "Segun", "Yaw",
+               "Aïcha", "Emeka", "Funmi", "Kwame", "Lamine", "Nadia", "Tunde", "Zainab", "Bola", "Sékou")
+LAST_NAMES = ("Adeyemi", "Bello", "Diallo", "Eze", "Keita", "Mensah", "Nwosu", "Okafor", "Sow", "Traoré",
+              "Abubakar", "Balogun", "Coulibaly", "Danjuma", "Ekwueme", "Fofana", "Ibe", "Ndiaye", "Obi", "Yeboah")
+
+
+def _schema(source: str) -> dict:
+    """
+    CREATE statements of the reference database, by object type (internal objects
+    and the ticket cube excluded: a copied cube would not match the generated tickets)
+    """
+    conn = sqlite3.connect(source)
+    try:
+        rows = conn.execute(
+            "SELECT type, sql FROM sqlite_master WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%' "
+            "AND tbl_name != ? AND NOT (type = 'trigger' AND name LIKE ?) ORDER BY rowid",
+            (CUBE_TABLE, f"{CUBE_TABLE}_%")
+        ).fetchall()
+        reference = {table: (
+            [column[1] for column in conn.execute(f'PRAGMA table_info("{table}")')],
+            conn.execute(f'SELECT * FROM "{table}"').fetchall(),
+        ) for table in REFERENCE_TABLES}
+    finally:
+        conn.close()
+    schema = {"table": [], "index": [], "trigger": [], "view": []}
+    for object_type, sql in rows:
+        schema[object_type].append(sql)
+    schema["reference"] = reference
+    return schema
+
+
+def _timestamps(rng: np.random.Generator, count: int, start: np.datetime64, end: np.datetime64,
+                growth: float = 1.0) -> np.ndarray:
+    """Timestamps between start and end, during working hours; growth > 1 puts more of them near the end"""
+    days = int((end - start) / np.timedelta64(1, "D"))
+    day = np.floor(rng.power(growth, count) * days).astype("int64") if growth != 1 else rng.integers(0, days, count)
+    seconds = rng.integers(7 * 3600, 20 * 3600, count)
+    return start + day.astype("timedelta64[D]") + seconds.astype("timedelta64[s]")
+
+
+def _as_text(timestamps: np.ndarray) -> list:
+    """Same format as SQLite datetime('now'): YYYY-MM-DD HH:MM:SS"""
+    return np.char.replace(np.datetime_as_string(timestamps, unit="s"), "T", " ").astype(object).tolist()
+
+
+def _names(rng: np.random.Generator, count: int) -> list:
+    first = np.array(FIRST_NAMES, dtype=object)[rng.integers(0, len(FIRST_NAMES), count)]
+    last = np.array(LAST_NAMES, dtype=object)[rng.integers(0, len(LAST_NAMES), count)]
+    return (first + " " + last).tolist()
+
+
+def _amounts(rng: np.random.Generator, count: int) -> np.ndarray:
+    """Mixture: free tickets, small jobs, around the manager threshold, around the agent cap, large jobs"""
+    component = rng.choice(5, size=count, p=[0.08, 0.37, 0.30, 0.18, 0.07])
+    amounts = np.zeros(count)
+    small = component == 1
+    amounts[small] = rng.lognormal(np.log(6_000), 0.6, small.sum())
+    threshold = component == 2
+    amounts[threshold] = rng.normal(MANAGER_COMMISSION_THRESHOLD, 4_000, threshold.sum())
+    cap = component == 3
+    amounts[cap] = rng.normal(AGENT_CAP_AMOUNT, 8_000, cap.sum())
+    large = component == 4
+    amounts[large] = rng.lognormal(np.log(150_000), 0.9, large.sum())
+    # Prices are quoted in steps of 50
+    return np.maximum(np.round(amounts / 50) * 50, 0)
+
+
+def _insert(conn: sqlite3.Connection, table: str, columns, rows, batch_rows: int = BATCH_ROWS):
+    sql = f'INSERT INTO "{table}" ({", ".join(columns)}) VALUES ({", ".join("?" * len(columns))})'
+    for start in range(0, len(rows), batch_rows):
+        conn.executemany(sql, rows[start:start + batch_rows])
+
+
+def generate_database(path: str, problems: int = 100_000, users: int = 2_000, teams: int = 200,
+                      seed: int = 42, years: int = 3, end: str = "2025-10-01", password: str = DEFAULT_PASSWORD,
+                      log_rows: bool = False, source: str = SOURCE_DB) -> dict:
+    """
+    Creates the database file (replaced if it exists) and returns the row count per table
+    Args:
+        log_rows: create the triggers before loading, so every generated row is also logged
+    """
+    rng = np.random.default_rng(seed)
+    schema = _schema(source)
+    for suffix in ("", "-journal", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+    end_time = np.datetime64(end, "s")
+    start_time = end_time - np.timedelta64(365 * years, "D")
+    # One bcrypt hash shared by every generated account: hashing 20k passwords would take hours
+    password_hash = hash_password(password)
+
+    conn = sqlite3.connect(path, isolation_level=None)
+    try:
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute("BEGIN")
+        for sql in schema["table"]:
+            conn.execute(sql)
+        if log_rows:
+            for sql in schema["trigger"]:
+                conn.execute(sql)
+        for table, (columns, rows) in schema["reference"].items():
+            _insert(conn, table, columns, rows)
+
+        crafts = {craft_id: [] for craft_id, in conn.execute("SELECT id FROM craft WHERE is_active = 1 ORDER BY id")}
+        for speciality_id, craft_id in conn.execute(
+                "SELECT id, craft_id FROM speciality WHERE is_active = 1 ORDER BY id"):
+            crafts.setdefault(craft_id, []).append(speciality_id)
+
+        # ==================== USERS ====================
+        admins = max(1, users // 1000)
+        managers = min(users - admins - 1, teams + max(1, teams // 10))
+        agents = users - admins - managers
+        if agents < 1 or managers < teams:
+            raise ValueError(f"{users} users cannot staff {teams} teams")
+        roles = np.array(["admin"] * admins + ["manager"] * managers + ["agent"] * agents, dtype=object)
+        user_ids = np.arange(1, users + 1)
+        user_created = np.sort(_timestamps(rng, users, start_time, end_time))
+        # The first admin exists before everyone else
+        user_created[0] = start_time
+        user_created_text = _as_text(user_created)
+        names = _names(rng, users)
+        user_rows = [
+            (int(user_id), f"{rng.integers(10**10, 10**11)}", name,
+             f"{role}{user_id}@fixtop.com", password_hash, ROLE_IDS[role],
+             int(rng.random() > 0.03) if role != "admin" else 1, 1, 1, created, created)
+            for user_id, name, role, created in zip(user_ids, names, roles, user_created_text)
+        ]
+        _insert(conn, "user", ("id", "nin", "name", "email", "password", "role_id", "is_active",
+                               "created_by", "updated_by", "created_at", "updated_at"), user_rows)
+
+        manager_ids = user_ids[roles == "manager"]
+        agent_ids = user_ids[roles == "agent"]
+        user_role_rows = [(ROLE_IDS[role], int(user_id), 1, 1, 1, created, created)
+                          for user_id, role, created in zip(user_ids, roles, user_created_text)]
+        for manager_id in manager_ids[rng.random(len(manager_ids)) < 0.05]:
+            created = user_created_text[manager_id - 1]
+            user_role_rows.append((ROLE_IDS["agent"], int(manager_id), 1, 1, 1, created, created))
+        _insert(conn, "user_role", ("role_id", "user_id", "is_active", "created_by", "updated_by",
+                                    "created_at", "updated_at"), user_role_rows)
+
+        # ==================== TEAMS ====================
+        team_managers = rng.permutation(manager_ids)[:teams]
+        team_created = _as_text(_timestamps(rng, teams, start_time, end_time, growth=0.7))
+        team_rows = [
+            (team_id, f"TEAM{team_id:03d}", f"Team {LAST_NAMES[team_id % len(LAST_NAMES)]} {team_id}",
+             int(manager_id), 1, 1, 1, created, created, f"Team {team_id} description")
+            for team_id, manager_id, created in zip(range(1, teams + 1), team_managers, team_created)
+        ]
+        _insert(conn, "team", ("id", "code", "name", "manager_id", "is_active", "created_by", "updated_by",
+                               "created_at", "updated_at", "description"), team_rows)
+
+        # One active team for 85% of the agents, an older inactive one for 10% of them
+        agent_teams = rng.integers(1, teams + 1, len(agent_ids))
+        in_team = rng.random(len(agent_ids)) < 0.85
+        moved = in_team & (rng.random(len(agent_ids)) < 0.12)
+        member_rows = [(str(team_id), int(agent_id), 1) for team_id, agent_id in
+                       zip(agent_teams[in_team], agent_ids[in_team])]
+        member_rows += [(str(team_id), int(agent_id), 0) for team_id, agent_id in
+                        zip((agent_teams[moved] % teams) + 1, agent_ids[moved])]
+        member_created = _as_text(_timestamps(rng, len(member_rows), start_time, end_time, growth=0.8))
+        _insert(conn, "team_member", ("team_id", "member_id", "is_active", "created_by", "updated_by",
+                                      "created_at", "updated_at"),
+                [row + (1, 1, created, created) for row, created in zip(member_rows, member_created)])
+
+        # ==================== CUSTOMERS ====================
+        customer_count = max(1, problems // 3)
+        customer_names = [f"{name} #{index}" for index, name in enumerate(_names(rng, customer_count), 1)]
+        customer_phones = [f"0{number}" for number in rng.integers(7 * 10**9, 10**10, customer_count).tolist()]
+        customer_created = _as_text(_timestamps(rng, customer_count, start_time, end_time, growth=1.5))
+        _insert(conn, "customer", ("name", "phone", "is_active", "created_by", "updated_by",
+                                   "created_at", "updated_at"),
+                [(name, phone, 1, 1, 1, created, created)
+                 for name, phone, created in zip(customer_names, customer_phones, customer_created)])
+
+        # ==================== PROBLEMS ====================
+        # Uneven activity: a few agents create most of the tickets; some managers create tickets too
+        creators = np.concatenate([agent_ids, manager_ids[: max(1, len(manager_ids) // 5)]])
+        weights = rng.pareto(1.5, len(creators)) + 1
+        created_by = rng.choice(creators, size=problems, p=weights / weights.sum())
+        # Ids follow creation order, as in the application
+        created_at = np.sort(_timestamps(rng, problems, start_time, end_time, growth=1.6))
+        # Returning customers: the most recent ones come back most often
+        customer = np.minimum((rng.pareto(1.2, problems) * customer_count / 20).astype("int64"), customer_count - 1)
+        updated_at = created_at + (rng.random(problems) < 0.3) * rng.integers(0, 72 * 3600, problems).astype(
+            "timedelta64[s]")
+
+        craft_ids = np.array(list(crafts), dtype="int64")
+        craft_weights = rng.dirichlet(np.full(len(craft_ids), 2.0))
+        craft = rng.choice(craft_ids, size=problems, p=craft_weights)
+        speciality_counts = rng.choice([0, 1, 2, 3], size=problems, p=[0.05, 0.65, 0.25, 0.05])
+
+        amounts = _amounts(rng, problems)
+        # Payment probability falls for the last months (tickets not settled yet)
+        age_days = (end_time - created_at) / np.timedelta64(1, "D")
+        is_paid = rng.random(problems) < np.where(age_days < 90, 0.35 + age_days / 300, 0.72)
+        is_paid &= amounts > 0
+
+        created_text = _as_text(created_at)
+        updated_text = _as_text(updated_at)
+        specialities = {craft_id: np.array(ids, dtype="int64") for craft_id, ids in crafts.items()}
+        rows = []
+        for i in range(problems):
+            choices = specialities[int(craft[i])]
+            count = min(int(speciality_counts[i]), len(choices))
+            picked = np.sort(rng.choice(choices, size=count, replace=False)) if count else ()
+            rows.append((
+                i + 1, customer_names[customer[i]], customer_phones[customer[i]],
+                f"Ticket #{i + 1}: {'repair' if amounts[i] else 'diagnostic'}",
+                str(craft[i]), ",".join(map(str, picked)) or None, float(amounts[i]),
+                int(rng.random() > 0.02), int(is_paid[i]), int(created_by[i]), int(created_by[i]),
+                created_text[i], updated_text[i],
+            ))
+            if len(rows) == BATCH_ROWS:
+                _insert(conn, "problems", PROBLEM_COLUMNS, rows)
+                rows = []
+        _insert(conn, "problems", PROBLEM_COLUMNS, rows)
+
+        if not log_rows:
+            for sql in schema["trigger"]:
+                conn.execute(sql)
+        for sql in schema["index"] + schema["view"]:
+            conn.execute(sql)
+        conn.execute("COMMIT")
+        conn.execute("PRAGMA journal_mode = DELETE")
+        conn.execute("ANALYZE")
+
+        return {table: conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+                for table in ("user", "user_role", "team", "team_member", "customer", "problems", "problems_log")}
+    finally:
+        conn.close()
+
+
+def generate_bench_database(path: str, problems: int, users: int = None, seed: int = 42) -> dict:
+    """
+    Database of the benchmarks: one user per 50 tickets (at least 200) unless
+    users is given, one team per 10 users, tickets up to a fixed end date
+    """
+    users = users or max(200, problems // 50)
+    return generate_database(path, problems=problems, users=users, teams=max(10, users // 10), seed=seed,
+                             end="2025-10-01")
+
+
+def temporary_database(problems: int, users: int = None, seed: int = 42) -> str:
+    """Benchmark database (generate_bench_database) in a new temporary file, removed by the caller"""
+    fd, path = tempfile.mkstemp(prefix="fixtop_bench_", suffix=".db")
+    os.close(fd)
+    generate_bench_database(path, problems, users=users, seed=seed)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="database file to create (replaced if it exists)")
+    parser.add_argument("--problems", type=int, default=100_000)
+    parser.add_argument("--users", type=int, default=2_000)
+    parser.add_argument("--teams", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--end", default=datetime.now().strftime("%Y-%m-%d"), help="date of the last ticket")
+    parser.add_argument("--password", default=DEFAULT_PASSWORD, help="password of every generated account")
+    parser.add_argument("--log-rows", action="store_true", help="fire the log triggers while loading")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    counts = generate_database(args.path, args.problems, args.users, args.teams, args.seed, args.years,
+                               args.end, args.password, args.log_rows)
+    elapsed = time.perf_counter() - started
+    size_mb = os.path.getsize(args.path) / 1024 / 1024
+    print(f"{args.path}: {size_mb:.1f} MB in {elapsed:.1f}s")
+    for table, count in counts.items():
+        print(f"  {table:<12}{count:>12,}")
+    print(f"Accounts: admin1@fixtop.com ... password {args.password!r}")
+
+
+if __name__ == "__main__":
+    main()
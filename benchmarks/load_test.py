@@ -0,0 +1,343 @@
+"""
+Concurrency load test of the data layer (DatabaseManager) on a generated database.
+
+N sessions run in threads (one Streamlit server process) or in processes
+(several server processes on one file) for a fixed duration, each one
+repeating the actions of its role with a think time between them:
+- agent: create and update tickets, notifications, delete permission check
+- manager: dashboard statistics, team members, full ticket frame
+- admin: CSV export of every ticket
+Each session logs in first (authenticate_user, bcrypt).
+
+Reported: throughput, latency percentiles per action, "database is locked"
+errors, and the lock wait, estimated per write statement and commit as the
+time beyond its uncontended mean (measured alone before the load starts,
+see services/query_log). Run the same load before and after a change
+(--wal, pooling, caching) to compare.
+
+Usage:
+    python -m benchmarks.load_test --sessions 20 --duration 30 --mix agent=70,manager=25,admin=5
+    python -m benchmarks.load_test --sessions 20 --mode process --wal --output /tmp/load.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+from benchmarks.bench_database import dataset_path
+from benchmarks.datagen import DEFAULT_PASSWORD
+
+ACTIONS = {
+    "agent": (("create_problem", 35), ("update_problem", 35), ("get_recent_notifications", 20),
+              ("can_delete_ticket", 10)),
+    "manager": (("get_dashboard_stats", 40), ("get_team_members", 40), ("get_all_problems_frame", 20)),
+    "admin": (("export_csv", 100),),
+}
+
+WRITE_STATEMENTS = ("insert", "update", "delete", "replace", "commit")
+
+
+def _percentile(values: list, fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, round(fraction * (len(values) - 1)))] if values else 0.0
+
+
+def session_plan(db_path: str, mix: dict, sessions: int, seed: int) -> list:
+    """(role, user) of every session; agents and managers are real users of the database"""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(db_path)
+    try:
+        agents = [row for row in conn.execute("""
+            SELECT tm.member_id, u.email FROM team_member tm JOIN user u ON u.id = tm.member_id
+            WHERE tm.is_active = 1 ORDER BY tm.member_id
+        """)]
+        managers = [row for row in conn.execute("""
+            SELECT t.manager_id, u.email, t.id FROM team t JOIN user u ON u.id = t.manager_id
+            WHERE t.is_active = 1 ORDER BY t.id
+        """)]
+        admin = conn.execute("SELECT id, email FROM user WHERE role_id = 3 ORDER BY id LIMIT 1").fetchone()
+    finally:
+        conn.close()
+
+    roles = rng.choices(list(mix), weights=list(mix.values()), k=sessions)
+    plan = []
+    for role in roles:
+        if role == "agent":
+            user_id, email = rng.choice(agents)
+            plan.append((role, {"id": user_id, "email": email}))
+        elif role == "manager":
+            user_id, email, team_id = rng.choice(managers)
+            plan.append((role, {"id": user_id, "email": email, "team_id": team_id}))
+        else:
+            plan.append((role, {"id": admin[0], "email": admin[1]}))
+    return plan
+
+
+def _outcome(result, error: Exception = None) -> str:
+    """ok, locked or error; DatabaseManager write methods report failures as (False, message)"""
+    message = str(error) if error is not None else ""
+    if error is None and isinstance(result, tuple) and result and result[0] is False:
+        message = str(result[1])
+    if not message:
+        return "ok"
+    return "locked" if "database is locked" in message else "error"
+
+
+def run_session(db_path: str, role: str, user: dict, duration: float, think_ms: float, seed: int) -> list:
+    """Repeats the role's actions until the deadline; returns (action, ms, outcome) per call"""
+    from database import DatabaseManager
+    from services.export_common import stream_csv
+
+    rng = random.Random(seed)
+    db = DatabaseManager(db_path)
+    conn = sqlite3.connect(db_path)
+    try:
+        own_tickets = [row[0] for row in conn.execute(
+            "SELECT id FROM problems WHERE created_by = ? ORDER BY id DESC LIMIT 50", (user["id"],))]
+    finally:
+        conn.close()
+
+    def export_csv():
+        with stream_csv(db.iter_problems()) as spool:
+            return len(spool.read())
+
+    def create_problem():
+        result = db.create_problem(f"Load customer {rng.randrange(10**6)}", "0800000000", "Load test ticket",
+                                   user["id"], amount=float(rng.randrange(0, 60_000, 50)),
+                                   craft_ids="1", speciality_ids="1")
+        if result[0]:
+            own_tickets.append(result[2])
+        return result
+
+    calls = {
+        "create_problem": create_problem,
+        "update_problem": lambda: db.update_problem(
+            rng.choice(own_tickets), amount=float(rng.randrange(0, 60_000, 50)), is_paid=rng.randrange(2),
+            updated_by=user["id"]) if own_tickets else create_problem(),
+        "get_recent_notifications": db.get_recent_notifications,
+        "can_delete_ticket": lambda: db.can_delete_ticket(user["id"], user["id"]),
+        "get_dashboard_stats": lambda: db.get_dashboard_stats(
+            rng.choice(["all", "today", "last_week", "last_month", "this_year"])),
+        "get_team_members": lambda: db.get_team_members(user["team_id"]),
+        "get_all_problems_frame": db.get_all_problems_frame,
+        "export_csv": export_csv,
+    }
+    names = [name for name, _ in ACTIONS[role]]
+    weights = [weight for _, weight in ACTIONS[role]]
+
+    samples = []
+
+    def timed(name, fn):
+        started = time.perf_counter()
+        result, error = None, None
+        try:
+            result = fn()
+        except Exception as e:
+            error = e
+        samples.append((name, (time.perf_counter() - started) * 1000, _outcome(result, error)))
+
+    timed("login", lambda: db.authenticate_user(user["email"], DEFAULT_PASSWORD))
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, weights=weights)[0]
+        timed(name, calls[name])
+        if think_ms:
+            time.sleep(rng.expovariate(1 / think_ms) / 1000)
+    return samples
+
+
+def _process_session(arguments) -> tuple:
+    """Session in a worker process: its samples and the statement statistics of the process"""
+    from services import query_log
+
+    query_log.SLOW_QUERY_MS = -1
+    samples = run_session(*arguments)
+    return samples, query_log.statement_stats().to_dict("records")
+
+
+def calibrate(db_path: str, user: dict, runs: int = 20) -> dict:
+    """Uncontended mean time (ms) of the write statements and commits of the agent actions"""
+    from database import DatabaseManager
+    from services import query_log
+
+    rng = random.Random(0)
+    db = DatabaseManager(db_path)
+    query_log.reset_statement_stats()
+    for _ in range(runs):
+        _, _, ticket_id = db.create_problem("Calibration", "0800000000", "Calibration ticket", user["id"],
+                                            amount=float(rng.randrange(0, 60_000, 50)), craft_ids="1",
+                                            speciality_ids="1")
+        db.update_problem(ticket_id, amount=float(rng.randrange(0, 60_000, 50)), updated_by=user["id"])
+    stats = query_log.statement_stats()
+    query_log.reset_statement_stats()
+    return {row["sql"]: row["mean_ms"] for row in stats.to_dict("records")
+            if row["sql"].lower().startswith(WRITE_STATEMENTS)}
+
+
+def lock_wait_ms(stats: list, baseline: dict) -> float:
+    """Time of the write statements and commits beyond their uncontended mean"""
+    total = 0.0
+    for row in stats:
+        mean = baseline.get(row["sql"])
+        if mean is not None:
+            total += max(0.0, row["total_ms"] - row["count"] * mean)
+    return total
+
+
+def _merge_stats(stats_lists) -> list:
+    merged = {}
+    for stats in stats_lists:
+        for row in stats:
+            entry = merged.setdefault(row["sql"], {"sql": row["sql"], "count": 0, "total_ms": 0.0})
+            entry["count"] += row["count"]
+            entry["total_ms"] += row["total_ms"]
+    return list(merged.values())
+
+
+def run_load(db_path: str, plan: list, mode: str, duration: float, think_ms: float, seed: int) -> tuple:
+    """(samples of every session, merged statement statistics, wall seconds)"""
+    from services import query_log
+
+    arguments = [(db_path, role, user, duration, think_ms, seed + index) for index, (role, user) in enumerate(plan)]
+    started = time.perf_counter()
+    if mode == "process":
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(len(plan)) as pool:
+            results = pool.map(_process_session, arguments)
+        samples = [sample for session_samples, _ in results for sample in session_samples]
+        stats = _merge_stats(stats for _, stats in results)
+    else:
+        query_log.reset_statement_stats()
+        results = [None] * len(plan)
+
+        def target(index):
+            results[index] = run_session(*arguments[index])
+
+        threads = [threading.Thread(target=target, args=(index,)) for index in range(len(plan))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        samples = [sample for session_samples in results if session_samples for sample in session_samples]
+        stats = query_log.statement_stats().to_dict("records")
+    return samples, stats, time.perf_counter() - started
+
+
+def report(samples: list, stats: list, baseline: dict, wall_s: float, duration: float, sessions: int) -> dict:
+    """Totals and per-action figures; rates are per second of load (duration, after the logins)"""
+    actions = {}
+    for name, ms, outcome in samples:
+        entry = actions.setdefault(name, {"ms": [], "locked": 0, "error": 0})
+        entry["ms"].append(ms)
+        if outcome != "ok":
+            entry[outcome] += 1
+
+    # The logins (bcrypt, once per session) are listed with the actions but left out of the totals
+    operations = [(name, ms) for name, ms, _ in samples if name != "login"]
+    summary = {
+        "sessions": sessions,
+        "wall_s": wall_s,
+        "operations": len(operations),
+        "throughput_ops": len(operations) / duration,
+        "p50_ms": _percentile([ms for _, ms in operations], 0.50),
+        "p95_ms": _percentile([ms for _, ms in operations], 0.95),
+        "p99_ms": _percentile([ms for _, ms in operations], 0.99),
+        "locked_errors": sum(entry["locked"] for entry in actions.values()),
+        "other_errors": sum(entry["error"] for entry in actions.values()),
+        "lock_wait_ms": lock_wait_ms(stats, baseline),
+        "actions": {
+            name: {
+                "count": len(entry["ms"]),
+                "per_s": len(entry["ms"]) / duration,
+                "p50_ms": _percentile(entry["ms"], 0.50),
+                "p95_ms": _percentile(entry["ms"], 0.95),
+                "p99_ms": _percentile(entry["ms"], 0.99),
+                "max_ms": max(entry["ms"]),
+                "locked": entry["locked"],
+                "errors": entry["error"],
+            }
+            for name, entry in sorted(actions.items())
+        },
+    }
+    writes = sum(row["count"] for row in stats if row["sql"] in baseline)
+
+    print(f"\n{sessions} sessions, {duration:.0f}s of load ({wall_s:.1f}s with start-up and logins): "
+          f"{summary['operations']:,} operations, "
+          f"{summary['throughput_ops']:.1f} ops/s, p50 {summary['p50_ms']:.1f} ms, "
+          f"p95 {summary['p95_ms']:.1f} ms, p99 {summary['p99_ms']:.1f} ms")
+    print(f"'database is locked': {summary['locked_errors']}, other errors: {summary['other_errors']}, "
+          f"lock wait {summary['lock_wait_ms'] / 1000:.2f}s over {writes:,} write statements "
+          f"({summary['lock_wait_ms'] / max(writes, 1):.1f} ms each)")
+    print(f"\n{'action':<26}{'count':>8}{'per s':>8}{'p50 (ms)':>10}{'p95 (ms)':>10}{'p99 (ms)':>10}"
+          f"{'max (ms)':>10}{'locked':>8}{'errors':>8}")
+    for name, action in summary["actions"].items():
+        print(f"{name:<26}{action['count']:>8}{action['per_s']:>8.1f}{action['p50_ms']:>10.1f}"
+              f"{action['p95_ms']:>10.1f}{action['p99_ms']:>10.1f}{action['max_ms']:>10.1f}"
+              f"{action['locked']:>8}{action['errors']:>8}")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=30, help="seconds of load")
+    parser.add_argument("--mode", choices=("thread", "process"), default="thread")
+    parser.add_argument("--mix", default="agent=70,manager=25,admin=5", help="share of sessions per role")
+    parser.add_argument("--think-ms", type=float, default=200, help="mean pause between two actions")
+    parser.add_argument("--problems", type=int, default=100_000, help="tickets of the generated database")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--wal", action="store_true", help="switch the database to WAL before the load")
+    parser.add_argument("--data-dir", help="keep the generated databases here and reuse them")
+    parser.add_argument("--output", help="also write the summary as JSON")
+    args = parser.parse_args()
+
+    from services import query_log
+
+    # The load test measures the statements, not the slow-query log
+    query_log.SLOW_QUERY_MS = -1
+    mix = {role: float(share) for role, share in (item.split("=") for item in args.mix.split(","))}
+    unknown = set(mix) - set(ACTIONS)
+    if unknown:
+        parser.error(f"unknown role(s) in --mix: {', '.join(sorted(unknown))}")
+
+    work_dir = tempfile.mkdtemp(prefix="fixtop_load_")
+    try:
+        data_dir = args.data_dir or work_dir
+        os.makedirs(data_dir, exist_ok=True)
+        # Writes go to a copy: the kept dataset stays identical between runs
+        path = os.path.join(work_dir, "load.db")
+        shutil.copyfile(dataset_path(args.problems, args.seed, data_dir), path)
+        if args.wal:
+            conn = sqlite3.connect(path)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.close()
+
+        plan = session_plan(path, mix, args.sessions, args.seed)
+        agent = next((user for role, user in plan if role == "agent"), None) or \
+            session_plan(path, {"agent": 1}, 1, args.seed)[0][1]
+        baseline = calibrate(path, agent)
+
+        roles = {role: sum(1 for r, _ in plan if r == role) for role in mix}
+        print(f"{args.problems:,} tickets, {'WAL' if args.wal else 'rollback journal'}, "
+              f"{'threads' if args.mode == 'thread' else 'processes'}, "
+              + ", ".join(f"{count} {role}(s)" for role, count in roles.items()))
+        samples, stats, wall_s = run_load(path, plan, args.mode, args.duration, args.think_ms, args.seed)
+        summary = report(samples, stats, baseline, wall_s, args.duration, args.sessions)
+        summary.update(mode=args.mode, wal=args.wal, problems=args.problems, mix=mix, think_ms=args.think_ms)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(summary, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
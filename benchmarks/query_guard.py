@@ -0,0 +1,196 @@
+"""
+Query-count guard: SQL statements and connections per loader or page must not
+grow with the data (N+1 patterns: one query per team, per ticket...).
+
+Each scenario runs on generated databases of increasing team counts (users
+and tickets scale with the teams) inside a QueryCounter (services/query_log).
+Caches are cleared before every run, so the counts are those of a cold
+rerun. Any count that differs between sizes is reported with the statements
+whose executions grew, and the exit code is 1.
+
+Usage:
+    python -m benchmarks.query_guard                       # 10, 100 and 1000 teams
+    python -m benchmarks.query_guard --teams 10,200 --scenarios "02_teams (admin)"
+
+From other code (e.g. a test):
+    counts = query_counts({"managers": get_available_managers}, team_counts=(10, 1000))
+    assert_constant_counts(counts)
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+from benchmarks.common import ROOT_DIR
+from benchmarks.datagen import generate_database
+
+DEFAULT_TEAM_COUNTS = (10, 100, 1000)
+
+
+def dataset_for_teams(teams: int, seed: int, data_dir: str) -> str:
+    """
+    Generated database with the given team count (12 users and 20 tickets per team),
+    its ticket cube already built: building it is a one-time cost, not a per-rerun one
+    """
+    from database import DatabaseManager
+    from services.tickets.cube import ensure_cube
+
+    path = os.path.join(data_dir, f"fixtop_teams_{teams}_{seed}.db")
+    if not os.path.exists(path):
+        generate_database(path, problems=teams * 20, users=teams * 12, teams=teams, seed=seed, end="2025-10-01")
+        ensure_cube(DatabaseManager(path))
+    return path
+
+
+def _use_database(path: str):
+    """Points the shared DatabaseManager at path and empties the Streamlit caches"""
+    import streamlit as st
+
+    from database import db_manager
+    from services.tickets import cube
+
+    db_manager.db_path = path
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    # Cold process: ensure_cube checks the cube again, whichever scenario ran before
+    cube._ready_databases.discard(path)
+
+
+def _page(page: str, role: str):
+    """Scenario rendering a page once as role (see benchmarks/bench_pages)"""
+    def run(path: str):
+        from streamlit.testing.v1 import AppTest
+
+        from benchmarks.bench_pages import PAGES_DIR, _sessions
+
+        session = _sessions(path)[role]
+        app = AppTest.from_file(os.path.join(PAGES_DIR, f"{page}.py"), default_timeout=600)
+        for key, value in session.items():
+            app.session_state[key] = value
+        app.run()
+        if app.exception:
+            raise RuntimeError(f"{page} ({role}): {app.exception[0].value}")
+    return run
+
+
+def _available_managers(path: str):
+    from services.teams.data_loader import get_available_managers
+
+    get_available_managers()
+
+
+def _deletable_tickets(path: str):
+    from benchmarks.bench_database import fixtures
+    from database import db_manager
+    from services.identity import load_identity
+    from services.tickets.data_loader import load_deletable_tickets_for
+
+    identity = load_identity(db_manager, fixtures(path)["manager_id"], "manager")
+    load_deletable_tickets_for(tuple(sorted(identity.deletable_creator_ids())))
+
+
+def _teams_with_members(path: str):
+    from database import db_manager
+    from services.teams.data_loader import load_teams_data
+
+    load_teams_data()
+    db_manager.get_members_by_team()
+
+
+# Scenario name -> callable(database path); the database is already in use when it runs
+SCENARIOS = {
+    "teams.get_available_managers": _available_managers,
+    "tickets.load_deletable_tickets (manager)": _deletable_tickets,
+    "teams.load_teams_data + members": _teams_with_members,
+    "02_teams (admin)": _page("02_teams", "admin"),
+    "02_teams (manager)": _page("02_teams", "manager"),
+    "05_ticket (manager)": _page("05_ticket", "manager"),
+    "05_ticket (agent)": _page("05_ticket", "agent"),
+}
+
+
+def query_counts(scenarios: dict, team_counts=DEFAULT_TEAM_COUNTS, seed: int = 42, data_dir: str = None) -> dict:
+    """{scenario: {team count: QueryCounter}} of one cold run per scenario and size"""
+    from services.query_log import QueryCounter
+
+    counts = {name: {} for name in scenarios}
+    with tempfile.TemporaryDirectory(prefix="fixtop_guard_") as work_dir:
+        data_dir = data_dir or work_dir
+        os.makedirs(data_dir, exist_ok=True)
+        for teams in team_counts:
+            path = dataset_for_teams(teams, seed, data_dir)
+            for name, scenario in scenarios.items():
+                _use_database(path)
+                with QueryCounter() as counter:
+                    scenario(path)
+                counts[name][teams] = counter
+    return counts
+
+
+def count_regressions(counts: dict) -> list:
+    """Messages for every scenario whose statement or connection count changes with the data"""
+    messages = []
+    for name, by_size in counts.items():
+        sizes = sorted(by_size)
+        smallest, largest = by_size[sizes[0]], by_size[sizes[-1]]
+        statements = [by_size[size].statements for size in sizes]
+        connections = [by_size[size].connections for size in sizes]
+        if len(set(statements)) == 1 and len(set(connections)) == 1:
+            continue
+        grown = [(sql, largest.by_sql[sql] - smallest.by_sql.get(sql, 0)) for sql in largest.by_sql
+                 if largest.by_sql[sql] != smallest.by_sql.get(sql, 0)]
+        grown.sort(key=lambda item: -abs(item[1]))
+        details = "; ".join(f"{delta:+d} x {sql[:90]}" for sql, delta in grown[:3])
+        messages.append(f"{name}: statements {statements}, connections {connections} "
+                        f"for {sizes} teams. {details}")
+    return messages
+
+
+def assert_constant_counts(counts: dict):
+    """AssertionError listing the scenarios whose query counts grow with the data"""
+    messages = count_regressions(counts)
+    assert not messages, "Query counts depend on the data size:\n" + "\n".join(messages)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--teams", default=",".join(map(str, DEFAULT_TEAM_COUNTS)), help="team counts")
+    parser.add_argument("--scenarios", help="only these scenarios, comma-separated")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data-dir", help="keep the generated databases here and reuse them")
+    args = parser.parse_args()
+
+    os.chdir(ROOT_DIR)
+    from services import query_log
+
+    # Counting only: no slow-query log
+    query_log.SLOW_QUERY_MS = -1
+    scenarios = SCENARIOS
+    if args.scenarios:
+        names = args.scenarios.split(",")
+        unknown = [name for name in names if name not in SCENARIOS]
+        if unknown:
+            parser.error(f"unknown scenario(s): {', '.join(unknown)} (known: {', '.join(SCENARIOS)})")
+        scenarios = {name: SCENARIOS[name] for name in names}
+
+    team_counts = [int(teams) for teams in args.teams.split(",")]
+    counts = query_counts(scenarios, team_counts, args.seed, args.data_dir)
+
+    print(f"\n{'scenario':<44}" + "".join(f"{f'{teams} teams':>16}" for teams in team_counts))
+    for name, by_size in counts.items():
+        cells = "".join(f"{f'{by_size[teams].statements} / {by_size[teams].connections}':>16}"
+                        for teams in team_counts)
+        print(f"{name:<44}{cells}")
+    print("(statements / connections)")
+
+    messages = count_regressions(counts)
+    for message in messages:
+        print(f"GROWS {message}")
+    if messages:
+        sys.exit(1)
+    print("\nQuery counts are constant")
+
+
+if __name__ == "__main__":
+    main()
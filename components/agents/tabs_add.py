@@ -2,12 +2,16 @@ import time
 
 import streamlit as st
 
+from components.user_import import show_user_import
 from database import db_manager
+from services.identity import current_user_id
 from services.agents.data_loader import load_roles_data, is_valid_email
+from services.profiler import profiled
 
 # Load roles globally for reuse
 roles = load_roles_data()
 
+@profiled("tab")
 def display():
     st.subheader("Add an Agent")
     with st.form("add_agent_form"):
@@ -46,7 +50,7 @@ def display():
                     if not role_id:
                         st.error("❌ Invalid role")
                     else:
-                        created_by = st.session_state.get('user_id', 1)  # Connected user ID
+                        created_by = current_user_id()  # None for the built-in admin account
                         # Create user
                         success, message, _ = db_manager.create_user(
                             name=name.strip(),
@@ -63,3 +67,5 @@ def display():
                             st.rerun()
                         else:
                             st.error(f"❌ {message}")
+
+    show_user_import(roles, key="agents_import", allowed_roles=["agent"], default_roles=["agent"])
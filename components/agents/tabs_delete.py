@@ -2,8 +2,10 @@ import streamlit as st
 
 from database import db_manager
 from services.agents.data_loader import load_agents_data
+from services.profiler import profiled
 
 
+@profiled("tab")
 def display():
     st.header("🗑️ Delete an agent")
     st.warning("⚠️ **Warning:** Deleting an agent is irreversible!")
@@ -3,9 +3,11 @@ import time
 from database import db_manager
 from permissions import PermissionManager
 from services.agents.data_loader import load_agents_data , is_valid_email , load_roles_data
+from services.profiler import profiled
 
 roles = load_roles_data()
 
+@profiled("tab")
 def display():
     st.subheader("Edit an Agent")
     agents_df = load_agents_data()
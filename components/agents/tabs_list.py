@@ -1,6 +1,8 @@
 import streamlit as st
 from services.agents.data_loader import load_agents_data
+from services.profiler import profiled
 
+@profiled("tab")
 def display():
     st.subheader("📋 Agent List")
 
@@ -5,8 +5,10 @@ import streamlit as st
 
 from database import db_manager
 from services.agents.data_loader import load_agents_data
+from services.profiler import profiled
 
 
+@profiled("tab")
 def display():
     st.subheader("Agent Statistics")
     try:
@@ -0,0 +1,58 @@
+import streamlit as st
+from datetime import datetime
+from services.export_jobs import EXPORT_FORMATS, get_export_jobs
+
+
+def show_export_job(label: str, fmt: str, filter_hash, epoch, build_sheets, title: str, file_prefix: str,
+                    button_key: str, **options):
+    """
+    Export button backed by a background job
+    Args:
+        filter_hash, epoch: identity of the exported data (filters, data version)
+        build_sheets: callable returning {sheet name: DataFrame}, only called when a job is started
+        options: passed to the export (e.g. PDF truncation limits)
+    """
+    jobs = get_export_jobs()
+    key = jobs.job_key(fmt, filter_hash, epoch)
+    status = jobs.status(key, fmt)
+
+    if status["state"] == "ready" and st.button(f"📦 Get {fmt.upper()}", key=f"{button_key}_fetch"):
+        # The download button embeds the file content: read it only when asked for, not on every rerun
+        try:
+            content = jobs.read(key, fmt)
+        except FileNotFoundError:
+            # Evicted from the cache since status(): the export has to be generated again
+            st.warning("This export has expired, please generate it again.")
+            status = jobs.status(key, fmt)
+        else:
+            st.download_button(
+                label=f"⬇️ Download {fmt.upper()}",
+                data=content,
+                file_name=f"{file_prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{fmt}",
+                mime=EXPORT_FORMATS[fmt],
+                key=f"{button_key}_download",
+                on_click="ignore",
+            )
+
+    if status["state"] in ("missing", "failed"):
+        if status["state"] == "failed":
+            st.error(f"Export failed: {status['error']}")
+        if st.button(label, key=button_key):
+            jobs.submit(key, fmt, build_sheets(), title, **options)
+            status = jobs.status(key, fmt)
+
+    if status["state"] == "running":
+        _poll_export_job(key, fmt)
+
+
+@st.fragment(run_every=1)
+def _poll_export_job(key: str, fmt: str):
+    """Progress of a running job, refreshed every second until the file is ready"""
+    status = get_export_jobs().status(key, fmt)
+    if status["state"] != "running":
+        # Full rerun: the caller then shows the download (or the error)
+        st.rerun()
+    if status["progress"] is not None:
+        st.progress(status["progress"], text=f"Preparing {fmt.upper()}... {status['progress']:.0%}")
+    else:
+        st.progress(0.0, text=f"Preparing {fmt.upper()}... {status['elapsed']:.0f}s")
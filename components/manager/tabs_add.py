@@ -1,10 +1,13 @@
 import streamlit as st
 import time
 from database import db_manager
+from services.identity import current_user_id
 from services.managers.data_loader import is_valid_email , load_roles_data
+from services.profiler import profiled
 
 roles = load_roles_data()
 
+@profiled("tab")
 def display():
     st.subheader("Add a Manager")
     with st.form("add_manager_form"):
@@ -42,7 +45,7 @@ def display():
                     if not role_id:
                         st.error("❌ Invalid role")
                     else:
-                        created_by = st.session_state.get('user_id', 1)  # ID of connected user
+                        created_by = current_user_id()  # None for the built-in admin account
                         # Use create_user instead of add_user
                         success, message, _ = db_manager.create_user(
                             name=name.strip(),
@@ -1,21 +1,25 @@
 import streamlit as st
-from services.tickets.data_loader import load_tickets
+from services.tickets.data_loader import load_tickets_frame
 from database import db_manager
 from services.cache_utils import clear_cache
+from services.profiler import profiled
 
+@profiled("tab")
 def display():
     st.header("Delete a Ticket")
     st.warning(
         "⚠️ Warning: This action will mark the ticket as inactive (logical deletion)."
     )
 
-    tickets = load_tickets()
+    tickets_df = load_tickets_frame()
 
-    if tickets:
-        # Ticket selection for deletion
+    if not tickets_df.empty:
+        # Ticket selection for deletion (read straight from the shared columns)
         ticket_options = {
-            f"#{t['id']} - {t['customer_name']} ({t['customer_phone']})": t["id"]
-            for t in tickets
+            f"#{ticket_id} - {name} ({phone})": int(ticket_id)
+            for ticket_id, name, phone in zip(
+                tickets_df["id"], tickets_df["customer_name"], tickets_df["customer_phone"]
+            )
         }
 
         selected_ticket_key = st.selectbox(
@@ -4,9 +4,11 @@ import streamlit as st
 from database import db_manager
 from permissions import PermissionManager
 from services.managers.data_loader import load_managers_data , load_roles_data , is_valid_email
+from services.profiler import profiled
 
 roles = load_roles_data()
 
+@profiled("tab")
 def display():
     st.subheader("Edit a Manager")
     managers_df = load_managers_data()
@@ -2,8 +2,10 @@ import streamlit as st
 import pandas as pd
 
 from services.managers.data_loader import load_managers_data
+from services.profiler import profiled
 
 
+@profiled("tab")
 def display():
     st.subheader("Manager List")
 
@@ -2,8 +2,10 @@ import streamlit as st
 import pandas as pd
 
 from database import db_manager
+from services.profiler import profiled
 
 
+@profiled("tab")
 def display():
     st.subheader("Manager Statistics")
     try:
@@ -1,6 +1,79 @@
 import streamlit as st
+from services.memory_report import session_memory_report, shared_memory_report, format_bytes
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from services.identity import refresh_identity
+from services.metrics import record_session
+from services.profiler import PROFILE_LOG, PROFILING_ENABLED, finish_rerun, start_rerun, summarize_calls
+from services.query_log import SLOW_QUERY_MS, statement_stats
+
+
+def show_memory_report():
+    """Admin-only expander: memory used by this session and by the shared ticket store"""
+    with st.expander("🧠 Memory usage"):
+        # The expander body runs on every rerun, even collapsed: measure only when asked
+        if not st.button("Measure", key="memory_report_measure"):
+            return
+        report = session_memory_report()
+        st.markdown(f"**This session:** {format_bytes(int(report['bytes'].sum()))}")
+        if not report.empty:
+            display = report.head(10).assign(size=report['bytes'].head(10).map(format_bytes))
+            st.dataframe(display[['key', 'type', 'size']], hide_index=True, use_container_width=True)
+
+        try:
+            shared = shared_memory_report()
+            if shared is None:
+                st.caption("Shared ticket store not loaded yet")
+                return
+            st.markdown(f"**Shared ticket store:** {format_bytes(shared['bytes'])} "
+                        f"({shared['tickets']} tickets, all sessions)")
+        except Exception as e:
+            st.caption(f"Shared ticket store unavailable: {e}")
+
+
+def show_query_report(top: int = 10):
+    """Admin-only expander: SQL statements of this process, by total time and by count"""
+    with st.expander("🐢 SQL statements"):
+        stats = statement_stats()
+        st.markdown(f"**{int(stats['count'].sum())}** statements, "
+                    f"**{int(stats['slow'].sum())}** slower than {SLOW_QUERY_MS:.0f} ms")
+        columns = ['sql', 'count', 'total_ms', 'max_ms', 'rows']
+        by_time, by_count = st.tabs(["By total time", "By count"])
+        with by_time:
+            st.dataframe(stats.head(top)[columns].round(1), hide_index=True, use_container_width=True)
+        with by_count:
+            st.dataframe(stats.sort_values('count', ascending=False).head(top)[columns].round(1),
+                         hide_index=True, use_container_width=True)
+        st.caption("Slow statements and their plans: python -m services.query_log --plans")
+
+
+def show_profile_panel(profile):
+    """Admin-only expander: timings and SQL activity of the rerun that just ended (FIXTOP_PROFILE=1)"""
+    with st.expander(f"⏱️ Rerun profile ({profile.wall_ms:.0f} ms)"):
+        st.markdown(f"**SQL:** {profile.queries} queries, {profile.rows} rows  \n"
+                    f"**Cache:** {profile.cache_hits} hits, {profile.cache_misses} misses")
+        summary = summarize_calls(profile.calls)
+        if not summary.empty:
+            summary['name'] = summary['name'].str.replace(r'^(components|services)\.', '', regex=True)
+            st.dataframe(summary[['name', 'calls', 'ms', 'queries', 'rows']].round(1),
+                         hide_index=True, use_container_width=True)
+        st.caption(f"Inclusive times. Logged to {PROFILE_LOG}")
+
+
+def show_rerun_profile(page: str):
+    """Ends the profiled rerun started by show_sidebar(): logs it and fills the admin panel"""
+    profile = finish_rerun(page, role=st.session_state.get('user_role'))
+    if profile is not None and profile.panel is not None:
+        with profile.panel.container():
+            show_profile_panel(profile)
+
 
 def show_sidebar():
+    profile = start_rerun()  # None unless profiling or metrics are enabled
+    ctx = get_script_run_ctx()
+    if ctx is not None:
+        record_session(ctx.session_id)
+    # Once per rerun: reloads the roles and team only if the memberships changed
+    refresh_identity()
     with st.sidebar:
         if hasattr(st.session_state, 'user_name'):
             st.markdown(f"**Logged in as:** {st.session_state.user_name}")
@@ -10,6 +83,12 @@ def show_sidebar():
             st.markdown(f"**Logged in as:** {st.session_state.username}")
             st.markdown(f"**Role:** Administrator")
 
+        if st.session_state.get('user_role') == 'admin':
+            show_memory_report()
+            show_query_report()
+            if profile is not None and PROFILING_ENABLED:
+                profile.panel = st.empty()
+
         st.markdown("---")
         if st.button("🚪 Logout"):
             for key in list(st.session_state.keys()):
@@ -2,7 +2,9 @@ import streamlit as st
 from database import db_manager
 from services.teams.data_loader import get_available_managers
 import time
+from services.profiler import profiled
 
+@profiled("tab")
 def display():
     st.subheader("➕ Add Team")
     available_managers = get_available_managers()
@@ -3,7 +3,9 @@ from services.teams.data_loader import load_teams_data
 import time
 from database import db_manager
 from services.cache_utils import clear_cache
+from services.profiler import profiled
 
+@profiled("tab")
 def display():
     st.subheader("🗑️ Delete Team")
     st.warning("⚠️ **Attention:** Team deletion is irreversible!")
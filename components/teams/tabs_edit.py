@@ -4,7 +4,9 @@ from services.teams.data_loader import load_teams_data , get_available_managers
 import time
 import pandas as pd
 from services.cache_utils import clear_cache
+from services.profiler import profiled
 
+@profiled("tab")
 def display():
     st.subheader("✏️ Edit Team")
     teams_df = load_teams_data()
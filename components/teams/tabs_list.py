@@ -4,7 +4,9 @@ from datetime import datetime, timedelta
 from services.teams.data_loader import load_teams_data
 from services.teams.export_utils import export_to_csv
 from database import db_manager
+from services.profiler import profiled
 
+@profiled("tab")
 def display():
     # List Tab
     st.subheader("📋 Teams List")
@@ -25,11 +27,8 @@ def display():
         # Manager filter
         all_managers = []
         if not teams_df.empty:
-            for _, team in teams_df.iterrows():
-                team_details = db_manager.get_team_by_id(team['id'])
-                if team_details and team_details.get('manager_name'):
-                    all_managers.append(team_details['manager_name'])
-            all_managers = sorted(list(set(all_managers)))
+            # manager_name comes with the teams (get_teams_frame): no query per team
+            all_managers = sorted(teams_df['manager_name'].dropna().unique().tolist())
 
         manager_filter = st.selectbox(
             "👨‍💼 Filter by Manager",
@@ -67,37 +66,28 @@ def display():
 
     # Apply advanced filters (same logic as before)
     filtered_df = teams_df.copy()
+    # Members of every team, read once instead of once per team
+    members_by_team = db_manager.get_members_by_team() if not filtered_df.empty else {}
     if not filtered_df.empty:
         # Apply search filter
         if search_team.strip():
             search_term = search_team.strip().lower()
-            team_codes = {}
-            for _, team in filtered_df.iterrows():
-                team_details = db_manager.get_team_by_id(team['id'])
-                if team_details:
-                    team_codes[team['id']] = team_details.get('code', '').lower()
-
             filtered_df = filtered_df[
                 filtered_df['name'].str.lower().str.contains(search_term, na=False) |
                 filtered_df['description'].str.lower().str.contains(search_term, na=False) |
                 filtered_df['id'].astype(str).str.contains(search_term, na=False) |
-                filtered_df['id'].apply(lambda x: search_term in team_codes.get(x, ''))
+                filtered_df['code'].fillna('').str.lower().str.contains(search_term, regex=False)
                 ]
 
         # Apply manager filter
         if manager_filter != "All managers":
-            team_ids_with_manager = []
-            for _, team in filtered_df.iterrows():
-                team_details = db_manager.get_team_by_id(team['id'])
-                if team_details and team_details.get('manager_name') == manager_filter:
-                    team_ids_with_manager.append(team['id'])
-            filtered_df = filtered_df[filtered_df['id'].isin(team_ids_with_manager)]
+            filtered_df = filtered_df[filtered_df['manager_name'] == manager_filter]
 
         # Apply member count filter
         if member_count_filter != "All":
             team_ids_by_member_count = []
             for _, team in filtered_df.iterrows():
-                member_count = len(db_manager.get_team_members(team['id']))
+                member_count = len(members_by_team.get(team['id'], []))
                 if member_count_filter == "No members (0)" and member_count == 0:
                     team_ids_by_member_count.append(team['id'])
                 elif member_count_filter == "Small teams (1-5)" and 1 <= member_count <= 5:
@@ -132,7 +122,7 @@ def display():
 
         enhanced_data = []
         for _, team in filtered_df.iterrows():
-            members = db_manager.get_team_members(team['id'])
+            members = members_by_team.get(team['id'], [])
 
             try:
                 created_date = pd.to_datetime(team['created_at']).strftime('%d/%m/%Y')
@@ -3,10 +3,18 @@ import pandas as pd
 from datetime import datetime
 from services.teams.data_loader import load_teams_data
 from services.teams.export_utils import export_to_csv, export_to_pdf, export_to_excel
+from services.export_common import export_key, frame_key, get_cached_export, cache_export
+from services.tickets.cube import cached_rollup
+from services.tickets.ticket_store import STORE_SOURCE_TABLES
 from database import db_manager
-import plotly.express as px
+from services.lazy_import import lazy_import
+from services.profiler import profiled
 
+# plotly is only imported when a chart is drawn
+px = lazy_import("plotly.express")
 
+
+@profiled("tab")
 def display():
     st.subheader("📊 Team Statistics")
 
@@ -113,11 +121,14 @@ def display():
                     team_ids_with_manager.append(team['id'])
             filtered_teams = filtered_teams[filtered_teams['id'].isin(team_ids_with_manager)]
 
+        # Members of every team, read once instead of once per team
+        members_by_team = db_manager.get_members_by_team()
+
         # Agent filter
         if selected_agents:
             team_ids_with_agent = []
             for _, team in filtered_teams.iterrows():
-                members = db_manager.get_team_members(team['id'])
+                members = members_by_team.get(team['id'], [])
                 for member in members:
                     if member.get('user_name') in selected_agents:
                         team_ids_with_agent.append(team['id'])
@@ -140,33 +151,14 @@ def display():
         # Key Metrics
         st.subheader("📈 Key Metrics")
 
-        # Calculate metrics
-        total_teams = len(filtered_teams)
-        total_members = 0
-        teams_with_managers = 0
-        empty_teams = 0
-
-        for _, team in filtered_teams.iterrows():
-            team_details = db_manager.get_team_by_id(team['id'])
-            if team_details:
-                members_count = len(team_details.get('members', []))
-                total_members += members_count
-                if team_details.get('manager_name'):
-                    teams_with_managers += 1
-                if members_count == 0:
-                    empty_teams += 1
-
-        avg_team_size = total_members / total_teams if total_teams > 0 else 0
-
         # Key metrics
         col1, col2, col3, col4 = st.columns(4)
 
         total_teams = len(filtered_teams)
-        total_members = sum(
-            len(db_manager.get_team_members(team['id'])) for _, team in filtered_teams.iterrows())
+        member_counts = filtered_teams['id'].map(lambda team_id: len(members_by_team.get(team_id, [])))
+        total_members = int(member_counts.sum())
         avg_team_size = total_members / total_teams if total_teams > 0 else 0
-        teams_without_members = sum(
-            1 for _, team in filtered_teams.iterrows() if len(db_manager.get_team_members(team['id'])) == 0)
+        teams_without_members = int((member_counts == 0).sum())
 
         with col1:
             st.metric("📊 Total Teams", total_teams)
@@ -182,7 +174,7 @@ def display():
 
         enhanced_data = []
         for _, team in filtered_teams.iterrows():
-            members = db_manager.get_team_members(team['id'])
+            members = members_by_team.get(team['id'], [])
 
             try:
                 created_date = pd.to_datetime(team['created_at']).strftime('%d/%m/%Y')
@@ -192,9 +184,8 @@ def display():
             # Use manager_name directly from teams_df (already available from get_teams())
             manager_name = team.get('manager_name', 'Not assigned') or 'Not assigned'
 
-            # Get team details to retrieve the code
-            team_details = db_manager.get_team_by_id(team['id'])
-            team_code = team_details.get('code', 'N/A') if team_details else 'N/A'
+            # The code comes with the teams (get_teams_frame)
+            team_code = team.get('code') or 'N/A'
 
             # If team has no members, show one row with "No members"
             if not members:
@@ -241,33 +232,47 @@ def display():
         export_col1, export_col2, export_col3 = st.columns(3)
 
         with export_col1:
-            csv_data = export_to_csv(display_df)
+            # Built only on request, then kept while the displayed data is unchanged
+            display_key = frame_key(display_df)
+            csv_gzip = st.checkbox("Compress CSV (gzip)", key="team_stats_csv_gzip")
+            csv_key = export_key("team_statistics_csv", display_key, csv_gzip)
+            csv_data = get_cached_export(csv_key)
+            if csv_data is None and st.button("📄 Export to CSV", key="prepare_team_csv_button"):
+                csv_data = cache_export(csv_key, export_to_csv(display_df, compress=csv_gzip))
             if csv_data:
                 st.download_button(
-                    label="📄 Export to CSV",
+                    label="⬇️ Download CSV",
                     data=csv_data,
-                    file_name=f"team_statistics_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                    mime="text/csv",
+                    file_name=f"team_statistics_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+                              + (".gz" if csv_gzip else ""),
+                    mime="application/gzip" if csv_gzip else "text/csv",
                     help="Download the filtered data as CSV file"
                 )
 
         with export_col2:
-            if st.button("📄 Export to PDF", key="export_pdf_button"):
-                pdf_data = export_to_pdf(display_df, "Team Statistics Report")
-                if pdf_data:
-                    st.download_button(
-                        label="📄 Export to PDF",
-                        data=pdf_data,
-                        file_name=f"team_statistics_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
-                        mime="application/pdf",
-                        help="Download the filtered data as PDF file"
-                    )
+            # reportlab is only imported when the PDF is asked for
+            pdf_key = export_key("team_statistics_pdf", display_key)
+            pdf_data = get_cached_export(pdf_key)
+            if pdf_data is None and st.button("📄 Export to PDF", key="export_pdf_button"):
+                pdf_data = cache_export(pdf_key, export_to_pdf(display_df, "Team Statistics Report"))
+            if pdf_data:
+                st.download_button(
+                    label="⬇️ Download PDF",
+                    data=pdf_data,
+                    file_name=f"team_statistics_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
+                    mime="application/pdf",
+                    help="Download the filtered data as PDF file"
+                )
 
         with export_col3:
-            excel_data = export_to_excel(display_df, "Team Statistics Report")
+            # Same for openpyxl and the Excel workbook
+            excel_key = export_key("team_statistics_xlsx", display_key)
+            excel_data = get_cached_export(excel_key)
+            if excel_data is None and st.button("📊 Export to Excel", key="export_excel_button"):
+                excel_data = cache_export(excel_key, export_to_excel(display_df, "Team Statistics Report"))
             if excel_data:
                 st.download_button(
-                    label="📊 Export to Excel",
+                    label="⬇️ Download Excel",
                     data=excel_data,
                     file_name=f"team_statistics_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
                     mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
@@ -283,10 +288,7 @@ def display():
                     # Chart 1: Teams by Manager (Bar Chart)
                     manager_data = []
                     for _, team in filtered_teams.iterrows():
-                        team_details = db_manager.get_team_by_id(team['id'])
-                        manager_name = team_details.get('manager_name',
-                                                        'No Manager') if team_details else 'No Manager'
-                        manager_data.append(manager_name)
+                        manager_data.append(team.get('manager_name') or 'No Manager')
 
                     if manager_data:
                         manager_counts = pd.Series(manager_data).value_counts()
@@ -304,12 +306,10 @@ def display():
                     team_sizes = []
                     team_names = []
                     for _, team in filtered_teams.iterrows():
-                        team_details = db_manager.get_team_by_id(team['id'])
-                        if team_details:
-                            members_count = len(team_details.get('members', []))
-                            if members_count > 0:  # Only show teams with members
-                                team_sizes.append(members_count)
-                                team_names.append(team['name'])
+                        members_count = len(members_by_team.get(team['id'], []))
+                        if members_count > 0:  # Only show teams with members
+                            team_sizes.append(members_count)
+                            team_names.append(team['name'])
 
                     if team_sizes:
                         fig_pie = px.pie(
@@ -335,6 +335,24 @@ def display():
                     )
                     fig_line.update_layout(height=400)
                     st.plotly_chart(fig_line, use_container_width=True)
+
+                # Chart 4: Ticket activity of the filtered teams (read from the ticket cube)
+                st.subheader("🎫 Ticket Activity by Team")
+                activity = cached_rollup(
+                    db_manager.get_data_version(STORE_SOURCE_TABLES), grain="month",
+                    group_by=("period", "team_name"), team_ids=tuple(int(i) for i in filtered_teams['id']),
+                )
+                if not activity.empty:
+                    fig_activity = px.bar(
+                        activity, x="period", y="amount_sum", color="team_name",
+                        title="Monthly Ticket Amount by Team",
+                        labels={'period': 'Month', 'amount_sum': 'Amount (₦)', 'team_name': 'Team'},
+                        hover_data=["tickets", "agent_commission_sum", "manager_commission_sum"],
+                    )
+                    fig_activity.update_layout(height=400)
+                    st.plotly_chart(fig_activity, use_container_width=True)
+                else:
+                    st.info("🎫 No tickets recorded for these teams yet.")
             else:
                 st.info("📊 No data available for charts. Create teams first to view analytics.")
 
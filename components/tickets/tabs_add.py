@@ -2,7 +2,9 @@ import streamlit as st
 from database import db_manager
 from services.tickets.data_loader import load_domains, load_specialties_by_domain
 from services.cache_utils import clear_cache
+from services.profiler import profiled
 
+@profiled("tab")
 def display():
     st.header("Add a New Ticket")
 
@@ -2,8 +2,10 @@ import streamlit as st
 from services.tickets.data_loader import load_deletable_tickets
 from database import db_manager
 from services.cache_utils import clear_cache
-from permissions import PermissionManager
+from services.identity import get_identity
+from services.profiler import profiled
 
+@profiled("tab")
 def display():
     st.header("Delete a Ticket")
     st.error(
@@ -17,16 +19,13 @@ def display():
     tickets = load_deletable_tickets()
     
     # Afficher les règles de suppression selon le rôle
-    current_user_id = PermissionManager.get_user_id()
-    if current_user_id:
-        user_roles = db_manager.get_user_roles(current_user_id)
-        user_role_names = [role['name'] for role in user_roles]
-        
-        if 'admin' in user_role_names:
+    identity = get_identity()
+    if identity:
+        if identity.has_role('admin'):
             st.info("🔑 **Admin**: You can delete any ticket in the system.")
-        elif 'manager' in user_role_names:
+        elif identity.has_role('manager'):
             st.info("👥 **Manager**: You can delete tickets created by your team members.")
-        elif 'agent' in user_role_names:
+        elif identity.has_role('agent'):
             st.info("👤 **Agent**: You can only delete tickets you created.")
 
     if tickets:
@@ -107,14 +106,10 @@ def display():
         st.info("No tickets available for deletion.")
         
         # Afficher un message explicatif selon le rôle
-        current_user_id = PermissionManager.get_user_id()
-        if current_user_id:
-            user_roles = db_manager.get_user_roles(current_user_id)
-            user_role_names = [role['name'] for role in user_roles]
-            
-            if 'agent' in user_role_names:
+        if identity:
+            if identity.has_role('agent'):
                 st.info("💡 **Note**: As an agent, you can only delete tickets you created.")
-            elif 'manager' in user_role_names:
+            elif identity.has_role('manager'):
                 st.info("💡 **Note**: As a manager, you can only delete tickets created by your team members.")
             else:
                 st.info("💡 **Note**: No tickets are available for deletion.")
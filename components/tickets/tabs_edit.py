@@ -3,7 +3,9 @@ from database import db_manager
 from services.tickets.data_loader import load_editable_tickets, load_domains, load_specialties_by_domain
 from services.cache_utils import clear_cache
 from permissions import PermissionManager
+from services.profiler import profiled
 
+@profiled("tab")
 def display():
     st.header("Edit a Ticket")
 
@@ -1,8 +1,10 @@
 import streamlit as st
 import pandas as pd
-from services.tickets.data_loader import load_tickets
+from services.tickets.data_loader import load_tickets_frame
 from services.cache_utils import clear_cache
+from services.profiler import profiled
 
+@profiled("tab")
 def display():
     st.header("Ticket List")
 
@@ -22,32 +24,30 @@ def display():
             clear_cache()
             st.rerun()
 
-    # Data loading
-    tickets = load_tickets()
+    # Data loading (views into the shared ticket store, no per-session copy)
+    tickets_df = load_tickets_frame()
 
-    if tickets:
-        # Data filtering
-        filtered_tickets = tickets
+    if not tickets_df.empty:
+        # Data filtering: a boolean mask, rows are only materialised once at the end
+        mask = pd.Series(True, index=tickets_df.index)
 
         if search_customer:
-            filtered_tickets = [
-                t
-                for t in filtered_tickets
-                if search_customer.lower() in t["customer_name"].lower()
-            ]
+            mask &= tickets_df["customer_name"].str.contains(
+                search_customer, case=False, regex=False, na=False
+            )
 
         if search_phone:
-            filtered_tickets = [
-                t for t in filtered_tickets if search_phone in t["customer_phone"]
-            ]
+            mask &= tickets_df["customer_phone"].str.contains(
+                search_phone, regex=False, na=False
+            )
+
+        filtered_count = int(mask.sum())
 
         # Results display
-        st.info(f"📊 {len(filtered_tickets)} ticket(s) found")
+        st.info(f"📊 {filtered_count} ticket(s) found")
 
         # Ticket table
-        if filtered_tickets:
-            df = pd.DataFrame(filtered_tickets)
-
+        if filtered_count:
             # Select columns to display
             display_columns = [
                 "id",
@@ -68,7 +68,7 @@ def display():
                 "created_at": "Creation Date",
             }
 
-            df_display = df[display_columns].rename(columns=column_names)
+            df_display = tickets_df.loc[mask, display_columns].rename(columns=column_names)
 
             # Dataframe display configuration
             st.dataframe(
@@ -1,22 +1,86 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
-from datetime import datetime
-from services.tickets.data_loader import load_tickets, load_domains, load_teams, load_specialties_by_domain, load_agents
-from services.tickets.export_utils import export_to_csv, export_to_pdf, export_to_excel
+from services.tickets.data_loader import load_domains, load_teams, load_specialties_by_domain, load_agents
+from services.tickets.filter_plan import TicketFilterPlan
+from services.tickets.commissions import summarize_tickets
+from services.tickets.cube import summarize_cube, cached_rollup
+from services.tickets.ticket_store import get_ticket_store
+from services.tickets.export_utils import PDF_COLUMN_LIMITS, PDF_DEFAULT_LIMIT
+from components.export_jobs import show_export_job
 from services.cache_utils import clear_cache
 from services.debug_logger import log_column_check, log_data_info
-
-
+from services.lazy_import import lazy_import
+from services.profiler import profiled
+
+# plotly is only imported when a chart is drawn
+px = lazy_import("plotly.express")
+
+
+def _format_dates(values: pd.Series) -> pd.Series:
+    """dd/mm/YYYY HH:MM text of a datetime column, NaN where the date is missing"""
+    # numpy's ISO formatting is a single C loop, Series.dt.strftime is called per value
+    iso = pd.Series(np.datetime_as_string(values.to_numpy(dtype="datetime64[m]"), unit="m"), index=values.index)
+    return (iso.str[8:10] + "/" + iso.str[5:7] + "/" + iso.str[:4] + " " + iso.str[11:16]).where(values.notna())
+
+
+def _detail_table(tickets: pd.DataFrame, teams, domains, specialty_filter) -> pd.DataFrame:
+    """
+    Detailed ticket list: one row per specialty of each ticket ("N/A" when it has
+    none, left out when a specialty filter is set), names looked up with maps
+    """
+    team_names = {team["id"]: team["name"] for team in teams or []}
+    domain_names = {domain["id"]: domain["name"] for domain in domains or []}
+    specialty_names = {
+        (domain["id"], specialty["id"]): specialty["name"]
+        for domain in domains or [] for specialty in load_specialties_by_domain(domain["id"])
+    }
+
+    tickets = tickets.reset_index(drop=True)
+    domain_ids = pd.to_numeric(tickets["craft_ids"].astype("string"), errors="coerce")
+    description = tickets["problem_desc"].astype(str)
+    base = pd.DataFrame({
+        "Ticket ID": tickets["id"],
+        "Agent": tickets["created_by_name"],
+        "Team": tickets["te_id"].map(team_names).fillna("N/A"),
+        "Customer Name": tickets["customer_name"],
+        "Phone": tickets["customer_phone"],
+        "Problem Description": description.where(description.str.len() <= 50, description.str[:50] + "..."),
+        "Domain": domain_ids.map(domain_names).fillna("N/A"),
+        "Payment Status": np.where(tickets["is_paid"] == 1, "Paid", "Unpaid"),
+        "Amount (₦)": tickets["amount"].where(tickets["amount"] > 0, 0).map("₦{:,.0f}".format),
+        "Creation Date": _format_dates(tickets["created_at"]),
+        "Last Modified": _format_dates(tickets["updated_at"]).fillna("N/A"),
+    }, index=tickets.index)
+
+    # Specialty ids "18,19" -> one line per id, named through (domain, specialty)
+    specialty_ids = tickets["speciality_ids"].astype("string").str.split(",").explode().str.strip()
+    specialty_ids = pd.to_numeric(specialty_ids, errors="coerce")
+    keys = pd.Series(list(zip(domain_ids.reindex(specialty_ids.index), specialty_ids)), index=specialty_ids.index)
+    specialties = keys.map(specialty_names).dropna()
+
+    if specialty_filter:
+        specialties = specialties[specialties.isin(specialty_filter)]
+        rows = base.loc[specialties.index].assign(Specialty=specialties.to_numpy())
+    else:
+        rows = pd.concat([
+            base.loc[specialties.index].assign(Specialty=specialties.to_numpy()),
+            base.drop(index=specialties.index.unique()).assign(Specialty="N/A"),
+        ]).sort_index(kind="stable")
+    columns = ["Ticket ID", "Agent", "Team", "Customer Name", "Phone", "Problem Description", "Domain",
+               "Specialty", "Payment Status", "Amount (₦)", "Creation Date", "Last Modified"]
+    return rows[columns].reset_index(drop=True)
+
+
+@profiled("tab")
 def display():
     st.header("Ticket Statistics")
 
-    # Load tickets data
-    tickets = load_tickets()
-
-    if tickets:
-        # Convert to DataFrame for easier manipulation
-        tickets_df = pd.DataFrame(tickets)
+    # Load tickets data (views into the shared ticket store)
+    ticket_store = get_ticket_store()
+    tickets_df = ticket_store.frame()
 
+    if not tickets_df.empty:
         # Advanced Filters Section
         st.subheader("🔍 Advanced Filters")
 
@@ -166,210 +230,70 @@ def display():
                 end_date = st.date_input("To", value=max_date, key="statistics_end_date")
 
         # Apply filters to tickets data
-        filtered_tickets = tickets_df.copy()
-        
         # Log des informations de débogage silencieuses
-        log_data_info(filtered_tickets, "Données initiales chargées")
-        log_column_check("created_by", "created_by" in filtered_tickets.columns, "Filtrage par agent")
-        log_column_check("craft_ids", "craft_ids" in filtered_tickets.columns, "Filtrage par domaine")
-        log_column_check("speciality_ids", "speciality_ids" in filtered_tickets.columns, "Filtrage par spécialité")
-        log_column_check("amount", "amount" in filtered_tickets.columns, "Calculs de montants")
-
-        # Search filter
-        if search_ticket:
-            search_mask = (
-                    filtered_tickets["customer_name"].str.contains(
-                        search_ticket, case=False, na=False
-                    )
-                    | filtered_tickets["customer_phone"].str.contains(
-                search_ticket, case=False, na=False
-            )
-                    | filtered_tickets["problem_desc"].str.contains(
-                search_ticket, case=False, na=False
-            )
-            )
-            filtered_tickets = filtered_tickets[search_mask]
-
-        # Payment filter
-        if payment_filter != "All":
-            if payment_filter == "Paid":
-                filtered_tickets = filtered_tickets[
-                    filtered_tickets["is_paid"] == 1
-                    ]
-            elif payment_filter == "Unpaid":
-                filtered_tickets = filtered_tickets[
-                    filtered_tickets["is_paid"] == 0
-                    ]
-
-        # Team filter (multiselect)
-        if teams_filter:
-            selected_teams_ids = [
-                d["id"] for d in teams if d["name"] in teams_filter
-            ]
-            if selected_teams_ids:
-                # Filter tickets that match any of the selected teams
-                team_mask = (
-                    filtered_tickets["te_id"]
-                    .astype(str)
-                    .apply(
-                        lambda x: (
-                            any(
-                                str(team_id) == str(x)
-                                for team_id in selected_teams_ids
-                            )
-                            if pd.notna(x)
-                            else False
-                        )
-                    )
-                )
-                filtered_tickets = filtered_tickets[team_mask]
-
-        # Created by filter (multiselect) - Traité séparément du filtre d'équipe
-        if created_by_filter:
-            # Get agent IDs from selected agent names
-            selected_agent_ids = []
-            for agent_name in created_by_filter:
-                agent = next(
-                    (a for a in agents if a['name'] == agent_name),
-                    None,
-                )
-                if agent:
-                    selected_agent_ids.append(agent["id"])
-
-            if selected_agent_ids:
-                # Filter tickets that match any of the selected agents
-                if "created_by" in filtered_tickets.columns:
-                    created_by_mask = filtered_tickets["created_by"].isin(selected_agent_ids)
-                    filtered_tickets = filtered_tickets[created_by_mask]
-
-        # Domain filter (multiselect)
-        if domain_filter:
-            selected_domain_ids = [
-                d["id"] for d in domains if d["name"] in domain_filter
-            ]
-            if selected_domain_ids:
-                # Filter tickets that match any of the selected domains
-                if "craft_ids" in filtered_tickets.columns:
-                    domain_mask = (
-                        filtered_tickets["craft_ids"]
-                        .astype(str)
-                        .apply(
-                            lambda x: (
-                                any(
-                                    str(domain_id) == str(x)
-                                    for domain_id in selected_domain_ids
-                                )
-                                if pd.notna(x)
-                                else False
-                            )
-                        )
-                    )
-                    filtered_tickets = filtered_tickets[domain_mask]
-
-        # Specialty filter (multiselect and dependent on domains)
+        log_data_info(tickets_df, "Données initiales chargées")
+        log_column_check("created_by", "created_by" in tickets_df.columns, "Filtrage par agent")
+        log_column_check("craft_ids", "craft_ids" in tickets_df.columns, "Filtrage par domaine")
+        log_column_check("speciality_ids", "speciality_ids" in tickets_df.columns, "Filtrage par spécialité")
+        log_column_check("amount", "amount" in tickets_df.columns, "Calculs de montants")
+
+        # Resolve the selected names into ids
+        selected_teams_ids = [d["id"] for d in teams if d["name"] in teams_filter] if teams_filter else []
+        selected_agent_ids = [a["id"] for a in agents if a["name"] in created_by_filter] if created_by_filter else []
+        selected_domain_ids = [d["id"] for d in domains if d["name"] in domain_filter] if domain_filter else []
+
+        selected_specialty_ids = []
         if specialty_filter and domain_filter:
-            # Get specialty IDs from selected specialty names
-            selected_specialty_ids = []
-            selected_domain_ids = [
-                d["id"] for d in domains if d["name"] in domain_filter
-            ]
             for domain_id in selected_domain_ids:
-                specialties = load_specialties_by_domain(domain_id)
-                for specialty_name in specialty_filter:
-                    specialty = next(
-                        (s for s in specialties if s["name"] == specialty_name),
-                        None,
-                    )
-                    if specialty and specialty["id"] not in selected_specialty_ids:
+                for specialty in load_specialties_by_domain(domain_id):
+                    if specialty["name"] in specialty_filter and specialty["id"] not in selected_specialty_ids:
                         selected_specialty_ids.append(specialty["id"])
 
-            if selected_specialty_ids:
-                # Filter tickets that match any of the selected specialties
-                # Check if speciality_ids column exists in the DataFrame
-                if "speciality_ids" in filtered_tickets.columns:
-                    specialty_mask = (
-                        filtered_tickets["speciality_ids"]
-                        .astype(str)
-                        .apply(
-                            lambda x: (
-                                any(
-                                    str(specialty_id) in str(x)
-                                    for specialty_id in selected_specialty_ids
-                                )
-                                if pd.notna(x) and x != 'nan' and x != 'None'
-                                else False
-                            )
-                        )
-                    )
-                    filtered_tickets = filtered_tickets[specialty_mask]
-
-        # Created by filter (multiselect)
-        if created_by_filter:
-            # Get agent IDs from selected agent names
-            selected_agent_ids = []
-            for agent_name in created_by_filter:
-                agent = next(
-                    (a for a in agents if a['name'] == agent_name),
-                    None,
-                )
-                if agent:
-                    selected_agent_ids.append(agent["id"])
-
-            if selected_agent_ids:
-                # Filter tickets that match any of the selected agents
-                if "created_by" in filtered_tickets.columns:
-                    created_by_mask = filtered_tickets["created_by"].isin(selected_agent_ids)
-                    filtered_tickets = filtered_tickets[created_by_mask]
-
-        # Date filter
-        if date_filter == "Creation Date" and start_date is not None and end_date is not None:
-            filtered_tickets["created_at_dt"] = pd.to_datetime(filtered_tickets["created_at"])
-            filtered_tickets = filtered_tickets[
-                (filtered_tickets["created_at_dt"].dt.date >= start_date) &
-                (filtered_tickets["created_at_dt"].dt.date <= end_date)
-                ]
-            filtered_tickets = filtered_tickets.drop("created_at_dt", axis=1)
-        elif date_filter == "Modification Date" and start_date is not None and end_date is not None:
-            # Check if updated_at column exists, if not use created_at
-            if 'updated_at' in filtered_tickets.columns:
-                filtered_tickets["updated_at_dt"] = pd.to_datetime(filtered_tickets["updated_at"])
-                filtered_tickets = filtered_tickets[
-                    (filtered_tickets["updated_at_dt"].dt.date >= start_date) &
-                    (filtered_tickets["updated_at_dt"].dt.date <= end_date)
-                    ]
-                filtered_tickets = filtered_tickets.drop("updated_at_dt", axis=1)
-            else:
-                # Fallback to created_at if updated_at doesn't exist
-                filtered_tickets["created_at_dt"] = pd.to_datetime(filtered_tickets["created_at"])
-                filtered_tickets = filtered_tickets[
-                    (filtered_tickets["created_at_dt"].dt.date >= start_date) &
-                    (filtered_tickets["created_at_dt"].dt.date <= end_date)
-                    ]
-                filtered_tickets = filtered_tickets.drop("created_at_dt", axis=1)
+        # Date filter: "Modification Date" falls back to created_at if updated_at is missing
+        date_column = None
+        if date_filter == "Creation Date":
+            date_column = "created_at"
+        elif date_filter == "Modification Date":
+            date_column = "updated_at" if "updated_at" in tickets_df.columns else "created_at"
+
+        # Compile every filter into one vectorized plan (applied cheapest first, memoized per session)
+        filter_plan = (
+            TicketFilterPlan()
+            .contains(["customer_name", "customer_phone", "problem_desc"], search_ticket)
+            .equals("is_paid", {"Paid": 1, "Unpaid": 0}.get(payment_filter))
+            .isin("te_id", selected_teams_ids)
+            .isin("created_by", selected_agent_ids)
+            .tokens("craft_ids", selected_domain_ids)
+            .tokens("speciality_ids", selected_specialty_ids)
+        )
+        if date_column:
+            filter_plan.between(date_column, start_date, end_date)
+
+        filtered_tickets = filter_plan.filter(tickets_df, version=ticket_store.version)
+
+        # Summary source: the pre-aggregated cube whenever every active filter maps onto its
+        # dimensions (creation day, team, agent, craft, paid); the filtered rows otherwise
+        use_cube = not (search_ticket or "").strip() and not selected_specialty_ids and date_column != "updated_at"
+        cube_filters = {
+            "is_paid": {"Paid": 1, "Unpaid": 0}.get(payment_filter),
+            "team_ids": tuple(selected_teams_ids) or None,
+            "agent_ids": tuple(selected_agent_ids) or None,
+            "craft_ids": tuple(selected_domain_ids) or None,
+            "start": start_date if date_column else None,
+            "end": end_date if date_column else None,
+        }
+        if use_cube:
+            summary = summarize_cube(ticket_store.version, **cube_filters)
+        else:
+            summary = summarize_tickets(filtered_tickets)
 
         # Key Metrics
         st.subheader("📈 Key Metrics")
 
-        # Calculate metrics
-        total_tickets = len(filtered_tickets)
-        paid_tickets = (
-            len(filtered_tickets[filtered_tickets["is_paid"] == 1])
-            if not filtered_tickets.empty
-            else 0
-        )
-        # Calcul du montant total basé sur les tickets uniques (sans duplication due aux spécialités)
-        # Utiliser les IDs de tickets comme identifiants uniques pour éviter les doublons
-        if "amount" in filtered_tickets.columns:
-            unique_ticket_amounts = filtered_tickets.drop_duplicates(subset=["id"])["amount"].fillna(0)
-            total_amount = unique_ticket_amounts.sum() if not filtered_tickets.empty else 0
-            avg_amount = (
-                filtered_tickets[filtered_tickets["amount"] > 0]["amount"].mean()
-                if not filtered_tickets.empty
-                else 0
-            )
-        else:
-            total_amount = 0
-            avg_amount = 0
+        total_tickets = summary["total_tickets"]
+        paid_tickets = summary["paid_tickets"]
+        total_amount = summary["total_amount"]
+        avg_amount = summary["avg_amount"]
 
         col1, col2, col3, col4 = st.columns(4)
 
@@ -386,319 +310,96 @@ def display():
 
         # Commission Metrics Section
         st.subheader("💰 Commission Metrics")
-        
-        # Commission calculation functions
-        def calculate_agent_commission(amount):
-            """Calculate agent commission: 3% with 1500 NAIRA cap"""
-            if pd.isna(amount) or amount <= 0:
-                return 0
-            return min(amount * 0.03, 1500)
-        
-        def calculate_manager_commission(amount):
-            """Calculate manager commission: 150 NAIRA if amount >= 20000"""
-            if pd.isna(amount) or amount < 20000:
-                return 0
-            return 150
 
-        if not filtered_tickets.empty:
-            # Get unique tickets to avoid duplicates in commission calculations
-            unique_tickets = filtered_tickets.drop_duplicates(subset=["id"])
-            
-            # Calculate agent commissions
-            agent_commissions = {}
-            manager_commissions = {}
-            
-            for _, ticket in unique_tickets.iterrows():
-                amount = ticket.get("amount", 0)
-                if pd.isna(amount):
-                    amount = 0
-                
-                # Agent commission
-                agent_id = ticket.get("created_by")
-                agent_name = ticket.get("created_by_name", "Unknown")
-                if agent_id:
-                    if agent_id not in agent_commissions:
-                        agent_commissions[agent_id] = {
-                            "name": agent_name,
-                            "team_id": ticket.get("te_id"),
-                            "tickets": 0,
-                            "total_amount": 0,
-                            "commission": 0
-                        }
-                    
-                    agent_commissions[agent_id]["tickets"] += 1
-                    agent_commissions[agent_id]["total_amount"] += amount
-                    agent_commissions[agent_id]["commission"] += calculate_agent_commission(amount)
-                
-                # Manager commission (based on team)
-                team_id = ticket.get("te_id")
-                if team_id and amount >= 20000:  # Only for eligible tickets
-                    if team_id not in manager_commissions:
-                        # Find team/manager name
-                        team_name = "N/A"
-                        if teams:
-                            try:
-                                team_id_int = int(team_id)
-                                team = next((t for t in teams if t["id"] == team_id_int), None)
-                                if team:
-                                    team_name = team["name"]
-                            except:
-                                pass
-                        
-                        manager_commissions[team_id] = {
-                            "name": f"Manager - {team_name}",
-                            "team_name": team_name,
-                            "eligible_tickets": 0,
-                            "commission": 0
-                        }
-                    
-                    manager_commissions[team_id]["eligible_tickets"] += 1
-                    manager_commissions[team_id]["commission"] += calculate_manager_commission(amount)
-            
-            # Calculate totals
-            total_agent_commission = sum(data["commission"] for data in agent_commissions.values())
-            total_manager_commission = sum(data["commission"] for data in manager_commissions.values())
-            total_agents = len(agent_commissions)
-            total_managers = len(manager_commissions)
-            
-            # Display commission metrics
-            comm_col1, comm_col2, comm_col3, comm_col4 = st.columns(4)
-            
-            with comm_col1:
-                st.metric("💰 Total Agent Commission", f"₦{total_agent_commission:,.0f}")
-            with comm_col2:
-                st.metric("👥 Total Manager Commission", f"₦{total_manager_commission:,.0f}")
-            with comm_col3:
-                st.metric("📊 Agents Concerned", total_agents)
-            with comm_col4:
-                st.metric("🏢 Managers Concerned", total_managers)
-            
-            # Detailed commission tables
-            if agent_commissions or manager_commissions:
-                st.subheader("📊 Detailed Commission Breakdown")
-                
-                # Create tabs for detailed view
-                if agent_commissions and manager_commissions:
-                    tab1, tab2 = st.tabs(["👤 Agent Commissions", "👥 Manager Commissions"])
-                elif agent_commissions:
-                    tab1 = st.tabs(["👤 Agent Commissions"])[0]
-                    tab2 = None
-                elif manager_commissions:
-                    tab2 = st.tabs(["👥 Manager Commissions"])[0]
-                    tab1 = None
-                else:
-                    tab1 = tab2 = None
-                
-                # Agent commissions tab
-                if agent_commissions and tab1:
-                    with tab1:
-                        agent_data = []
-                        for agent_id, data in agent_commissions.items():
-                            # Get team name
-                            team_name = "N/A"
-                            if data["team_id"] and teams:
-                                try:
-                                    team_id_int = int(data["team_id"])
-                                    team = next((t for t in teams if t["id"] == team_id_int), None)
-                                    if team:
-                                        team_name = team["name"]
-                                except:
-                                    pass
-                            
-                            agent_data.append({
-                                "Agent": data["name"],
-                                "Team": team_name,
-                                "Tickets": data["tickets"],
-                                "Total Amount (₦)": f"₦{data['total_amount']:,.0f}",
-                                "Commission (₦)": f"₦{data['commission']:,.0f}"
-                            })
-                        
-                        if agent_data:
-                            agent_df = pd.DataFrame(agent_data)
-                            st.dataframe(agent_df, use_container_width=True, hide_index=True)
-                
-                # Manager commissions tab
-                if manager_commissions and tab2:
-                    with tab2:
-                        manager_data = []
-                        for team_id, data in manager_commissions.items():
-                            manager_data.append({
-                                "Manager": data["name"],
-                                "Team": data["team_name"],
-                                "Eligible Tickets": data["eligible_tickets"],
-                                "Commission (₦)": f"₦{data['commission']:,.0f}"
-                            })
-                        
-                        if manager_data:
-                            manager_df = pd.DataFrame(manager_data)
-                            st.dataframe(manager_df, use_container_width=True, hide_index=True)
-        else:
-            # No filtered tickets
-            comm_col1, comm_col2, comm_col3, comm_col4 = st.columns(4)
-            
-            with comm_col1:
-                st.metric("💰 Total Agent Commission", "₦0")
-            with comm_col2:
-                st.metric("👥 Total Manager Commission", "₦0")
-            with comm_col3:
-                st.metric("📊 Agents Concerned", "0")
-            with comm_col4:
-                st.metric("🏢 Managers Concerned", "0")
+        agent_commissions = summary["agents"]
+        manager_commissions = summary["managers"]
+
+        comm_col1, comm_col2, comm_col3, comm_col4 = st.columns(4)
+
+        with comm_col1:
+            st.metric("💰 Total Agent Commission", f"₦{agent_commissions['commission'].sum():,.0f}")
+        with comm_col2:
+            st.metric("👥 Total Manager Commission", f"₦{manager_commissions['commission'].sum():,.0f}")
+        with comm_col3:
+            st.metric("📊 Agents Concerned", len(agent_commissions))
+        with comm_col4:
+            st.metric("🏢 Managers Concerned", len(manager_commissions))
+
+        # Detailed commission tables
+        if not agent_commissions.empty or not manager_commissions.empty:
+            st.subheader("📊 Detailed Commission Breakdown")
+
+            # Create tabs for detailed view
+            if not agent_commissions.empty and not manager_commissions.empty:
+                tab1, tab2 = st.tabs(["👤 Agent Commissions", "👥 Manager Commissions"])
+            elif not agent_commissions.empty:
+                tab1 = st.tabs(["👤 Agent Commissions"])[0]
+                tab2 = None
+            else:
+                tab2 = st.tabs(["👥 Manager Commissions"])[0]
+                tab1 = None
+
+            # Agent commissions tab
+            if tab1:
+                with tab1:
+                    agent_df = pd.DataFrame({
+                        "Agent": agent_commissions["name"],
+                        "Team": agent_commissions["team_name"],
+                        "Tickets": agent_commissions["tickets"],
+                        "Total Amount (₦)": agent_commissions["total_amount"].map("₦{:,.0f}".format),
+                        "Commission (₦)": agent_commissions["commission"].map("₦{:,.0f}".format),
+                    })
+                    st.dataframe(agent_df, use_container_width=True, hide_index=True)
+
+            # Manager commissions tab
+            if tab2:
+                with tab2:
+                    manager_df = pd.DataFrame({
+                        "Manager": "Manager - " + manager_commissions["team_name"].astype(str),
+                        "Team": manager_commissions["team_name"],
+                        "Eligible Tickets": manager_commissions["eligible_tickets"],
+                        "Commission (₦)": manager_commissions["commission"].map("₦{:,.0f}".format),
+                    })
+                    st.dataframe(manager_df, use_container_width=True, hide_index=True)
+
+        # Activity over time (rolled up from the cube when possible)
+        with st.expander("📊 Charts & Analytics", expanded=False):
+            grain = st.selectbox(
+                "Period", ["week", "month", "year"], index=1,
+                format_func=str.capitalize, key="stats_chart_grain",
+            )
+            if use_cube:
+                activity = cached_rollup(ticket_store.version, grain=grain, group_by=("period",), **cube_filters)
+            else:
+                periods = filtered_tickets["created_at"].dt.to_period({"week": "W-SUN", "month": "M", "year": "Y"}[grain])
+                activity = (
+                    filtered_tickets.groupby(periods.dt.start_time)["amount"]
+                    .agg(tickets="size", amount_sum="sum")
+                    .rename_axis("period")
+                    .reset_index()
+                )
+
+            if not activity.empty:
+                chart_col1, chart_col2 = st.columns(2)
+                with chart_col1:
+                    fig_tickets = px.bar(activity, x="period", y="tickets", title="Tickets per Period",
+                                         labels={"period": "Period", "tickets": "Tickets"})
+                    fig_tickets.update_layout(height=400)
+                    st.plotly_chart(fig_tickets, use_container_width=True)
+                with chart_col2:
+                    fig_amount = px.line(activity, x="period", y="amount_sum", title="Amount per Period",
+                                         labels={"period": "Period", "amount_sum": "Amount (₦)"})
+                    fig_amount.update_layout(height=400)
+                    st.plotly_chart(fig_amount, use_container_width=True)
+            else:
+                st.info("📊 No data available for charts.")
 
         # Enhanced data table
         st.subheader("📋 Detailed Ticket List")
 
         if not filtered_tickets.empty:
-            # Prepare enhanced data
-            enhanced_data = []
-            for _, ticket in filtered_tickets.iterrows():
-
-                # Get team name
-                team_name = "N/A"
-                if ticket.get("te_id"):
-                    try:
-                        team_id = int(ticket["te_id"])
-                        team = next(
-                            (d for d in teams if d["id"] == team_id), None
-                        )
-                        if team:
-                            team_name = team["name"]
-                    except:
-                        pass
-
-                # Get agent names
-                agents_names = []
-                if ticket.get("created_by"):
-                    print("")
-
-                # Get domain name
-                domain_name = "N/A"
-                if ticket.get("craft_ids"):
-                    try:
-                        domain_id = int(ticket["craft_ids"])
-                        domain = next(
-                            (d for d in domains if d["id"] == domain_id), None
-                        )
-                        if domain:
-                            domain_name = domain["name"]
-                    except:
-                        pass
-
-                # Get specialty names
-                specialty_names = []
-                if ticket.get("speciality_ids"):
-                    try:
-                        specialty_ids = ticket["speciality_ids"].split(",")
-                        for spec_id in specialty_ids:
-                            if spec_id.strip():
-                                # Load specialties for the domain to get names
-                                if ticket.get("craft_ids"):
-                                    domain_id = int(ticket["craft_ids"])
-                                    specialties = load_specialties_by_domain(
-                                        domain_id
-                                    )
-                                    specialty = next(
-                                        (
-                                            s
-                                            for s in specialties
-                                            if s["id"] == int(spec_id.strip())
-                                        ),
-                                        None,
-                                    )
-                                    if specialty:
-                                        specialty_names.append(specialty["name"])
-                    except:
-                        pass
-
-                # Format creation date
-                try:
-                    created_date = pd.to_datetime(ticket["created_at"]).strftime(
-                        "%d/%m/%Y %H:%M"
-                    )
-                except:
-                    created_date = ticket["created_at"]
-
-                # Format last modified date
-                try:
-                    if ticket.get("updated_at"):
-                        last_modified = pd.to_datetime(
-                            ticket["updated_at"]
-                        ).strftime("%d/%m/%Y %H:%M")
-                    else:
-                        last_modified = "N/A"
-                except:
-                    last_modified = ticket.get("updated_at", "N/A")
-
-                # Create a row for each specialty (or one row if no specialties)
-                if specialty_names:
-                    for specialty_name in specialty_names:
-                        # Apply specialty filter at the row level
-                        if specialty_filter:
-                            # Only include this row if the specialty matches the filter
-                            if specialty_name not in specialty_filter:
-                                continue
-
-                        enhanced_data.append(
-                            {
-                                "Ticket ID": ticket["id"],
-                                "Agent": ticket.get(
-                                    "created_by_name", "Unknown"
-                                ),
-                                "Team": team_name,
-                                "Customer Name": ticket["customer_name"],
-                                "Phone": ticket["customer_phone"],
-                                "Problem Description": (
-                                    ticket["problem_desc"][:50] + "..."
-                                    if len(str(ticket["problem_desc"])) > 50
-                                    else ticket["problem_desc"]
-                                ),
-                                "Domain": domain_name,
-                                "Specialty": specialty_name,
-                                "Payment Status": (
-                                    "Paid" if ticket["is_paid"] == 1 else "Unpaid"
-                                ),
-                                "Amount (₦)": (
-                                    f"₦{ticket['amount']:,.0f}"
-                                    if ticket.get("amount", 0) > 0
-                                    else "₦0"
-                                ),
-                                "Creation Date": created_date,
-                                "Last Modified": last_modified,
-                            }
-                        )
-                else:
-                    # If no specialties, create one row with "N/A" only if no specialty filter is applied
-                    if not specialty_filter:
-                        enhanced_data.append(
-                            {
-                                "Ticket ID": ticket["id"],
-                                "Agent": ticket.get(
-                                    "created_by_name", "Unknown"
-                                ),
-                                "Team": team_name,
-                                "Customer Name": ticket["customer_name"],
-                                "Phone": ticket["customer_phone"],
-                                "Problem Description": (
-                                    ticket["problem_desc"][:50] + "..."
-                                    if len(str(ticket["problem_desc"])) > 50
-                                    else ticket["problem_desc"]
-                                ),
-                                "Domain": domain_name,
-                                "Specialty": "N/A",
-                                "Payment Status": (
-                                    "Paid" if ticket["is_paid"] == 1 else "Unpaid"
-                                ),
-                                "Amount (₦)": (
-                                    f"₦{ticket['amount']:,.0f}"
-                                    if ticket.get("amount", 0) > 0
-                                    else "₦0"
-                                ),
-                                "Creation Date": created_date,
-                                "Last Modified": last_modified,
-                            }
-                        )
-
-            display_df = pd.DataFrame(enhanced_data)
+            # One row per specialty of each ticket, built column-wise
+            display_df = _detail_table(filtered_tickets, teams, domains, specialty_filter)
             st.dataframe(display_df, use_container_width=True, hide_index=True)
 
             # Export functionality
@@ -706,145 +407,83 @@ def display():
 
             export_col1, export_col2, export_col3 = st.columns(3)
 
-            # Prepare commission data for export
+            # Commission data for export (same tables as the breakdown above)
             commission_data = {}
-            if not filtered_tickets.empty:
-                # Get unique tickets for commission calculations
-                unique_tickets = filtered_tickets.drop_duplicates(subset=["id"])
-                
-                # Recalculate commissions for export (reuse logic from above)
-                agent_commissions_export = {}
-                manager_commissions_export = {}
-                
-                for _, ticket in unique_tickets.iterrows():
-                    amount = ticket.get("amount", 0)
-                    if pd.isna(amount):
-                        amount = 0
-                    
-                    # Agent commission
-                    agent_id = ticket.get("created_by")
-                    agent_name = ticket.get("created_by_name", "Unknown")
-                    if agent_id:
-                        if agent_id not in agent_commissions_export:
-                            agent_commissions_export[agent_id] = {
-                                "name": agent_name,
-                                "team_id": ticket.get("te_id"),
-                                "tickets": 0,
-                                "total_amount": 0,
-                                "commission": 0
-                            }
-                        
-                        agent_commissions_export[agent_id]["tickets"] += 1
-                        agent_commissions_export[agent_id]["total_amount"] += amount
-                        agent_commissions_export[agent_id]["commission"] += calculate_agent_commission(amount)
-                    
-                    # Manager commission
-                    team_id = ticket.get("te_id")
-                    if team_id and amount >= 20000:
-                        if team_id not in manager_commissions_export:
-                            team_name = "N/A"
-                            if teams:
-                                try:
-                                    team_id_int = int(team_id)
-                                    team = next((t for t in teams if t["id"] == team_id_int), None)
-                                    if team:
-                                        team_name = team["name"]
-                                except:
-                                    pass
-                            
-                            manager_commissions_export[team_id] = {
-                                "name": f"Manager - {team_name}",
-                                "team_name": team_name,
-                                "eligible_tickets": 0,
-                                "commission": 0
-                            }
-                        
-                        manager_commissions_export[team_id]["eligible_tickets"] += 1
-                        manager_commissions_export[team_id]["commission"] += calculate_manager_commission(amount)
-                
-                # Prepare agent commission DataFrame
-                if agent_commissions_export:
-                    agent_export_data = []
-                    for agent_id, data in agent_commissions_export.items():
-                        team_name = "N/A"
-                        if data["team_id"] and teams:
-                            try:
-                                team_id_int = int(data["team_id"])
-                                team = next((t for t in teams if t["id"] == team_id_int), None)
-                                if team:
-                                    team_name = team["name"]
-                            except:
-                                pass
-                        
-                        agent_export_data.append({
-                            "Agent": data["name"],
-                            "Team": team_name,
-                            "Tickets": data["tickets"],
-                            "Total Amount (₦)": data["total_amount"],
-                            "Commission (₦)": data["commission"]
-                        })
-                    commission_data["agent_commissions"] = pd.DataFrame(agent_export_data)
-                
-                # Prepare manager commission DataFrame
-                if manager_commissions_export:
-                    manager_export_data = []
-                    for team_id, data in manager_commissions_export.items():
-                        manager_export_data.append({
-                            "Manager": data["name"],
-                            "Team": data["team_name"],
-                            "Eligible Tickets": data["eligible_tickets"],
-                            "Commission (₦)": data["commission"]
-                        })
-                    commission_data["manager_commissions"] = pd.DataFrame(manager_export_data)
-
+            if not agent_commissions.empty:
+                commission_data["agent_commissions"] = pd.DataFrame({
+                    "Agent": agent_commissions["name"],
+                    "Team": agent_commissions["team_name"],
+                    "Tickets": agent_commissions["tickets"],
+                    "Total Amount (₦)": agent_commissions["total_amount"],
+                    "Commission (₦)": agent_commissions["commission"],
+                })
+            if not manager_commissions.empty:
+                commission_data["manager_commissions"] = pd.DataFrame({
+                    "Manager": "Manager - " + manager_commissions["team_name"].astype(str),
+                    "Team": manager_commissions["team_name"],
+                    "Eligible Tickets": manager_commissions["eligible_tickets"],
+                    "Commission (₦)": manager_commissions["commission"],
+                })
+
+            # Exports run as background jobs, shared by every session asking for the same
+            # filters on the same data, and kept in the export file cache
+            def export_sheets(sheet_names):
+                sheets = {sheet_names[0]: display_df}
+                if "agent_commissions" in commission_data:
+                    sheets[sheet_names[1]] = commission_data["agent_commissions"]
+                if "manager_commissions" in commission_data:
+                    sheets[sheet_names[2]] = commission_data["manager_commissions"]
+                return sheets
+
+            report_title = "Ticket Statistics & Commission Report"
             with export_col1:
-                csv_data = export_to_csv(display_df)
-                if csv_data:
-                    st.download_button(
-                        label="📄 Export to CSV",
-                        data=csv_data,
-                        file_name=f"ticket_statistics_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                        mime="text/csv",
-                        help="Download the filtered data as CSV file",
-                    )
+                csv_gzip = st.checkbox("Compress CSV (gzip)", key="stats_csv_gzip")
+                show_export_job(
+                    "📄 Export to CSV", "csv.gz" if csv_gzip else "csv", filter_plan.key, ticket_store.version,
+                    lambda: {"Tickets": display_df}, report_title, "ticket_statistics", "prepare_csv_button",
+                )
 
             with export_col2:
-                if st.button("📄 Export to PDF", key="prepare_pdf_button"):
-                    # Create comprehensive data for PDF export
-                    pdf_data_dict = {"tickets": display_df}
-                    if commission_data:
-                        pdf_data_dict.update(commission_data)
-                    
-                    pdf_data = export_to_pdf(pdf_data_dict, "Ticket Statistics & Commission Report")
-                    if pdf_data:
-                        st.download_button(
-                            label="📄 Export to PDF",
-                            data=pdf_data,
-                            file_name=f"ticket_statistics_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
-                            mime="application/pdf",
-                            help="Download the filtered data as PDF file",
-                        )
+                show_export_job(
+                    "📄 Export to PDF", "pdf", filter_plan.key, ticket_store.version,
+                    lambda: export_sheets(["tickets", "agent_commissions", "manager_commissions"]),
+                    report_title, "ticket_statistics", "prepare_pdf_button",
+                    limits=PDF_COLUMN_LIMITS, default_limit=PDF_DEFAULT_LIMIT,
+                )
 
             with export_col3:
-                # Create comprehensive data for Excel export
-                excel_data_dict = {"Tickets": display_df}
-                if commission_data:
-                    if "agent_commissions" in commission_data:
-                        excel_data_dict["Agent Commissions"] = commission_data["agent_commissions"]
-                    if "manager_commissions" in commission_data:
-                        excel_data_dict["Manager Commissions"] = commission_data["manager_commissions"]
-                
-                excel_data = export_to_excel(excel_data_dict, "Ticket Statistics & Commission Report")
-                if excel_data:
-                    st.download_button(
-                        label="📊 Export to Excel",
-                        data=excel_data,
-                        file_name=f"ticket_statistics_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
-                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                        help="Download the filtered data as Excel file",
-                    )
+                show_export_job(
+                    "📊 Export to Excel", "xlsx", filter_plan.key, ticket_store.version,
+                    lambda: export_sheets(["Tickets", "Agent Commissions", "Manager Commissions"]),
+                    report_title, "ticket_statistics", "prepare_excel_button",
+                )
 
                 # Refresh button
                 if st.button("🔄 Refresh Statistics", key="refresh_stats"):
                     clear_cache()
                     st.rerun()
+
+            # Typed datasets (Parquet / Arrow IPC) for analysis tools: raw columns, no formatting
+            typed_datasets = {
+                "Tickets": lambda: filtered_tickets.drop_duplicates(subset=["id"]),
+                "Agent Commissions": lambda: agent_commissions,
+                "Manager Commissions": lambda: manager_commissions,
+            }
+            typed_formats = {
+                "Parquet (zstd)": ("parquet", "zstd"),
+                "Parquet (snappy)": ("parquet", "snappy"),
+                "Arrow IPC": ("arrow", None),
+            }
+            data_col1, data_col2, data_col3 = st.columns(3)
+            with data_col1:
+                typed_dataset = st.selectbox("🗄️ Dataset", list(typed_datasets), key="stats_typed_dataset")
+            with data_col2:
+                typed_format = st.selectbox("Format", list(typed_formats), key="stats_typed_format")
+            with data_col3:
+                fmt, compression = typed_formats[typed_format]
+                options = {"compression": compression} if compression else {}
+                show_export_job(
+                    "🗄️ Export dataset", fmt, (filter_plan.key, typed_dataset, compression), ticket_store.version,
+                    lambda: {typed_dataset: typed_datasets[typed_dataset]()}, report_title,
+                    typed_dataset.lower().replace(" ", "_"), "prepare_typed_button", **options,
+                )
@@ -0,0 +1,61 @@
+import streamlit as st
+import pandas as pd
+
+from database import db_manager
+from services.cache_utils import clear_cache
+from services.identity import current_user_id
+from services.user_import import REQUIRED_COLUMNS, OPTIONAL_COLUMNS, read_user_file, validate_users, provision_users
+
+
+def show_user_import(roles: list, key: str, allowed_roles=None, default_roles=None):
+    """
+    Bulk import of users from a CSV or Excel file (see services/user_import)
+    Args:
+        roles: role dicts of load_roles_data
+        key: prefix of the widget keys
+        allowed_roles, default_roles: role names the file may use / given to rows without roles
+    """
+    with st.expander("📥 Bulk import (CSV or Excel)"):
+        columns = REQUIRED_COLUMNS + (OPTIONAL_COLUMNS if not default_roles else ("nin",))
+        st.caption(f"Columns: {', '.join(columns)}. "
+                   + ("Several roles are separated by commas." if not default_roles
+                      else f"Every user gets the role(s): {', '.join(default_roles)}."))
+        template = pd.DataFrame(columns=list(columns)).to_csv(index=False)
+        st.download_button("⬇️ Template", data=template, file_name="users_template.csv", mime="text/csv",
+                           key=f"{key}_template")
+
+        uploaded = st.file_uploader("File", type=["csv", "xlsx", "xls"], key=f"{key}_file")
+        if uploaded is None:
+            return
+
+        try:
+            frame = read_user_file(uploaded)
+            valid, errors = validate_users(frame, roles, db_manager.get_user_emails(),
+                                           allowed_roles=allowed_roles, default_roles=default_roles)
+        except Exception as e:
+            st.error(f"❌ {str(e)}")
+            return
+
+        col1, col2 = st.columns(2)
+        col1.metric("Valid rows", len(valid))
+        col2.metric("Rejected rows", len(errors))
+        if not errors.empty:
+            st.dataframe(errors, hide_index=True, use_container_width=True)
+            st.download_button("⬇️ Error report", data=errors.to_csv(index=False), file_name="import_errors.csv",
+                               mime="text/csv", key=f"{key}_errors")
+
+        if valid.empty:
+            return
+        if st.button(f"Import {len(valid)} user(s)", key=f"{key}_submit", type="primary"):
+            bar = st.progress(0.0, text="Hashing passwords...")
+
+            def progress(done, total):
+                bar.progress(done / total, text=f"Hashing passwords... {done}/{total}")
+
+            success, message, _ = provision_users(db_manager, valid, current_user_id(), progress)
+            bar.empty()
+            if success:
+                clear_cache()
+                st.success(f"✅ {message}" + (f" ({len(errors)} row(s) rejected)" if not errors.empty else ""))
+            else:
+                st.error(f"❌ {message}")
@@ -2,12 +2,16 @@ import time
 
 import streamlit as st
 
+from components.user_import import show_user_import
 from database import db_manager
+from services.identity import current_user_id
 from services.users.data_loader import load_roles_data, is_valid_email
+from services.profiler import profiled
 
 # Load roles globally to reuse in tabs
 roles = load_roles_data()
 
+@profiled("tab")
 def display():
     st.subheader("Add a User")
     with st.form("add_user_form"):
@@ -46,7 +50,7 @@ def display():
                     if not role_ids:
                         st.error("❌ Invalid roles")
                     else:
-                        created_by = st.session_state.get('user_id', 1)  # Connected user ID
+                        created_by = current_user_id()  # None for the built-in admin account
 
                         # Create user with first role (for compatibility with user table)
                         success, message, user_id = db_manager.create_user(
@@ -76,3 +80,4 @@ def display():
                         else:
                             st.error(f"❌ {message}")
 
+    show_user_import(roles, key="users_import")
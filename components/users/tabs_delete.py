@@ -4,8 +4,10 @@ import streamlit as st
 
 from database import db_manager
 from services.users.data_loader import load_users_data
+from services.profiler import profiled
 
 
+@profiled("tab")
 def display():
     st.subheader("🗑️ Delete a User")
 
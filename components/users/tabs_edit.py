@@ -4,10 +4,12 @@ import streamlit as st
 
 from database import db_manager
 from services.users.data_loader import load_users_data, load_roles_data, is_valid_email
+from services.profiler import profiled
 
 # Load roles globally to reuse in tabs
 roles = load_roles_data()
 
+@profiled("tab")
 def display():
     st.subheader("Edit a User")
     users_df = load_users_data()
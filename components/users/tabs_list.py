@@ -2,10 +2,12 @@ import pandas as pd
 import streamlit as st
 
 from services.users.data_loader import load_users_data, load_roles_data
+from services.profiler import profiled
 
 # Load roles globally to reuse in tabs
 roles = load_roles_data()
 
+@profiled("tab")
 def display():
     st.subheader("User List")
 
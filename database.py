@@ -1,11 +1,151 @@
 import sqlite3
-import bcrypt
 import os
 from datetime import datetime
 from typing import List, Dict, Optional, Tuple
 
+import numpy as np
+import pandas as pd
+
+from services import password_policy
+from services.metrics import DB_CONNECTIONS_OPENED, DB_METHOD_SECONDS, timed_methods
+from services.profiler import profile_methods
+from services.query_log import InstrumentedConnection
+
+# ==================== REQUÊTES PARTAGÉES ====================
+# Utilisées à la fois par les méthodes "liste de dictionnaires" et par les
+# méthodes qui retournent directement un DataFrame (fetch_frame)
+
+ALL_USERS_SQL = """
+    SELECT 
+        u.id, u.nin, u.name, u.email, u.role_id, u.is_active,
+        u.created_by, u.updated_by, u.created_at, u.updated_at,
+        r.name as role_name
+    FROM user u
+    LEFT JOIN role r ON u.role_id = r.id
+    ORDER BY u.created_at DESC
+"""
+
+ALL_PROBLEMS_SQL = """
+    SELECT p.*, 
+           u1.name as created_by_name,
+           u2.name as updated_by_name,
+           t.id as te_id,
+           t.name as team_name
+    FROM problems p
+    LEFT JOIN user u1 ON p.created_by = u1.id
+    LEFT JOIN user u2 ON p.updated_by = u2.id
+    LEFT JOIN (
+        -- Sous-requête pour obtenir l'équipe de l'utilisateur (manager ou membre)
+        -- SELECT t.id, t.name, t.manager_id as user_id FROM team t WHERE t.is_active = 1
+        -- UNION
+        SELECT t.id, t.name, tm.member_id as user_id 
+        FROM team t 
+        JOIN team_member tm ON t.id = tm.team_id 
+        WHERE t.is_active = 1 AND tm.is_active = 1
+    ) t ON p.created_by = t.user_id
+    ORDER BY p.created_at DESC
+"""
+
+ACTIVE_TEAMS_SQL = """
+    SELECT t.id,
+           t.code,
+           t.name,
+           t.description,
+           t.manager_id,
+           t.is_active,
+           t.created_at,
+           t.updated_at,
+           u1.name as created_by_name,
+           u2.name as updated_by_name,
+           u3.name as manager_name,
+           u3.email as manager_email
+    FROM team t
+    LEFT JOIN user u1 ON t.created_by = u1.id
+    LEFT JOIN user u2 ON t.updated_by = u2.id
+    LEFT JOIN user u3 ON t.manager_id = u3.id
+    WHERE t.is_active = 1
+    ORDER BY t.created_at DESC
+"""
+
+# Types appliqués par les méthodes *_frame (les colonnes absentes sont inférées)
+USER_DTYPES = {
+    'id': 'int64',
+    'role_name': 'category',
+    'is_active': 'int8',
+}
+USER_DATE_COLUMNS = ['created_at', 'updated_at']
+
+PROBLEM_DTYPES = {
+    # Identifiant NOT NULL : int32 suffit largement
+    'id': 'int32',
+    # amount reste en float64 : les montants dépassent 10^7 et float32 perdrait les unités
+    'amount': 'float64',
+    'is_paid': 'bool',
+    'is_active': 'bool',
+    # Chaînes répétées : codes + dictionnaire partagé
+    'customer_name': 'category',
+    'created_by_name': 'category',
+    'updated_by_name': 'category',
+    'team_name': 'category',
+    'craft_ids': 'category',
+    'speciality_ids': 'category',
+    # created_by, updated_by et te_id peuvent être NULL : laissés inférés (float64, NULL -> NaN).
+    # Les onglets traitent l'absence via NaN (tickets["te_id"].map(team_names).fillna("N/A"))
+    # et commissions lit ces colonnes en tableaux numpy float ; Int64 donnerait des tableaux objet
+}
+PROBLEM_DATE_COLUMNS = ['created_at', 'updated_at']
+
+TEAM_DTYPES = {
+    'id': 'int64',
+    'is_active': 'int8',
+}
+TEAM_DATE_COLUMNS = ['created_at', 'updated_at']
+
+# Taille des blocs lus par fetchmany() dans les itérateurs iter_*
+DEFAULT_CHUNK_SIZE = 5000
+
+# Tables dont chaque écriture est tracée dans <table>_log par un trigger
+LOGGED_TABLES = ('problems', 'user', 'team', 'team_member', 'customer')
+
+# Méthodes ni profilées ni mesurées (appelées par toutes les autres)
+UNINSTRUMENTED_METHODS = ('get_connection', 'ensure_connection')
+
+# Base utilisée par défaut ; FIXTOP_DB_PATH permet de pointer vers une autre base
+# (par exemple un jeu de données généré par benchmarks/datagen)
+DEFAULT_DB_PATH = os.environ.get('FIXTOP_DB_PATH', 'fixtop_agent_copy.db')
+
+
+def _build_column(values: tuple, dtype: Optional[str] = None, parse_date: bool = False):
+    """
+    Construit une colonne typée à partir des valeurs brutes renvoyées par SQLite
+    Args:
+        values: valeurs de la colonne (une par ligne)
+        dtype: 'category', type nullable pandas ('Int64', 'Int8', 'boolean', 'string')
+               ou type numpy ('int64', 'int8', 'float64', 'float32', 'bool')
+        parse_date: convertit les textes ISO 8601 en datetime64
+    """
+    if parse_date:
+        return pd.to_datetime(np.array(values, dtype=object), format='ISO8601', errors='coerce')
+    if dtype is None:
+        # Même inférence que pd.DataFrame(list_of_dicts)
+        return pd.Series(values, dtype=object) if not values else pd.Series(values)
+    if dtype == 'category':
+        return pd.Categorical(values)
+    if dtype[0].isupper() or dtype in ('boolean', 'string'):
+        # Types nullables pandas (Int64, Int8, Float64, boolean, string)
+        return pd.array(values, dtype=dtype)
+    if dtype == 'bool':
+        return np.array([bool(v) for v in values], dtype=bool)
+    if dtype.startswith('int') and None in values:
+        # Colonne entière avec des NULL : bascule sur le type nullable équivalent
+        return pd.array(values, dtype=dtype.capitalize())
+    return np.array(values, dtype=dtype)
+
+
+@timed_methods(DB_METHOD_SECONDS, exclude=UNINSTRUMENTED_METHODS)
+@profile_methods("db", exclude=UNINSTRUMENTED_METHODS)
 class DatabaseManager:
-    def __init__(self, db_path: str = "fixtop_agent_copy.db"):
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
         """Initialise le gestionnaire de base de données"""
         self.db_path = db_path
         self.ensure_connection()
@@ -17,25 +157,116 @@ class DatabaseManager:
     
     def get_connection(self) -> sqlite3.Connection:
         """Retourne une connexion à la base de données"""
-        conn = sqlite3.connect(self.db_path)
+        # Chaque requête est chronométrée (journal des requêtes lentes, voir services/query_log)
+        conn = sqlite3.connect(self.db_path, factory=InstrumentedConnection)
         conn.row_factory = sqlite3.Row  # Pour accéder aux colonnes par nom
+        DB_CONNECTIONS_OPENED.inc()
         return conn
     
+    def fetch_frame(self, sql: str, params: tuple = (), dtypes: Optional[Dict[str, str]] = None,
+                    parse_dates: Optional[List[str]] = None, as_arrow: bool = False):
+        """
+        Exécute une requête et construit directement des colonnes typées,
+        sans passer par un dictionnaire Python par ligne
+        Args:
+            sql: requête SELECT
+            params: paramètres de la requête
+            dtypes: type par colonne ('category', 'Int64', 'int8', 'float64'...), voir _build_column
+            parse_dates: colonnes texte à convertir en datetime64
+            as_arrow: retourne un pyarrow.Table au lieu d'un DataFrame
+        Returns: pandas.DataFrame (ou pyarrow.Table si as_arrow)
+        """
+        dtypes = dtypes or {}
+        parse_dates = set(parse_dates or [])
+
+        with self.get_connection() as conn:
+            conn.row_factory = None  # Tuples bruts : pas d'objet Row par ligne
+            cursor = conn.execute(sql, params)
+            columns = [description[0] for description in cursor.description]
+            rows = cursor.fetchall()
+
+        # Transposition lignes -> colonnes en une seule passe
+        values_by_column = list(zip(*rows)) if rows else [()] * len(columns)
+
+        frame = pd.DataFrame({
+            name: _build_column(values, dtypes.get(name), name in parse_dates)
+            for name, values in zip(columns, values_by_column)
+        }, columns=columns)
+
+        if as_arrow:
+            import pyarrow as pa
+            return pa.Table.from_pandas(frame, preserve_index=False)
+        return frame
+
+    def iter_query(self, sql: str, params: tuple = (), chunk_size: int = DEFAULT_CHUNK_SIZE,
+                   batches: bool = False):
+        """
+        Parcourt le résultat d'une requête par blocs de chunk_size lignes (fetchmany)
+        
+        La lecture se fait dans une transaction ouverte jusqu'à la fin de l'itération :
+        toutes les lignes proviennent du même instantané de la base. En mode journal
+        classique (non WAL), les écritures concurrentes attendent la fin de la lecture.
+        Args:
+            sql: requête SELECT
+            params: paramètres de la requête
+            chunk_size: nombre de lignes lues à chaque appel de fetchmany
+            batches: si True, produit des listes de dictionnaires (un bloc à la fois)
+        Yields: un dictionnaire par ligne (ou une liste par bloc si batches)
+        """
+        conn = self.get_connection()
+        try:
+            conn.execute("BEGIN")
+            cursor = conn.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                if batches:
+                    yield [dict(row) for row in rows]
+                else:
+                    for row in rows:
+                        yield dict(row)
+        finally:
+            conn.rollback()
+            conn.close()
+
+    def get_data_version(self, tables=LOGGED_TABLES) -> Tuple[int, ...]:
+        """
+        Retourne une version des données pour les tables demandées
+
+        Chaque écriture sur une table journalisée ajoute une ligne dans <table>_log
+        (triggers), donc MAX(rowid) du journal change à chaque modification.
+        Args:
+            tables: noms des tables (doivent figurer dans LOGGED_TABLES)
+        Returns: tuple des derniers rowid, un par table
+        """
+        unknown = set(tables) - set(LOGGED_TABLES)
+        if unknown:
+            raise ValueError(f"Tables sans journal: {', '.join(sorted(unknown))}")
+
+        # Une seule requête quel que soit le nombre de tables (appelée à chaque rerun)
+        columns = ", ".join(f"(SELECT COALESCE(MAX(rowid), 0) FROM {table}_log)" for table in tables)
+        with self.get_connection() as conn:
+            return tuple(conn.execute(f"SELECT {columns}").fetchone())
+
     def hash_password(self, password: str) -> str:
-        """Hash un mot de passe avec bcrypt (plus sécurisé que SHA-256)"""
-        # Générer un salt et hasher le mot de passe
-        salt = bcrypt.gensalt()
-        hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-        return hashed.decode('utf-8')
+        """Hash un mot de passe avec bcrypt, au coût de la politique (voir services/password_policy)"""
+        return password_policy.hash_password(password)
     
     def verify_password(self, password: str, hashed: str) -> bool:
-        """Vérifie un mot de passe contre son hash bcrypt"""
-        try:
-            return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
-        except Exception:
-            # Fallback pour les anciens mots de passe SHA-256 (si nécessaire)
-            import hashlib
-            return hashlib.sha256(password.encode()).hexdigest() == hashed
+        """Vérifie un mot de passe contre son hash bcrypt (ou SHA-256 des anciens comptes), hors du thread du script"""
+        return password_policy.verify_password(password, hashed)
+
+    def update_password_hash(self, user_id: int, old_hash: str, new_hash: str) -> bool:
+        """
+        Remplace le hash d'un mot de passe inchangé (rehash après connexion)
+        Sans effet si le mot de passe a été modifié entre-temps
+        """
+        with self.get_connection() as conn:
+            cursor = conn.execute("UPDATE user SET password = ? WHERE id = ? AND password = ?",
+                                  (new_hash, user_id, old_hash))
+            conn.commit()
+            return cursor.rowcount == 1
     
     def validate_password_strength(self, password: str) -> Tuple[bool, List[str]]:
         """
@@ -99,16 +330,17 @@ class DatabaseManager:
     def get_all_users(self) -> List[Dict]:
         """Récupère tous les utilisateurs avec leurs rôles"""
         with self.get_connection() as conn:
-            cursor = conn.execute("""
-                SELECT 
-                    u.id, u.nin, u.name, u.email, u.role_id, u.is_active,
-                    u.created_by, u.updated_by, u.created_at, u.updated_at,
-                    r.name as role_name
-                FROM user u
-                LEFT JOIN role r ON u.role_id = r.id
-                ORDER BY u.created_at DESC
-            """)
+            cursor = conn.execute(ALL_USERS_SQL)
             return [dict(row) for row in cursor.fetchall()]
+
+    def iter_users(self, chunk_size: int = DEFAULT_CHUNK_SIZE, batches: bool = False):
+        """Parcourt tous les utilisateurs par blocs, sans tout charger en mémoire (voir iter_query)"""
+        return self.iter_query(ALL_USERS_SQL, chunk_size=chunk_size, batches=batches)
+
+    def get_all_users_frame(self, as_arrow: bool = False):
+        """Récupère tous les utilisateurs avec leurs rôles sous forme de DataFrame typé"""
+        return self.fetch_frame(ALL_USERS_SQL, dtypes=USER_DTYPES,
+                                parse_dates=USER_DATE_COLUMNS, as_arrow=as_arrow)
     
     def get_user_by_id(self, user_id: int) -> Optional[Dict]:
         """Récupère un utilisateur par son ID"""
@@ -175,7 +407,45 @@ class DatabaseManager:
             return False, f"Integrity error: {str(e)}", None
         except Exception as e:
             return False, f"Error creating user: {str(e)}", None
-    
+
+    def get_user_emails(self) -> set:
+        """Emails de tous les utilisateurs (en minuscules), pour valider un import en une requête"""
+        with self.get_connection() as conn:
+            return {row[0] for row in conn.execute("SELECT lower(email) FROM user")}
+
+    def create_users_bulk(self, users: List[Dict], created_by: int = None) -> Tuple[bool, str, int]:
+        """
+        Crée plusieurs utilisateurs et leurs rôles dans une seule transaction (tout ou rien)
+        Args:
+            users: dictionnaires name, email, nin, password (déjà hashé), role_ids ;
+                   le premier rôle est aussi enregistré dans user.role_id
+            created_by: ID de l'utilisateur qui effectue l'import
+        Returns: (succès, message, nombre d'utilisateurs créés)
+        """
+        try:
+            with self.get_connection() as conn:
+                conn.executemany("""
+                    INSERT INTO user (nin, name, email, password, role_id, created_by, updated_by)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, [(user.get('nin'), user['name'], user['email'], user['password'], user['role_ids'][0],
+                       created_by, created_by) for user in users])
+
+                # L'email est unique : pas besoin de relire les ID générés
+                conn.executemany("""
+                    INSERT INTO user_role (user_id, role_id, is_active, created_by, created_at)
+                    SELECT id, ?, 1, ?, datetime('now') FROM user WHERE email = ?
+                """, [(role_id, created_by, user['email']) for user in users for role_id in user['role_ids']])
+
+                conn.commit()
+                return True, f"{len(users)} user(s) successfully created", len(users)
+
+        except sqlite3.IntegrityError as e:
+            if "email" in str(e).lower():
+                return False, "A user with one of these emails already exists, nothing was imported", 0
+            return False, f"Integrity error: {str(e)}", 0
+        except Exception as e:
+            return False, f"Error creating users: {str(e)}", 0
+
     def update_user(self, user_id: int, name: str = None, email: str = None, 
                    role_id: int = None, nin: str = None, is_active: int = None,
                    updated_by: int = None) -> Tuple[bool, str]:
@@ -262,6 +532,10 @@ class DatabaseManager:
         user = self.get_user_by_email(email)
         if user and user['is_active'] == 1:
             if self.verify_password(password, user['password']):
+                # Ancien hash (SHA-256 ou autre coût bcrypt) : remplacé en arrière-plan
+                password_policy.schedule_rehash(
+                    password, user['password'],
+                    lambda new_hash: self.update_password_hash(user['id'], user['password'], new_hash))
                 # Retirer le mot de passe des données retournées
                 user_data = dict(user)
                 del user_data['password']
@@ -282,27 +556,17 @@ class DatabaseManager:
             # LEFT JOIN user u2 ON p.updated_by = u2.id
             # WHERE p.is_active = 1 and te.is_active = 1 and tm.is_active = 1
             
-            cursor = conn.execute("""
-                SELECT p.*, 
-                       u1.name as created_by_name,
-                       u2.name as updated_by_name,
-                       t.id as te_id,
-                       t.name as team_name
-                FROM problems p
-                LEFT JOIN user u1 ON p.created_by = u1.id
-                LEFT JOIN user u2 ON p.updated_by = u2.id
-                LEFT JOIN (
-                    -- Sous-requête pour obtenir l'équipe de l'utilisateur (manager ou membre)
-                    -- SELECT t.id, t.name, t.manager_id as user_id FROM team t WHERE t.is_active = 1
-                    -- UNION
-                    SELECT t.id, t.name, tm.member_id as user_id 
-                    FROM team t 
-                    JOIN team_member tm ON t.id = tm.team_id 
-                    WHERE t.is_active = 1 AND tm.is_active = 1
-                ) t ON p.created_by = t.user_id
-                ORDER BY p.created_at DESC
-            """)
+            cursor = conn.execute(ALL_PROBLEMS_SQL)
             return [dict(row) for row in cursor.fetchall()]
+
+    def iter_problems(self, chunk_size: int = DEFAULT_CHUNK_SIZE, batches: bool = False):
+        """Parcourt tous les tickets/problèmes par blocs, sans tout charger en mémoire (voir iter_query)"""
+        return self.iter_query(ALL_PROBLEMS_SQL, chunk_size=chunk_size, batches=batches)
+
+    def get_all_problems_frame(self, as_arrow: bool = False):
+        """Récupère tous les tickets/problèmes sous forme de DataFrame typé"""
+        return self.fetch_frame(ALL_PROBLEMS_SQL, dtypes=PROBLEM_DTYPES,
+                                parse_dates=PROBLEM_DATE_COLUMNS, as_arrow=as_arrow)
     
     def get_problem_by_id(self, problem_id: int) -> Optional[Dict]:
         """Récupère un ticket/problème par son ID"""
@@ -540,28 +804,18 @@ class DatabaseManager:
     def get_teams(self) -> List[Dict]:
         """Récupère toutes les équipes avec les informations du manager"""
         with self.get_connection() as conn:
-            cursor = conn.execute("""
-                SELECT t.id,
-                       t.code,
-                       t.name,
-                       t.description,
-                       t.manager_id,
-                       t.is_active,
-                       t.created_at,
-                       t.updated_at,
-                       u1.name as created_by_name,
-                       u2.name as updated_by_name,
-                       u3.name as manager_name,
-                       u3.email as manager_email
-                FROM team t
-                LEFT JOIN user u1 ON t.created_by = u1.id
-                LEFT JOIN user u2 ON t.updated_by = u2.id
-                LEFT JOIN user u3 ON t.manager_id = u3.id
-                WHERE t.is_active = 1
-                ORDER BY t.created_at DESC
-            """)
+            cursor = conn.execute(ACTIVE_TEAMS_SQL)
             return [dict(row) for row in cursor.fetchall()]
 
+    def iter_teams(self, chunk_size: int = DEFAULT_CHUNK_SIZE, batches: bool = False):
+        """Parcourt toutes les équipes actives par blocs, sans tout charger en mémoire (voir iter_query)"""
+        return self.iter_query(ACTIVE_TEAMS_SQL, chunk_size=chunk_size, batches=batches)
+
+    def get_teams_frame(self, as_arrow: bool = False):
+        """Récupère toutes les équipes actives sous forme de DataFrame typé"""
+        return self.fetch_frame(ACTIVE_TEAMS_SQL, dtypes=TEAM_DTYPES,
+                                parse_dates=TEAM_DATE_COLUMNS, as_arrow=as_arrow)
+
     def get_team_by_id(self, team_id: int) -> Optional[Dict]:
         """Récupère une équipe par son ID avec les informations du manager"""
         with self.get_connection() as conn:
@@ -852,6 +1106,36 @@ class DatabaseManager:
             """, (team_id,))
             return [dict(row) for row in cursor.fetchall()]
 
+    def get_members_by_team(self) -> Dict[int, List[Dict]]:
+        """
+        Membres actifs de toutes les équipes en une seule requête (mêmes colonnes que get_team_members)
+        À utiliser dans les boucles sur les équipes à la place d'un get_team_members par équipe
+        Returns:
+            {team_id: [membres]} ; une équipe sans membre est absente du dictionnaire
+        """
+        with self.get_connection() as conn:
+            cursor = conn.execute("""
+                SELECT tm.*, 
+                       tm.member_id as user_id,
+                       u.name as user_name,
+                       u.email as user_email,
+                       r.name as user_role,
+                       u1.name as created_by_name,
+                       u2.name as updated_by_name
+                FROM team_member tm
+                JOIN user u ON tm.member_id = u.id
+                LEFT JOIN role r ON u.role_id = r.id
+                LEFT JOIN user u1 ON tm.created_by = u1.id
+                LEFT JOIN user u2 ON tm.updated_by = u2.id
+                WHERE tm.is_active = 1
+                ORDER BY tm.created_at DESC
+            """)
+            members = {}
+            for row in cursor.fetchall():
+                # team_member.team_id est une colonne TEXT
+                members.setdefault(int(row['team_id']), []).append(dict(row))
+            return members
+
     def add_team_member(self, team_id: int, user_id: int, created_by: int = None) -> Tuple[bool, str]:
         """
         Ajoute un membre à une équipe
@@ -985,6 +1269,12 @@ class DatabaseManager:
             result = cursor.fetchone()
             return result['count'] == 0
 
+    def get_assigned_manager_ids(self) -> set:
+        """IDs des managers d'une équipe active (complément de is_manager_available pour une liste de managers)"""
+        with self.get_connection() as conn:
+            cursor = conn.execute("SELECT DISTINCT manager_id FROM team WHERE is_active = 1")
+            return {row['manager_id'] for row in cursor.fetchall()}
+
     def is_agent_available(self, user_id: int, exclude_team_id: int = None) -> bool:
         """
         Vérifie si un agent est disponible (pas déjà membre d'une autre équipe)
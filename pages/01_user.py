@@ -1,12 +1,19 @@
 import streamlit as st
 import sys
 import os
-from components.users import tabs_list , tabs_add , tabs_edit , tabs_delete , tabs_statistics
-from components.sidebar import show_sidebar
+from components.sidebar import show_sidebar, show_rerun_profile
 
 # Add parent directory to path to import database and permissions
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from permissions import PermissionManager
+from services.lazy_import import lazy_import
+
+# Tab modules are imported on first use: only the tabs available to the role are loaded
+tabs_list = lazy_import("components.users.tabs_list")
+tabs_add = lazy_import("components.users.tabs_add")
+tabs_edit = lazy_import("components.users.tabs_edit")
+tabs_delete = lazy_import("components.users.tabs_delete")
+tabs_statistics = lazy_import("components.users.tabs_statistics")
 
 if 'logged_in' not in st.session_state or not st.session_state.logged_in:
     st.switch_page("app.py")  # Redirect to home/login if not connected
@@ -44,3 +51,5 @@ for i, tab_name in enumerate(available_tabs):
             tabs_delete.display()
         elif "Statistics" in tab_name:
             tabs_statistics.display()
+
+show_rerun_profile("user_page")
@@ -2,13 +2,20 @@ import streamlit as st
 import sys
 import os
 import re
-from components.teams import tabs_list , tabs_add , tabs_delete , tabs_edit , tabs_statistics
-from components.sidebar import show_sidebar
+from components.sidebar import show_sidebar, show_rerun_profile
 
 # Add parent directory to path to import database and permissions
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from database import db_manager
 from permissions import PermissionManager
+from services.lazy_import import lazy_import
+
+# Tab modules are imported on first use: only the tabs available to the role are loaded
+tabs_list = lazy_import("components.teams.tabs_list")
+tabs_add = lazy_import("components.teams.tabs_add")
+tabs_delete = lazy_import("components.teams.tabs_delete")
+tabs_edit = lazy_import("components.teams.tabs_edit")
+tabs_statistics = lazy_import("components.teams.tabs_statistics")
 
 
 # Email validation function
@@ -53,3 +60,4 @@ for i, tab_name in enumerate(available_tabs):
         elif "Statistics" in tab_name:
             tabs_statistics.display()
 
+show_rerun_profile("teams_page")
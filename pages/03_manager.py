@@ -2,12 +2,18 @@ import streamlit as st
 import sys
 import os
 
-from components.sidebar import show_sidebar
-from components.manager import tabs_list , tabs_add , tabs_edit , tabs_statistics
+from components.sidebar import show_sidebar, show_rerun_profile
 
 # Ajouter le répertoire parent au path pour importer database et permissions
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from permissions import PermissionManager
+from services.lazy_import import lazy_import
+
+# Tab modules are imported on first use: only the tabs available to the role are loaded
+tabs_list = lazy_import("components.manager.tabs_list")
+tabs_add = lazy_import("components.manager.tabs_add")
+tabs_edit = lazy_import("components.manager.tabs_edit")
+tabs_statistics = lazy_import("components.manager.tabs_statistics")
 
 if 'logged_in' not in st.session_state or not st.session_state.logged_in:
     st.switch_page("app.py")  # Redirect to home/login if not connected
@@ -44,3 +50,5 @@ for i, tab_name in enumerate(available_tabs):
         #    tabs_delete.display()
         elif "Statistics" in tab_name:
             tabs_statistics.display()
+
+show_rerun_profile("manager_page")
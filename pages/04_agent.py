@@ -6,13 +6,20 @@ import os
 import random
 import re
 import time
-from components.agents import tabs_list, tabs_add, tabs_edit, tabs_delete, tabs_statistics
-from components.sidebar import show_sidebar
+from components.sidebar import show_sidebar, show_rerun_profile
 from services.agents.data_loader import load_roles_data
 
 # Add parent directory to path to import database and permissions
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from permissions import PermissionManager
+from services.lazy_import import lazy_import
+
+# Tab modules are imported on first use: only the tabs available to the role are loaded
+tabs_list = lazy_import("components.agents.tabs_list")
+tabs_add = lazy_import("components.agents.tabs_add")
+tabs_edit = lazy_import("components.agents.tabs_edit")
+tabs_delete = lazy_import("components.agents.tabs_delete")
+tabs_statistics = lazy_import("components.agents.tabs_statistics")
 
 # Email validation function
 
@@ -54,3 +61,4 @@ for i, tab_name in enumerate(available_tabs):
         elif "Statistics" in tab_name:
             tabs_statistics.display()
 
+show_rerun_profile("agent_page")
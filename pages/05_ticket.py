@@ -1,7 +1,14 @@
 import streamlit as st
 from permissions import PermissionManager
-from components.sidebar import show_sidebar
-from components.tickets import tabs_add, tabs_edit, tabs_list, tabs_delete, tabs_statistics
+from components.sidebar import show_sidebar, show_rerun_profile
+from services.lazy_import import lazy_import
+
+# Tab modules are imported on first use: only the tabs available to the role are loaded
+tabs_add = lazy_import("components.tickets.tabs_add")
+tabs_edit = lazy_import("components.tickets.tabs_edit")
+tabs_list = lazy_import("components.tickets.tabs_list")
+tabs_delete = lazy_import("components.tickets.tabs_delete")
+tabs_statistics = lazy_import("components.tickets.tabs_statistics")
 
 st.set_page_config(page_title="Ticket Management", page_icon="🎫", layout="wide")
 
@@ -31,3 +38,5 @@ for i, tab_name in enumerate(available_tabs):
             tabs_delete.display()
         elif "Statistics" in tab_name:
             tabs_statistics.display()
+
+show_rerun_profile("ticket_page")
@@ -143,6 +143,12 @@ class PermissionManager:
     @staticmethod
     def has_permission(page: str, action: str) -> bool:
         """Vérifie si l'utilisateur a la permission pour une action sur une page"""
+        # Matrice de permissions résolue à la connexion (absente pour le compte admin intégré)
+        from services.identity import get_identity
+        identity = get_identity()
+        if identity is not None:
+            return identity.can(page, action)
+
         user_role = PermissionManager.get_user_role()
         
         if user_role not in PermissionManager.ROLE_PERMISSIONS:
@@ -9,16 +9,10 @@ def load_agents_data():
     """Load agents data from database"""
     try:
         # Get all users with "agent" role
-        users = db_manager.get_all_users()
-        if users:
-            df = pd.DataFrame(users)
-            # Filter only agents
-            agents_df = df[df['role_name'] == 'agent'].copy()
-            # Convert dates
-            if 'created_at' in agents_df.columns:
-                agents_df['created_at'] = pd.to_datetime(agents_df['created_at'])
-            if 'updated_at' in agents_df.columns:
-                agents_df['updated_at'] = pd.to_datetime(agents_df['updated_at'])
+        users_df = db_manager.get_all_users_frame()
+        if not users_df.empty:
+            # Filter only agents (dates are already parsed by fetch_frame)
+            agents_df = users_df[users_df['role_name'] == 'agent'].copy()
             return agents_df
         else:
             # Return empty DataFrame with expected columns
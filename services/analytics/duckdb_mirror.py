@@ -0,0 +1,256 @@
+"""
+Columnar DuckDB copy of the tables read by the statistics tabs
+
+SQLite stays the database of record: every write goes there. The mirror is
+refreshed incrementally from the <table>_log tables filled by the SQLite
+triggers: the ids touched since the last refresh are re-read from SQLite and
+replaced in DuckDB (deleted rows simply disappear). user_role has no log
+table; being small, it is reloaded whenever its content signature changes.
+
+Requires the optional `duckdb` package (pip install duckdb).
+"""
+
+import sqlite3
+import threading
+
+import duckdb
+import pandas as pd
+import pyarrow as pa
+
+from services.tickets.commissions import agent_commission_sql, manager_commission_sql, MANAGER_COMMISSION_THRESHOLD
+from services.tickets.cube import (
+    CUBE_TABLE, COUNT_MEASURES, build_rollup_sql, match_craft_values
+)
+
+# Mirrored tables: column -> DuckDB type (user.password is deliberately left out)
+MIRROR_TABLES = {
+    "problems": {
+        "id": "BIGINT", "customer_name": "VARCHAR", "customer_phone": "VARCHAR",
+        "problem_desc": "VARCHAR", "craft_ids": "VARCHAR", "speciality_ids": "VARCHAR",
+        "amount": "DOUBLE", "is_active": "INTEGER", "is_paid": "INTEGER",
+        "created_by": "BIGINT", "updated_by": "BIGINT",
+        "created_at": "TIMESTAMP", "updated_at": "TIMESTAMP",
+    },
+    "team": {
+        "id": "BIGINT", "code": "VARCHAR", "name": "VARCHAR", "description": "VARCHAR",
+        "manager_id": "BIGINT", "is_active": "INTEGER", "created_by": "BIGINT", "updated_by": "BIGINT",
+        "created_at": "TIMESTAMP", "updated_at": "TIMESTAMP",
+    },
+    "team_member": {
+        # team_id is TEXT in SQLite: stored as an integer so it joins team.id
+        "id": "BIGINT", "team_id": "BIGINT", "member_id": "BIGINT", "is_active": "INTEGER",
+        "created_by": "BIGINT", "updated_by": "BIGINT", "created_at": "TIMESTAMP", "updated_at": "TIMESTAMP",
+    },
+    "user": {
+        "id": "BIGINT", "nin": "VARCHAR", "name": "VARCHAR", "email": "VARCHAR", "role_id": "BIGINT",
+        "is_active": "INTEGER", "created_by": "BIGINT", "updated_by": "BIGINT",
+        "created_at": "TIMESTAMP", "updated_at": "TIMESTAMP",
+    },
+    "user_role": {
+        "id": "BIGINT", "role_id": "BIGINT", "user_id": "BIGINT", "is_active": "INTEGER",
+        "created_by": "BIGINT", "updated_by": "BIGINT", "created_at": "TIMESTAMP", "updated_at": "TIMESTAMP",
+    },
+}
+
+# Tables refreshed through their SQLite <table>_log (the others are reloaded on change)
+LOGGED_MIRROR_TABLES = ("problems", "team", "team_member", "user")
+
+# Rows read from SQLite per batch, and ids per "id IN (...)" query
+LOAD_CHUNK_SIZE = 100_000
+ID_CHUNK_SIZE = 10_000
+
+# Same cells and measures as the SQLite problems_cube, computed on the fly by DuckDB
+CUBE_VIEW_SQL = f"""
+    CREATE OR REPLACE VIEW {CUBE_TABLE} AS
+    SELECT COALESCE(p.created_by, 0) AS agent_id,
+           CAST(p.created_at AS DATE) AS day,
+           COALESCE(p.craft_ids, '') AS craft_ids,
+           CASE WHEN COALESCE(p.is_paid, 0) = 0 THEN 0 ELSE 1 END AS is_paid,
+           CAST(COUNT(*) AS BIGINT) AS tickets,
+           SUM(COALESCE(p.amount, 0)) AS amount_sum,
+           CAST(SUM(CASE WHEN COALESCE(p.amount, 0) > 0 THEN 1 ELSE 0 END) AS BIGINT) AS positive_tickets,
+           SUM(CASE WHEN COALESCE(p.amount, 0) > 0 THEN p.amount ELSE 0 END) AS positive_amount_sum,
+           SUM({agent_commission_sql("COALESCE(p.amount, 0)")}) AS agent_commission_sum,
+           CAST(SUM(CASE WHEN COALESCE(p.amount, 0) >= {MANAGER_COMMISSION_THRESHOLD} THEN 1 ELSE 0 END)
+                AS BIGINT) AS manager_eligible,
+           SUM({manager_commission_sql("COALESCE(p.amount, 0)")}) AS manager_commission_sum
+    FROM problems p
+    GROUP BY ALL
+"""
+
+DUCKDB_GRAIN_EXPRESSIONS = {
+    "day": "day",
+    "week": "date_trunc('week', day)",
+    "month": "date_trunc('month', day)",
+    "year": "date_trunc('year', day)",
+}
+
+
+class DuckDBMirror:
+    def __init__(self, sqlite_path: str, duckdb_path: str = ":memory:"):
+        """
+        Args:
+            sqlite_path: application database (source of truth)
+            duckdb_path: DuckDB file (kept between restarts) or ':memory:'
+        """
+        self.sqlite_path = sqlite_path
+        self.duckdb_path = duckdb_path
+        self._conn = duckdb.connect(duckdb_path)
+        self._lock = threading.Lock()
+        self._create_schema()
+
+    # ==================== SCHÉMA ET ÉTAT ====================
+
+    def _create_schema(self):
+        for table, columns in MIRROR_TABLES.items():
+            definition = ", ".join(f'"{name}" {column_type}' for name, column_type in columns.items())
+            self._conn.execute(f'CREATE TABLE IF NOT EXISTS "{table}" ({definition})')
+        # Last log rowid applied per table (or content signature for tables without log)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS mirror_state (table_name VARCHAR PRIMARY KEY, mark VARCHAR)")
+        self._conn.execute(CUBE_VIEW_SQL)
+
+    def _get_mark(self, table: str):
+        row = self._conn.execute("SELECT mark FROM mirror_state WHERE table_name = ?", [table]).fetchone()
+        return row[0] if row else None
+
+    def _set_mark(self, table: str, mark):
+        self._conn.execute(
+            "INSERT INTO mirror_state VALUES (?, ?) ON CONFLICT (table_name) DO UPDATE SET mark = excluded.mark",
+            [table, str(mark)],
+        )
+
+    # ==================== CHARGEMENT ====================
+
+    @staticmethod
+    def _select_sql(table: str) -> str:
+        """SELECT of the mirrored columns, every value read as TEXT (typed by DuckDB on insert)"""
+        columns = ", ".join(f'CAST("{name}" AS TEXT) AS "{name}"' for name in MIRROR_TABLES[table])
+        return f'SELECT {columns} FROM "{table}"'
+
+    def _insert(self, table: str, rows: list):
+        """Inserts raw SQLite rows, converting each column with TRY_CAST"""
+        if not rows:
+            return
+        columns = MIRROR_TABLES[table]
+        # Arrow string columns (values are read as TEXT): a registered pandas batch stays in
+        # memory until the refresh commits, which made a full load of 5M tickets take ~4 GB
+        batch = pa.Table.from_arrays([pa.array(values, type=pa.string()) for values in zip(*rows)],
+                                     names=list(columns))
+        casts = ", ".join(f'TRY_CAST("{name}" AS {column_type})' for name, column_type in columns.items())
+        self._conn.register("mirror_batch", batch)
+        try:
+            self._conn.execute(f'INSERT INTO "{table}" SELECT {casts} FROM mirror_batch')
+        finally:
+            self._conn.unregister("mirror_batch")
+
+    def _reload(self, source: sqlite3.Connection, table: str):
+        """Replaces the whole table"""
+        self._conn.execute(f'DELETE FROM "{table}"')
+        cursor = source.execute(self._select_sql(table))
+        while True:
+            rows = cursor.fetchmany(LOAD_CHUNK_SIZE)
+            if not rows:
+                break
+            self._insert(table, rows)
+
+    def _apply_changes(self, source: sqlite3.Connection, table: str, ids: list):
+        """Re-reads the given ids from SQLite and replaces them in DuckDB"""
+        for start in range(0, len(ids), ID_CHUNK_SIZE):
+            chunk = ids[start:start + ID_CHUNK_SIZE]
+            placeholders = ", ".join("?" * len(chunk))
+            self._conn.execute(f'DELETE FROM "{table}" WHERE id IN ({placeholders})', chunk)
+            rows = source.execute(f"{self._select_sql(table)} WHERE id IN ({placeholders})", chunk).fetchall()
+            self._insert(table, rows)
+
+    def refresh(self) -> dict:
+        """
+        Brings the mirror up to date with the SQLite file
+        Returns: {table: 'full' | number of changed ids} for the tables that changed
+        """
+        changes = {}
+        with self._lock:
+            source = sqlite3.connect(self.sqlite_path)
+            try:
+                # One read transaction: every table comes from the same snapshot
+                source.execute("BEGIN")
+                self._conn.execute("BEGIN TRANSACTION")
+                try:
+                    for table in MIRROR_TABLES:
+                        if table in LOGGED_MIRROR_TABLES:
+                            changed = self._refresh_logged(source, table)
+                        else:
+                            changed = self._refresh_by_signature(source, table)
+                        if changed:
+                            changes[table] = changed
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+            finally:
+                source.rollback()
+                source.close()
+        return changes
+
+    def _refresh_logged(self, source: sqlite3.Connection, table: str):
+        watermark = source.execute(f"SELECT COALESCE(MAX(rowid), 0) FROM {table}_log").fetchone()[0]
+        mark = self._get_mark(table)
+        last = int(mark) if mark is not None else None
+
+        if last is None or last > watermark:
+            # First load, or the SQLite file was replaced: start over
+            self._reload(source, table)
+            self._set_mark(table, watermark)
+            return "full"
+        if last == watermark:
+            return None
+
+        ids = [row[0] for row in source.execute(
+            f"SELECT DISTINCT id FROM {table}_log WHERE rowid > ? AND rowid <= ? AND id IS NOT NULL",
+            (last, watermark),
+        )]
+        self._apply_changes(source, table, ids)
+        self._set_mark(table, watermark)
+        return len(ids)
+
+    def _refresh_by_signature(self, source: sqlite3.Connection, table: str):
+        signature = "|".join(str(value) for value in source.execute(
+            f'SELECT COUNT(*), MAX(id), MAX(updated_at) FROM "{table}"'
+        ).fetchone())
+        if self._get_mark(table) == signature:
+            return None
+        self._reload(source, table)
+        self._set_mark(table, signature)
+        return "full"
+
+    # ==================== REQUÊTES ====================
+
+    def query(self, sql: str, params=()) -> pd.DataFrame:
+        """Runs a read-only query on the mirror (own cursor: safe across Streamlit threads)"""
+        cursor = self._conn.cursor()
+        try:
+            return cursor.execute(sql, list(params)).df()
+        finally:
+            cursor.close()
+
+    def rollup(self, grain: str = "month", group_by=("period",), is_paid=None, team_ids=None, agent_ids=None,
+               craft_ids=None, start=None, end=None) -> pd.DataFrame:
+        """Same result as services.tickets.cube.rollup(), computed by DuckDB from the raw tickets"""
+        craft_filter = None
+        if craft_ids is not None:
+            values = self.query("SELECT DISTINCT COALESCE(craft_ids, '') AS craft_ids FROM problems")["craft_ids"]
+            craft_filter = match_craft_values(values, craft_ids)
+
+        sql, params = build_rollup_sql(
+            grain, group_by, is_paid, team_ids, agent_ids, craft_filter, start, end,
+            grain_expressions=DUCKDB_GRAIN_EXPRESSIONS,
+        )
+        frame = self.query(sql, params)
+        for name in COUNT_MEASURES:
+            if name in frame.columns:
+                frame[name] = frame[name].fillna(0).astype("int64")
+        if "period" in frame.columns:
+            frame["period"] = pd.to_datetime(frame["period"], errors="coerce")
+        return frame
+
+    def close(self):
+        self._conn.close()
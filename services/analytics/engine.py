@@ -0,0 +1,49 @@
+"""
+Selection of the analytics engine used by the statistics queries
+
+    FIXTOP_ANALYTICS_ENGINE=duckdb   statistics read a DuckDB mirror (see duckdb_mirror)
+    FIXTOP_ANALYTICS_ENGINE=sqlite   default: statistics read SQLite (problems_cube)
+    FIXTOP_ANALYTICS_PATH=<file>     DuckDB file, default '<database>.duckdb' (':memory:' allowed)
+"""
+
+import os
+
+import streamlit as st
+
+from database import db_manager
+from services.debug_logger import debug_logger
+
+ANALYTICS_ENGINE = os.environ.get("FIXTOP_ANALYTICS_ENGINE", "sqlite").strip().lower()
+ANALYTICS_PATH = os.environ.get("FIXTOP_ANALYTICS_PATH")
+
+
+def is_enabled() -> bool:
+    """True when the DuckDB engine is requested (it may still be unavailable, see get_analytics_engine)"""
+    return ANALYTICS_ENGINE == "duckdb"
+
+
+@st.cache_resource(show_spinner="Loading analytics engine...")
+def _load_mirror(sqlite_path: str, duckdb_path: str):
+    """One mirror per process, shared by every session"""
+    from services.analytics.duckdb_mirror import DuckDBMirror
+    return DuckDBMirror(sqlite_path, duckdb_path)
+
+
+def get_analytics_engine():
+    """
+    Returns the DuckDB mirror, refreshed from SQLite, or None when the engine is
+    disabled or unavailable (the callers then query SQLite)
+    """
+    if not is_enabled():
+        return None
+    try:
+        mirror = _load_mirror(db_manager.db_path, ANALYTICS_PATH or f"{db_manager.db_path}.duckdb")
+        changes = mirror.refresh()
+        if changes:
+            debug_logger.info("Analytics mirror refreshed: %s", changes)
+        return mirror
+    except ImportError:
+        debug_logger.warning("FIXTOP_ANALYTICS_ENGINE=duckdb but the duckdb package is not installed")
+    except Exception as e:
+        debug_logger.error("Analytics engine unavailable, falling back to SQLite: %s", e)
+    return None
@@ -1,39 +1,173 @@
+"""
+Loggers de débogage (logs/debug.log) et des requêtes lentes (logs/slow_queries.jsonl)
+
+Les appels de log ne font aucune écriture disque : les messages passent par une
+file (QueueHandler) vidée par un thread d'écriture (QueueListener) vers des
+fichiers à rotation par taille. Les messages répétés sont échantillonnés et
+limités en débit par point d'appel.
+
+    FIXTOP_LOG_LEVEL=INFO          niveau minimal (DEBUG, INFO, WARNING...)
+    FIXTOP_LOG_MAX_MB=10           taille d'un fichier avant rotation
+    FIXTOP_LOG_BACKUPS=5           nombre de fichiers conservés après rotation
+    FIXTOP_LOG_SAMPLE_RATE=1.0     fraction conservée des messages DEBUG/INFO
+    FIXTOP_LOG_RATE_LIMIT=20       messages par point d'appel et par minute (0 : illimité)
+
+Un message peut fixer son propre taux : logger.debug("...", extra={"sample_rate": 0.01}).
+Utiliser le formatage différé (logger.debug("x=%s", x)) : un message sous le
+niveau configuré ne coûte alors qu'un test de niveau.
+"""
+
+import atexit
 import logging
+import logging.handlers
+import multiprocessing
 import os
+import queue
+import threading
+import time
+
+LOG_DIR = os.path.join(os.path.dirname(__file__), '..', 'logs')
+LOG_LEVEL = os.environ.get('FIXTOP_LOG_LEVEL', 'INFO').upper()
+LOG_MAX_BYTES = int(float(os.environ.get('FIXTOP_LOG_MAX_MB', '10')) * 1024 * 1024)
+LOG_BACKUPS = int(os.environ.get('FIXTOP_LOG_BACKUPS', '5'))
+LOG_SAMPLE_RATE = float(os.environ.get('FIXTOP_LOG_SAMPLE_RATE', '1.0'))
+LOG_RATE_LIMIT = int(os.environ.get('FIXTOP_LOG_RATE_LIMIT', '20'))
+LOG_RATE_WINDOW = 60
+
+# Messages en attente d'écriture ; au-delà, les nouveaux messages sont abandonnés
+LOG_QUEUE_SIZE = 10_000
+
+SLOW_QUERY_LOGGER = 'fixtop_debug.slow_queries'
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Échantillonnage et limitation de débit par point d'appel (fichier, ligne)
+    - sous WARNING, un message sur 1/taux est conservé (taux global ou extra sample_rate)
+    - sous ERROR, au plus rate_limit messages par fenêtre ; le premier message
+      de la fenêtre suivante indique combien ont été supprimés
+    Les requêtes lentes ne passent pas par le filtre : elles sont toutes émises
+    du même point d'appel (query_log) et chaque ligne doit rester un JSON intact.
+    """
+
+    def __init__(self, sample_rate: float = LOG_SAMPLE_RATE, rate_limit: int = LOG_RATE_LIMIT,
+                 window: float = LOG_RATE_WINDOW):
+        super().__init__()
+        self.sample_rate = sample_rate
+        self.rate_limit = rate_limit
+        self.window = window
+        self._sites = {}  # (chemin, ligne) -> [occurrences, début de fenêtre, émis, supprimés]
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.ERROR or record.name == SLOW_QUERY_LOGGER:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            site = self._sites.get((record.pathname, record.lineno))
+            if site is None:
+                site = self._sites[(record.pathname, record.lineno)] = [0, now, 0, 0]
+            site[0] += 1
+
+            if record.levelno < logging.WARNING:
+                rate = getattr(record, 'sample_rate', self.sample_rate)
+                # Déterministe : la 1re occurrence puis une toutes les 1/taux
+                if rate <= 0 or (rate < 1 and (site[0] - 1) % round(1 / rate)):
+                    return False
+
+            if not self.rate_limit:
+                return True
+            if now - site[1] >= self.window:
+                if site[3]:
+                    record.msg = f"{record.msg} [{site[3]} message(s) similaire(s) supprimé(s)]"
+                site[1], site[2], site[3] = now, 0, 0
+            if site[2] >= self.rate_limit:
+                site[3] += 1
+                return False
+            site[2] += 1
+            return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler qui abandonne le message quand la file est pleine au lieu de bloquer"""
+
+    dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DroppingQueueHandler.dropped += 1
+
+
+def _file_handler(filename: str, formatter: logging.Formatter) -> logging.Handler:
+    """Fichier à rotation par taille ; simple ajout dans les processus de travail (exports)
+    pour que seul le processus principal renomme les fichiers"""
+    log_file = os.path.join(LOG_DIR, filename)
+    if multiprocessing.parent_process() is None:
+        handler = logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS, encoding='utf-8', delay=True
+        )
+    else:
+        handler = logging.FileHandler(log_file, encoding='utf-8', delay=True)
+    handler.setFormatter(formatter)
+    return handler
+
 
-# Configuration du logger de débogage
 def setup_debug_logger():
-    """Configure un logger pour les messages de débogage silencieux"""
+    """
+    Configure le logger de débogage et son thread d'écriture
+    fixtop_debug -> file -> debug.log (tous les messages)
+                         -> slow_queries.jsonl (messages de fixtop_debug.slow_queries)
+    """
     logger = logging.getLogger('fixtop_debug')
-    logger.setLevel(logging.DEBUG)
-    
+    logger.setLevel(LOG_LEVEL)
+
     # Éviter les doublons de handlers
     if not logger.handlers:
-        # Handler pour fichier de log
-        log_file = os.path.join(os.path.dirname(__file__), '..', 'logs', 'debug.log')
-        os.makedirs(os.path.dirname(log_file), exist_ok=True)
-        
-        file_handler = logging.FileHandler(log_file)
-        file_handler.setLevel(logging.DEBUG)
-        
-        # Format des messages
-        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-        file_handler.setFormatter(formatter)
-        
-        logger.addHandler(file_handler)
-    
+        os.makedirs(LOG_DIR, exist_ok=True)
+
+        debug_handler = _file_handler(
+            'debug.log', logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+        )
+        # Message brut : chaque ligne reste un document JSON valide
+        slow_query_handler = _file_handler('slow_queries.jsonl', logging.Formatter('%(message)s'))
+        slow_query_handler.addFilter(logging.Filter(SLOW_QUERY_LOGGER))
+
+        log_queue = queue.Queue(LOG_QUEUE_SIZE)
+        listener = logging.handlers.QueueListener(log_queue, debug_handler, slow_query_handler)
+        listener.start()
+        # Vide la file avant la fin du processus
+        atexit.register(listener.stop)
+
+        queue_handler = DroppingQueueHandler(log_queue)
+        queue_handler.addFilter(SamplingFilter())
+        logger.addHandler(queue_handler)
+        logger.propagate = False
+
+    return logger
+
+
+def setup_slow_query_logger():
+    """Logger des requêtes lentes : une ligne JSON par requête (logs/slow_queries.jsonl),
+    recopiée dans debug.log ; écrit par le thread de fixtop_debug (propagation)"""
+    logger = logging.getLogger(SLOW_QUERY_LOGGER)
+    # Toujours journalisées, quel que soit FIXTOP_LOG_LEVEL
+    logger.setLevel(logging.DEBUG)
     return logger
 
-# Instance globale du logger
+# Instances globales des loggers
 debug_logger = setup_debug_logger()
+slow_query_logger = setup_slow_query_logger()
 
 def log_column_check(column_name, is_present, context=""):
     """Log silencieux pour vérifier la présence des colonnes"""
     if is_present:
-        debug_logger.debug(f"Colonne '{column_name}' présente dans les données. {context}")
+        debug_logger.debug("Colonne '%s' présente dans les données. %s", column_name, context)
     else:
-        debug_logger.warning(f"Colonne '{column_name}' manquante dans les données. {context}")
+        debug_logger.warning("Colonne '%s' manquante dans les données. %s", column_name, context)
 
 def log_data_info(df, context=""):
-    """Log des informations sur le DataFrame"""
-    debug_logger.info(f"DataFrame info - Lignes: {len(df)}, Colonnes: {list(df.columns)}. {context}")
\ No newline at end of file
+    """Log des informations sur le DataFrame (appelé à chaque rerun : niveau DEBUG)"""
+    if debug_logger.isEnabledFor(logging.DEBUG):
+        debug_logger.debug("DataFrame info - Lignes: %d, Colonnes: %s. %s", len(df), list(df.columns), context)
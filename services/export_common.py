@@ -0,0 +1,308 @@
+import csv
+import gzip
+import hashlib
+import io
+import itertools
+import tempfile
+from collections import OrderedDict
+from datetime import date, datetime, time
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from services.lazy_import import lazy_import
+
+# Heavy writers, imported on first export
+openpyxl = lazy_import("openpyxl")
+openpyxl_cell = lazy_import("openpyxl.cell")
+openpyxl_styles = lazy_import("openpyxl.styles")
+openpyxl_utils = lazy_import("openpyxl.utils")
+pa = lazy_import("pyarrow")
+pq = lazy_import("pyarrow.parquet")
+
+# Rows written per chunk, and size above which the spooled CSV moves from memory to disk
+CSV_CHUNK_ROWS = 10_000
+CSV_SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+# Excel column width limit, and rows used to size the columns of a non-DataFrame input
+EXCEL_MAX_WIDTH = 50
+EXCEL_WIDTH_SAMPLE_ROWS = 1_000
+
+# Parquet codecs offered to users (zstd: smaller files, snappy: faster to read)
+PARQUET_COMPRESSIONS = ("zstd", "snappy")
+
+# Prepared export files kept per session (LRU, keyed by export_key)
+EXPORT_CACHE_SIZE = 4
+
+
+def iter_table(data):
+    """Normalize export input into (columns, rows iterator).
+
+    Args:
+        data: a DataFrame, or any iterable of dicts (e.g. db_manager.iter_problems()).
+              Batches (lists of dicts, from iter_*(batches=True)) are flattened.
+    Returns:
+        (list of column names, iterator of row tuples). Columns is empty when
+        there is no data (including an empty DataFrame).
+    """
+    if isinstance(data, pd.DataFrame):
+        if data.empty:
+            return [], iter(())
+        return list(data.columns), data.itertuples(index=False, name=None)
+
+    records = iter(data)
+    first = next(records, None)
+    if isinstance(first, list):
+        # Batches produced by iter_*(batches=True)
+        records = itertools.chain(first, itertools.chain.from_iterable(records))
+        first = next(records, None)
+    if first is None:
+        return [], iter(())
+
+    columns = list(first.keys())
+    rows = (
+        tuple(record.get(column) for column in columns)
+        for record in itertools.chain([first], records)
+    )
+    return columns, rows
+
+
+
+def stream_csv(data, compress: bool = False, chunk_rows: int = CSV_CHUNK_ROWS, progress=None):
+    """Write data as CSV, chunk by chunk, into a spooled temporary file.
+
+    Args:
+        data: a DataFrame or an iterable of dicts (see iter_table).
+        compress: gzip the output.
+        chunk_rows: rows encoded per write.
+        progress: optional callable(rows written, total rows or None), called per chunk.
+    Returns:
+        A binary SpooledTemporaryFile rewound to the start (the caller closes it).
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=CSV_SPOOL_MAX_SIZE, mode="w+b")
+    raw = gzip.GzipFile(fileobj=spool, mode="wb") if compress else spool
+    text = io.TextIOWrapper(raw, encoding="utf-8", newline="", write_through=True)
+    try:
+        if isinstance(data, pd.DataFrame):
+            # Header even for an empty frame, like DataFrame.to_csv
+            text.write(data.head(0).to_csv(index=False))
+            for start in range(0, len(data), chunk_rows):
+                text.write(data.iloc[start:start + chunk_rows].to_csv(index=False, header=False))
+                if progress:
+                    progress(min(start + chunk_rows, len(data)), len(data))
+        else:
+            columns, rows = iter_table(data)
+            writer = csv.writer(text)
+            if columns:
+                writer.writerow(columns)
+            written = 0
+            while True:
+                chunk = list(itertools.islice(rows, chunk_rows))
+                if not chunk:
+                    break
+                writer.writerows(chunk)
+                written += len(chunk)
+                if progress:
+                    progress(written, None)
+        text.flush()
+    finally:
+        # Detach so closing the wrapper does not close the spool; closing gzip writes its trailer
+        text.detach()
+        if compress:
+            raw.close()
+    spool.seek(0)
+    return spool
+
+
+def export_key(*parts) -> str:
+    """Stable hash of the parameters an export depends on (filters, data version, format)"""
+    return hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()
+
+
+def frame_key(frame: pd.DataFrame) -> str:
+    """Content hash of a DataFrame, for exports whose filters are not tracked separately"""
+    values = pd.util.hash_pandas_object(frame, index=False).to_numpy()
+    return hashlib.sha1(values.tobytes() + repr(list(frame.columns)).encode("utf-8")).hexdigest()
+
+
+def get_cached_export(key: str):
+    """Prepared export for this key in the current session, or None"""
+    cache = st.session_state.get("export_cache")
+    if not cache or key not in cache:
+        return None
+    cache.move_to_end(key)
+    return cache[key]
+
+
+def cache_export(key: str, payload):
+    """Keeps a prepared export for this session (LRU) and returns it"""
+    if payload is None:
+        return None
+    cache = st.session_state.setdefault("export_cache", OrderedDict())
+    cache[key] = payload
+    cache.move_to_end(key)
+    while len(cache) > EXPORT_CACHE_SIZE:
+        cache.popitem(last=False)
+    return payload
+
+
+def excel_column_widths(frame: pd.DataFrame) -> list:
+    """Column widths (header and longest value + 2, capped) from vectorized length statistics"""
+    widths = []
+    for name in frame.columns:
+        series = frame[name]
+        longest = 0
+        if series.notna().any():
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                # Only the categories in use need measuring
+                used = series.cat.remove_unused_categories().cat.categories
+                longest = int(pd.Series(used).astype(str).str.len().max())
+            elif pd.api.types.is_datetime64_any_dtype(series):
+                longest = 19
+            elif pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+                longest = max(len(str(series.min())), len(str(series.max())))
+            else:
+                longest = int(series.dropna().astype(str).str.len().max())
+        widths.append(min(max(longest, len(str(name))) + 2, EXCEL_MAX_WIDTH))
+    return widths
+
+
+def _excel_value(value):
+    """Native Excel value: numbers and dates are kept, missing values become empty cells"""
+    if value is None or value is pd.NaT or value is pd.NA:
+        return None
+    if isinstance(value, (float, np.floating)) and np.isnan(value):
+        return None
+    if isinstance(value, (str, bool, int, float, np.number, np.bool_, date, time)):
+        if isinstance(value, datetime) and value.tzinfo is not None:
+            # Excel has no time zones
+            return value.replace(tzinfo=None)
+        return value
+    return str(value)
+
+
+def _excel_columns(chunk: pd.DataFrame) -> list:
+    """Column value lists of a chunk, converted column by column (see _excel_value)"""
+    columns = []
+    for name in chunk.columns:
+        series = chunk[name]
+        if pd.api.types.is_datetime64_any_dtype(series):
+            if series.dt.tz is not None:
+                series = series.dt.tz_localize(None)
+            values = series.astype(object).where(series.notna(), None).tolist()
+        elif pd.api.types.is_numeric_dtype(series) and not isinstance(series.dtype, pd.CategoricalDtype):
+            values = series.astype(object).where(series.notna(), None).tolist()
+        else:
+            values = [_excel_value(value) for value in series.tolist()]
+        columns.append(values)
+    return columns
+
+
+def _excel_rows(data, chunk_rows: int):
+    """(columns, widths, iterator of row tuples) for a DataFrame or an iterable of dicts"""
+    if isinstance(data, pd.DataFrame):
+        if data.empty:
+            return [], [], iter(())
+        rows = (
+            row
+            for start in range(0, len(data), chunk_rows)
+            for row in zip(*_excel_columns(data.iloc[start:start + chunk_rows]))
+        )
+        return list(data.columns), excel_column_widths(data), rows
+
+    columns, rows = iter_table(data)
+    # Widths must be known before the first row of a write-only sheet: size them on a sample
+    sample = list(itertools.islice(rows, EXCEL_WIDTH_SAMPLE_ROWS))
+    widths = excel_column_widths(pd.DataFrame.from_records(sample, columns=columns))
+    rows = (tuple(_excel_value(value) for value in row) for row in itertools.chain(sample, rows))
+    return columns, widths, rows
+
+
+def write_excel(sheets: dict, title: str, chunk_rows: int = CSV_CHUNK_ROWS, progress=None) -> bytes:
+    """Stream data into a write-only workbook, one sheet per entry.
+
+    Each sheet has the title, the generation date, then a styled header row
+    and the rows with their native types. Rows go straight to openpyxl's
+    temporary files, so memory does not grow with the row count.
+
+    Args:
+        sheets: {sheet name: DataFrame or iterable of dicts}. With several
+                sheets, the empty ones are left out and each title gets the
+                sheet name.
+        title: report title.
+        progress: optional callable(rows written, total rows or None), called per chunk.
+    Returns:
+        The .xlsx file content.
+    """
+    wb = openpyxl.Workbook(write_only=True)
+    total = None
+    if all(isinstance(data, pd.DataFrame) for data in sheets.values()):
+        total = sum(len(data) for data in sheets.values())
+    written = 0
+    header_font = openpyxl_styles.Font(bold=True, color="FFFFFF")
+    header_fill = openpyxl_styles.PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+
+    for sheet_name, data in sheets.items():
+        columns, widths, rows = _excel_rows(data, chunk_rows)
+        if not columns and len(sheets) > 1:
+            continue
+
+        ws = wb.create_sheet(title=sheet_name)
+        for col_idx, width in enumerate(widths, 1):
+            ws.column_dimensions[openpyxl_utils.get_column_letter(col_idx)].width = width
+        ws.merged_cells.add(f"A1:{openpyxl_utils.get_column_letter(max(len(columns), 1))}1")
+
+        title_cell = openpyxl_cell.WriteOnlyCell(ws, value=title if len(sheets) == 1 else f"{title} - {sheet_name}")
+        title_cell.font = openpyxl_styles.Font(size=16, bold=True)
+        title_cell.alignment = openpyxl_styles.Alignment(horizontal="center")
+        ws.append([title_cell])
+
+        date_cell = openpyxl_cell.WriteOnlyCell(ws, value=f"Generated on: {datetime.now().strftime('%d/%m/%Y %H:%M')}")
+        date_cell.font = openpyxl_styles.Font(size=10, italic=True)
+        ws.append([date_cell])
+        ws.append([])
+
+        if not columns:
+            continue
+        header = []
+        for column_name in columns:
+            cell = openpyxl_cell.WriteOnlyCell(ws, value=str(column_name))
+            cell.font = header_font
+            cell.fill = header_fill
+            cell.alignment = openpyxl_styles.Alignment(horizontal="center")
+            header.append(cell)
+        ws.append(header)
+
+        for row in rows:
+            ws.append(row)
+            written += 1
+            if progress and written % chunk_rows == 0:
+                progress(written, total)
+
+    if not wb.worksheets:
+        wb.create_sheet(title="Statistics")
+
+    with tempfile.SpooledTemporaryFile(max_size=CSV_SPOOL_MAX_SIZE, mode="w+b") as spool:
+        wb.save(spool)
+        spool.seek(0)
+        return spool.read()
+
+
+def arrow_table(frame: pd.DataFrame) -> "pa.Table":
+    """Columnar copy of a DataFrame with its types (categoricals become dictionary columns)"""
+    return pa.Table.from_pandas(frame, preserve_index=False)
+
+
+def write_parquet(frame: pd.DataFrame, target, compression: str = "zstd"):
+    """Write a DataFrame as Parquet to a path or a binary file object"""
+    if compression not in PARQUET_COMPRESSIONS:
+        raise ValueError(f"Unsupported Parquet compression: {compression}")
+    pq.write_table(arrow_table(frame), target, compression=compression)
+
+
+def write_arrow(frame: pd.DataFrame, target):
+    """Write a DataFrame as an Arrow IPC file (.arrow) to a path or a binary file object"""
+    table = arrow_table(frame)
+    with pa.ipc.new_file(target, table.schema) as writer:
+        writer.write_table(table)
@@ -0,0 +1,231 @@
+"""
+Background export jobs
+
+Exports run in a pool of worker processes, never in the Streamlit script
+thread. A job is identified by (format, filter hash, data epoch): two users
+asking for the same export share one job and one file. Finished files stay in
+a size-bounded disk cache (least recently used files are evicted first), so
+an export is only rebuilt when the filters or the data change.
+
+    FIXTOP_EXPORT_DIR=<dir>        cache directory (default: <tmp>/fixtop_exports)
+    FIXTOP_EXPORT_CACHE_MB=512     cache size limit
+    FIXTOP_EXPORT_WORKERS=2        worker processes
+"""
+
+import atexit
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import streamlit as st
+
+from services.debug_logger import debug_logger
+from services.export_common import export_key, stream_csv, write_excel, write_parquet, write_arrow
+from services.metrics import EXPORT_JOBS, EXPORT_JOBS_RUNNING
+from services.pdf_report import build_pdf_report
+
+EXPORT_DIR = os.environ.get("FIXTOP_EXPORT_DIR") or os.path.join(tempfile.gettempdir(), "fixtop_exports")
+EXPORT_CACHE_MAX_BYTES = int(os.environ.get("FIXTOP_EXPORT_CACHE_MB", "512")) * 1024 * 1024
+EXPORT_WORKERS = int(os.environ.get("FIXTOP_EXPORT_WORKERS", "2"))
+
+# Format -> MIME type of the downloaded file
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "csv.gz": "application/gzip",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "pdf": "application/pdf",
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.file",
+}
+
+PROGRESS_SUFFIX = ".progress"
+
+
+def _write_progress(path: str, done: int, total):
+    """Progress file read by the parent process (fraction, or -1 when the total is unknown)"""
+    with open(path + PROGRESS_SUFFIX, "w") as progress_file:
+        progress_file.write(str(done / total if total else -1))
+
+
+def run_export(path: str, fmt: str, sheets: dict, title: str, options: dict) -> str:
+    """
+    Builds one export file (runs in a worker process)
+    The file is written under a temporary name and renamed once complete, so
+    a file present in the cache is always whole.
+    """
+    def progress(done, total):
+        _write_progress(path, done, total)
+
+    partial = f"{path}.{os.getpid()}.part"
+    try:
+        # CSV, Parquet and Arrow hold a single table: the first sheet
+        if fmt in ("csv", "csv.gz"):
+            data = next(iter(sheets.values()))
+            with stream_csv(data, compress=fmt == "csv.gz", progress=progress) as spool, \
+                    open(partial, "wb") as out:
+                shutil.copyfileobj(spool, out)
+        elif fmt == "xlsx":
+            content = write_excel(sheets, title, progress=progress)
+            with open(partial, "wb") as out:
+                out.write(content)
+        elif fmt == "pdf":
+            content = build_pdf_report(sheets, title, options["limits"], options["default_limit"],
+                                       use_worker=False)
+            with open(partial, "wb") as out:
+                out.write(content)
+        elif fmt == "parquet":
+            write_parquet(next(iter(sheets.values())), partial, compression=options.get("compression", "zstd"))
+        elif fmt == "arrow":
+            write_arrow(next(iter(sheets.values())), partial)
+        else:
+            raise ValueError(f"Unknown export format: {fmt}")
+        os.replace(partial, path)
+    finally:
+        for leftover in (partial, path + PROGRESS_SUFFIX):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+    return path
+
+
+class ExportJobManager:
+    def __init__(self, cache_dir: str = EXPORT_DIR, max_bytes: int = EXPORT_CACHE_MAX_BYTES,
+                 workers: int = EXPORT_WORKERS):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.workers = workers
+        os.makedirs(cache_dir, exist_ok=True)
+        self._jobs = {}
+        self._errors = {}
+        self._lock = threading.Lock()
+        self._pool = None
+        EXPORT_JOBS_RUNNING.set(0)
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        # 'spawn': forking a threaded server is unsafe
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                             mp_context=multiprocessing.get_context("spawn"))
+            atexit.register(self._pool.shutdown, wait=False, cancel_futures=True)
+        return self._pool
+
+    @staticmethod
+    def job_key(fmt: str, filter_hash, epoch) -> str:
+        """Identity of an export: same format, same filters, same data"""
+        return export_key("export_job", fmt, filter_hash, epoch)
+
+    def path(self, key: str, fmt: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.{fmt}")
+
+    # ==================== JOBS ====================
+
+    def submit(self, key: str, fmt: str, sheets: dict, title: str, **options):
+        """Starts the export unless its file is already cached or a job for it is running"""
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {fmt}")
+        path = self.path(key, fmt)
+        with self._lock:
+            if os.path.exists(path) or key in self._jobs:
+                return
+            self._errors.pop(key, None)
+            try:
+                future = self._get_pool().submit(run_export, path, fmt, sheets, title, options)
+            except BrokenProcessPool:
+                # A worker died: start a new pool
+                self._pool = None
+                future = self._get_pool().submit(run_export, path, fmt, sheets, title, options)
+            self._jobs[key] = (future, time.time(), fmt)
+            EXPORT_JOBS_RUNNING.set(len(self._jobs))
+        EXPORT_JOBS.inc(format=fmt, state="submitted")
+        future.add_done_callback(lambda done: self._finish(key, done))
+
+    def _finish(self, key: str, future):
+        with self._lock:
+            job = self._jobs.pop(key, None)
+            EXPORT_JOBS_RUNNING.set(len(self._jobs))
+            error = future.exception()
+            if job is not None:
+                EXPORT_JOBS.inc(format=job[2], state="failed" if error is not None else "succeeded")
+            if error is not None:
+                self._errors[key] = str(error) or type(error).__name__
+                debug_logger.error("Export job %s failed: %r", key, error)
+                if isinstance(error, BrokenProcessPool):
+                    # A worker died: the next job starts a new pool
+                    self._pool = None
+        self.evict()
+
+    def status(self, key: str, fmt: str) -> dict:
+        """
+        Returns: {'state': 'missing' | 'running' | 'ready' | 'failed',
+                  'progress': fraction or None, 'elapsed': seconds, 'error': message}
+        """
+        path = self.path(key, fmt)
+        with self._lock:
+            job = self._jobs.get(key)
+            error = self._errors.get(key)
+        if job is not None:
+            progress = None
+            try:
+                with open(path + PROGRESS_SUFFIX) as progress_file:
+                    value = float(progress_file.read() or -1)
+                progress = value if value >= 0 else None
+            except (OSError, ValueError):
+                pass
+            return {"state": "running", "progress": progress, "elapsed": time.time() - job[1], "error": None}
+        if os.path.exists(path):
+            return {"state": "ready", "progress": 1.0, "elapsed": 0, "error": None}
+        if error is not None:
+            return {"state": "failed", "progress": None, "elapsed": 0, "error": error}
+        return {"state": "missing", "progress": None, "elapsed": 0, "error": None}
+
+    def read(self, key: str, fmt: str) -> bytes:
+        """
+        Content of a ready export (marks it as recently used)
+        Raises: FileNotFoundError when the file was evicted from the cache
+        """
+        path = self.path(key, fmt)
+        with open(path, "rb") as export_file:
+            content = export_file.read()
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            # Evicted while it was read: the content is still complete
+            pass
+        return content
+
+    # ==================== CACHE ====================
+
+    def evict(self):
+        """Removes the least recently used files until the cache fits in max_bytes"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.endswith((".part", PROGRESS_SUFFIX)) or not os.path.isfile(path):
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+
+@st.cache_resource
+def get_export_jobs() -> ExportJobManager:
+    """Export job manager shared by every session of the process"""
+    manager = ExportJobManager()
+    manager.evict()
+    return manager
@@ -0,0 +1,121 @@
+"""
+Identity of the logged-in user, resolved once per session
+
+The roles, the team (managed or joined), the team member ids and the
+permission matrix of the active role are loaded at login and kept in
+st.session_state. show_sidebar() calls refresh_identity() once per rerun: a
+single MAX(rowid) query on the user, team and team_member logs tells whether
+the memberships changed, and only then is the identity loaded again.
+
+Role assignments (user_role has no log table) are read at login, like the
+role list shown by the role selection page.
+"""
+
+import streamlit as st
+
+from permissions import PermissionManager
+
+IDENTITY_KEY = "identity"
+# Tables whose changes can alter a user's team or team members
+IDENTITY_TABLES = ('user', 'team', 'team_member')
+
+
+class IdentityContext:
+    """Roles, team and permissions of one user, for one active role"""
+
+    def __init__(self, user: dict, role: str, roles: list, team: dict, team_member_ids, version):
+        self.user_id = user['id']
+        self.name = user['name']
+        self.email = user['email']
+        self.role_names = frozenset(r['name'] for r in roles) or frozenset([user.get('role_name')])
+        self.roles = roles
+        self.team = team
+        self.team_member_ids = frozenset(team_member_ids)
+        self.version = version
+        self.user = user
+        self.set_role(role)
+
+    def set_role(self, role: str):
+        """Active role: its permission matrix (PermissionManager.ROLE_PERMISSIONS)"""
+        self.role = role
+        self.permissions = PermissionManager.ROLE_PERMISSIONS.get(role, {})
+
+    def has_role(self, name: str) -> bool:
+        return name in self.role_names
+
+    def can(self, page: str, action: str) -> bool:
+        return self.permissions.get(page, {}).get(action, False)
+
+    def deletable_creator_ids(self):
+        """
+        Creators of the tickets this user can delete (rules of DatabaseManager.can_delete_ticket)
+        Returns: None if every ticket can be deleted (admin), otherwise a frozenset of user ids
+        """
+        if self.has_role('admin'):
+            return None
+        if self.has_role('agent'):
+            return frozenset([self.user_id])
+        if self.has_role('manager') and self.team:
+            return self.team_member_ids
+        return frozenset()
+
+
+def load_identity(db, user_id: int, role: str, roles: list = None, user: dict = None) -> IdentityContext:
+    """
+    Loads the identity of a user (roles and user are reused when the login already read them)
+    A manager's team is the team they manage, an agent's team the team they belong to.
+    """
+    version = db.get_data_version(IDENTITY_TABLES)
+    user = user or db.get_user_by_id(user_id)
+    roles = db.get_user_roles(user_id) if roles is None else roles
+    role_names = {r['name'] for r in roles} or {user.get('role_name')}
+
+    team = None
+    if 'manager' in role_names:
+        team = db.get_manager_current_team(user_id)
+    elif 'agent' in role_names:
+        team = db.get_agent_current_team(user_id)
+    team_member_ids = [member['user_id'] for member in db.get_team_members(team['id'])] if team else []
+    return IdentityContext(user, role, roles, team, team_member_ids, version)
+
+
+def get_identity():
+    """
+    Identity of the logged-in user (loaded on first use), None without a user id
+    (e.g. the built-in admin account)
+    """
+    user_id = st.session_state.get('user_id')
+    if not user_id:
+        return None
+    role = st.session_state.get('user_role', 'agent')
+    identity = st.session_state.get(IDENTITY_KEY)
+    if identity is None or identity.user_id != user_id:
+        from database import db_manager
+
+        identity = load_identity(db_manager, user_id, role, roles=st.session_state.get('user_roles'))
+        st.session_state[IDENTITY_KEY] = identity
+    elif identity.role != role:
+        # Role switch: same user, same team, other permission matrix
+        identity.set_role(role)
+    return identity
+
+
+def refresh_identity():
+    """Reloads the identity when the users, teams or memberships changed since it was loaded"""
+    identity = st.session_state.get(IDENTITY_KEY)
+    if identity is None:
+        return get_identity()
+    from database import db_manager
+
+    if db_manager.get_data_version(IDENTITY_TABLES) != identity.version:
+        del st.session_state[IDENTITY_KEY]
+    return get_identity()
+
+
+def current_user_id():
+    """
+    Author recorded by user creations (created_by): the logged-in user, None (NULL)
+    for the built-in admin account, which has no user row
+    """
+    identity = get_identity()
+    return identity.user_id if identity else None
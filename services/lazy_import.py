@@ -0,0 +1,44 @@
+"""
+Deferred imports for heavy libraries (reportlab, openpyxl, plotly, pyarrow)
+
+    px = lazy_import("plotly.express")   # nothing imported yet
+    px.bar(...)                          # plotly.express is imported here, once
+
+Pages and tabs that never export or draw a chart do not pay for these
+libraries at start-up. Annotations must not reference a lazy module
+(use strings: "pa.Table"), or the import happens at definition time.
+"""
+
+import importlib
+import sys
+import types
+
+
+class LazyModule(types.ModuleType):
+    """Module placeholder importing the real module on first attribute access"""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+
+    def __getattr__(self, attribute):
+        # Only called for attributes not found yet: import, then copy the module namespace
+        # so the following accesses are plain attribute lookups
+        module = importlib.import_module(self.__name__)
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attribute)
+
+    def __dir__(self):
+        return dir(importlib.import_module(self.__name__))
+
+
+def lazy_import(name: str):
+    """The module if it is already imported, else a placeholder importing it on first use"""
+    module = sys.modules.get(name)
+    if module is not None and not isinstance(module, LazyModule):
+        return module
+    return LazyModule(name)
+
+
+def is_loaded(name: str) -> bool:
+    """True when the real module has been imported (by anyone)"""
+    return name in sys.modules
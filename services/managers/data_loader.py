@@ -16,16 +16,10 @@ def load_managers_data():
     """Load managers data from database"""
     try:
         # Get all users with "manager" role
-        users = db_manager.get_all_users()
-        if users:
-            df = pd.DataFrame(users)
-            # Filter only managers
-            managers_df = df[df['role_name'] == 'manager'].copy()
-            # Convert dates
-            if 'created_at' in managers_df.columns:
-                managers_df['created_at'] = pd.to_datetime(managers_df['created_at'])
-            if 'updated_at' in managers_df.columns:
-                managers_df['updated_at'] = pd.to_datetime(managers_df['updated_at'])
+        users_df = db_manager.get_all_users_frame()
+        if not users_df.empty:
+            # Filter only managers (dates are already parsed by fetch_frame)
+            managers_df = users_df[users_df['role_name'] == 'manager'].copy()
             return managers_df
         else:
             # Return empty DataFrame with expected columns
@@ -0,0 +1,54 @@
+import sys
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+
+def estimate_size(value) -> int:
+    """Approximate size in bytes of a session value (DataFrames and arrays measured deeply)"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            estimate_size(key) + estimate_size(item) for key, item in value.items()
+        )
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    return sys.getsizeof(value)
+
+
+def session_memory_report() -> pd.DataFrame:
+    """Returns one row per st.session_state key with its type and estimated size, largest first"""
+    rows = [
+        {"key": str(key), "type": type(value).__name__, "bytes": estimate_size(value)}
+        for key, value in st.session_state.items()
+    ]
+    report = pd.DataFrame(rows, columns=["key", "type", "bytes"])
+    return report.sort_values("bytes", ascending=False, ignore_index=True)
+
+
+def shared_memory_report():
+    """
+    Memory held once per process and shared by all sessions (ticket store)
+    Returns: None while no page has built the store (the report does not build it)
+    """
+    from services.tickets.ticket_store import current_ticket_store
+
+    store = current_ticket_store()
+    if store is None:
+        return None
+    return {"tickets": len(store), "bytes": store.nbytes, "version": store.version}
+
+
+def format_bytes(size: int) -> str:
+    """Human readable size (B, KB, MB, GB)"""
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
@@ -0,0 +1,264 @@
+"""
+In-process metrics in the Prometheus text format
+
+    FIXTOP_METRICS_PORT=9108        enables the metrics and serves them on http://<host>:<port>/metrics
+    FIXTOP_METRICS_HOST=127.0.0.1   listening address
+
+The server is a daemon thread started by app.py (once per process). Without
+FIXTOP_METRICS_PORT nothing is served, the instrumentation decorators return
+the functions unchanged and updating a metric returns immediately.
+"""
+
+import functools
+import inspect
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRICS_PORT = int(os.environ.get("FIXTOP_METRICS_PORT") or 0)
+METRICS_HOST = os.environ.get("FIXTOP_METRICS_HOST", "127.0.0.1")
+METRICS_ENABLED = METRICS_PORT > 0
+
+# Latency buckets (seconds), from a cached loader hit to a slow export
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# A session counts as active when it reran within this window (seconds)
+ACTIVE_SESSION_WINDOW = 300
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name: str, documentation: str, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}  # label values -> value
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels.get(name, "") for name in self.labels)
+
+    def samples(self):
+        """(suffix, label values, extra label, value) for every series"""
+        with self._lock:
+            return [("", key, "", value) for key, value in self._values.items()]
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, key, extra, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(self.labels, key, extra)} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """Gauge set by the application, or computed at scrape time by function"""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labels=(), function=None):
+        super().__init__(name, documentation, labels)
+        self.function = function
+
+    def set(self, value: float, **labels):
+        if not METRICS_ENABLED:
+            return
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def samples(self):
+        if self.function is not None:
+            return [("", (), "", self.function())]
+        return super().samples()
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value: float, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                # [count per bucket (not cumulative), sum, count]
+                series = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for position, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][position] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for key, (counts, total, count) in self._values.items():
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    samples.append(("_bucket", key, f'le="{_format_value(bound)}"', cumulative))
+                samples.append(("_sum", key, "", total))
+                samples.append(("_count", key, "", count))
+        return samples
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+# ==================== SESSIONS ====================
+
+_sessions = {}  # session id -> time of its last rerun
+_sessions_lock = threading.Lock()
+
+
+def record_session(session_id: str):
+    """Marks a session as active (called on every rerun)"""
+    if not METRICS_ENABLED:
+        return
+    with _sessions_lock:
+        _sessions[session_id] = time.time()
+
+
+def active_sessions() -> int:
+    limit = time.time() - ACTIVE_SESSION_WINDOW
+    with _sessions_lock:
+        for session_id in [key for key, seen in _sessions.items() if seen < limit]:
+            del _sessions[session_id]
+        return len(_sessions)
+
+
+# ==================== METRICS ====================
+
+DB_METHOD_SECONDS = REGISTRY.register(Histogram(
+    "fixtop_db_method_seconds", "Duration of DatabaseManager methods", ["method"]))
+DB_CONNECTIONS_OPENED = REGISTRY.register(Counter(
+    "fixtop_db_connections_opened_total", "SQLite connections opened by DatabaseManager"))
+CACHE_REQUESTS = REGISTRY.register(Counter(
+    "fixtop_cache_requests_total", "Calls of the cached loaders, by result (hit or miss)", ["loader", "result"]))
+RERUN_SECONDS = REGISTRY.register(Histogram(
+    "fixtop_rerun_seconds", "Duration of the page reruns", ["page"]))
+ACTIVE_SESSIONS = REGISTRY.register(Gauge(
+    "fixtop_active_sessions", f"Sessions with a rerun in the last {ACTIVE_SESSION_WINDOW} seconds",
+    function=active_sessions))
+EXPORT_JOBS_RUNNING = REGISTRY.register(Gauge(
+    "fixtop_export_jobs_running", "Export jobs submitted and not finished (queued or running)"))
+EXPORT_JOBS = REGISTRY.register(Counter(
+    "fixtop_export_jobs_total", "Export jobs by format and outcome (submitted, succeeded, failed)",
+    ["format", "state"]))
+
+
+# ==================== INSTRUMENTATION ====================
+
+def timed_methods(histogram: Histogram, exclude=()):
+    """Class decorator observing the duration of every public method (generators excepted)"""
+    def decorator(cls):
+        if not METRICS_ENABLED:
+            return cls
+        for attribute, value in list(vars(cls).items()):
+            if (attribute.startswith("_") or attribute in exclude or not inspect.isfunction(value)
+                    or inspect.isgeneratorfunction(value)):
+                continue
+            setattr(cls, attribute, _timed(histogram, value, method=f"{cls.__name__}.{attribute}"))
+        return cls
+    return decorator
+
+
+def _timed(histogram: Histogram, func, **labels):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            histogram.observe(time.perf_counter() - started, **labels)
+    return wrapper
+
+
+# ==================== SERVER ====================
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes are not worth a line on stderr
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(host: str = METRICS_HOST, port: int = METRICS_PORT):
+    """Serves /metrics from a daemon thread; does nothing when disabled or already started"""
+    global _server
+    if not METRICS_ENABLED:
+        return None
+    with _server_lock:
+        if _server is None:
+            from services.debug_logger import debug_logger
+
+            try:
+                _server = ThreadingHTTPServer((host, port), MetricsHandler)
+            except OSError as e:
+                # Port taken (another app process): metrics stay in-process only
+                debug_logger.warning("Metrics server not started on %s:%s: %s", host, port, e)
+                _server = False
+                return None
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name="fixtop-metrics", daemon=True).start()
+            debug_logger.info("Metrics served on http://%s:%s/metrics", host, port)
+        return _server or None
@@ -0,0 +1,157 @@
+"""
+Password hash policy
+
+Every password hash is a bcrypt hash of the configured cost (log2 rounds).
+Hashes of another cost and legacy SHA-256 hashes are still accepted, and
+replaced by a hash of the current cost after a successful login (the
+password is only known at that moment). The rehash runs in the background:
+the login does not wait for a second bcrypt computation.
+
+Verification runs inline, on the script thread of the login: that session
+waits for it, as it must. bcrypt releases the GIL while it computes, so the
+other sessions' scripts keep running meanwhile. Rehashes have their own small
+thread pool, so a wave of rehashes after a cost change can never queue in
+front of, delay or fail a login.
+
+    FIXTOP_BCRYPT_ROUNDS=12        cost of new hashes (4-31), see calibrate_rounds
+    FIXTOP_REHASH_THREADS=<n>      concurrent background rehashes (default: 2)
+
+Choosing the cost for a machine:
+    python -m services.password_policy --target-ms 250
+"""
+
+import argparse
+import atexit
+import hashlib
+import hmac
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+from services.debug_logger import debug_logger
+
+MIN_ROUNDS, MAX_ROUNDS = 4, 31
+BCRYPT_ROUNDS = min(max(int(os.environ.get("FIXTOP_BCRYPT_ROUNDS", "12")), MIN_ROUNDS), MAX_ROUNDS)
+REHASH_THREADS = int(os.environ.get("FIXTOP_REHASH_THREADS", "2"))
+
+# $2a$, $2b$ or $2y$, then the cost on two digits
+BCRYPT_HASH_PATTERN = re.compile(r"^\$2[aby]\$(\d{2})\$")
+
+_rehash_executor = None
+_rehash_executor_lock = threading.Lock()
+
+
+def _get_rehash_executor() -> ThreadPoolExecutor:
+    """Threads of the background rehashes only (logins never wait on them)"""
+    global _rehash_executor
+    with _rehash_executor_lock:
+        if _rehash_executor is None:
+            _rehash_executor = ThreadPoolExecutor(max_workers=REHASH_THREADS, thread_name_prefix="rehash")
+            atexit.register(_rehash_executor.shutdown, wait=False, cancel_futures=True)
+        return _rehash_executor
+
+
+def hash_password(password: str, rounds: int = None) -> str:
+    """bcrypt hash of the password at the policy cost (or rounds)"""
+    salt = bcrypt.gensalt(rounds=rounds or BCRYPT_ROUNDS)
+    return bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
+
+
+def hash_cost(hashed: str):
+    """Cost of a bcrypt hash, None for a legacy (SHA-256) hash"""
+    match = BCRYPT_HASH_PATTERN.match(hashed or "")
+    return int(match.group(1)) if match else None
+
+
+def needs_rehash(hashed: str, rounds: int = None) -> bool:
+    """True for a legacy hash or a bcrypt hash of another cost than the policy"""
+    return hash_cost(hashed) != (rounds or BCRYPT_ROUNDS)
+
+
+def _check(password: str, hashed: str) -> bool:
+    if hash_cost(hashed) is None:
+        # Legacy accounts: unsalted SHA-256, compared in constant time
+        return hmac.compare_digest(hashlib.sha256(password.encode("utf-8")).hexdigest(), hashed or "")
+    try:
+        return bcrypt.checkpw(password.encode("utf-8"), hashed.encode("utf-8"))
+    except ValueError:
+        # Corrupted hash
+        return False
+
+
+def verify_password(password: str, hashed: str) -> bool:
+    """
+    Checks the password against a bcrypt or legacy SHA-256 hash, on the calling
+    thread (bcrypt releases the GIL: other sessions keep running)
+    """
+    return _check(password, hashed)
+
+
+def schedule_rehash(password: str, hashed: str, store) -> bool:
+    """
+    After a successful login: when the stored hash is outdated, computes a hash at
+    the policy cost in a rehash thread and passes it to store(new_hash)
+    Returns: True if a rehash was scheduled
+    """
+    if not needs_rehash(hashed):
+        return False
+
+    def rehash():
+        try:
+            store(hash_password(password))
+        except Exception as e:
+            debug_logger.warning("Password rehash failed: %s", e)
+
+    _get_rehash_executor().submit(rehash)
+    return True
+
+
+def verification_ms(rounds: int, samples: int = 3) -> float:
+    """Median time of one verification at this cost on this machine"""
+    hashed = bcrypt.hashpw(b"calibration", bcrypt.gensalt(rounds=rounds))
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        bcrypt.checkpw(b"calibration", hashed)
+        timings.append((time.perf_counter() - started) * 1000)
+    return sorted(timings)[len(timings) // 2]
+
+
+def calibrate_rounds(target_ms: float = 250, min_rounds: int = 10, max_rounds: int = 16) -> int:
+    """
+    Highest cost whose verification stays within target_ms (never below min_rounds)
+    Each extra round doubles the work: the cost is measured once at min_rounds
+    and extrapolated, then the choice is checked with one real measurement.
+    """
+    base_ms = verification_ms(min_rounds)
+    rounds = min_rounds
+    while rounds < max_rounds and base_ms * 2 ** (rounds + 1 - min_rounds) <= target_ms:
+        rounds += 1
+    while rounds > min_rounds and verification_ms(rounds, samples=1) > target_ms:
+        rounds -= 1
+    return rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chooses FIXTOP_BCRYPT_ROUNDS for this machine")
+    parser.add_argument("--target-ms", type=float, default=250, help="target verification time of one login")
+    parser.add_argument("--min-rounds", type=int, default=10)
+    parser.add_argument("--max-rounds", type=int, default=16)
+    args = parser.parse_args()
+
+    print(f"{'rounds':>6}{'verify (ms)':>14}")
+    for rounds in range(args.min_rounds, args.max_rounds + 1):
+        ms = verification_ms(rounds, samples=1)
+        print(f"{rounds:>6}{ms:>14.0f}")
+        if ms > 4 * args.target_ms:
+            break
+    rounds = calibrate_rounds(args.target_ms, args.min_rounds, args.max_rounds)
+    print(f"\nFIXTOP_BCRYPT_ROUNDS={rounds}  (current policy: {BCRYPT_ROUNDS})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+PDF report engine shared by the ticket and team exports
+
+Cells are truncated column by column with vectorized string operations, then
+laid out as a series of LongTable chunks repeating the header row: reportlab
+only has to split small tables, so layout time stays linear in the row count.
+Large reports are rendered in a worker process so the Streamlit script thread
+(and the GIL) stays free while reportlab works.
+"""
+
+import atexit
+import io
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from functools import lru_cache
+import multiprocessing
+import threading
+
+import pandas as pd
+
+from services.debug_logger import debug_logger
+from services.lazy_import import lazy_import
+
+# reportlab is imported on the first report
+colors = lazy_import("reportlab.lib.colors")
+pagesizes = lazy_import("reportlab.lib.pagesizes")
+rl_styles = lazy_import("reportlab.lib.styles")
+platypus = lazy_import("reportlab.platypus")
+
+# Rows per LongTable chunk, and row count from which a report is rendered in the worker process
+PDF_TABLE_CHUNK_ROWS = 250
+PDF_WORKER_MIN_ROWS = 2_000
+PDF_WORKER_TIMEOUT = 600
+
+PAGE_MARGINS = {"rightMargin": 30, "leftMargin": 30, "topMargin": 50, "bottomMargin": 30}
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def table_style():
+    """Style of every table chunk, built once per process"""
+    return platypus.TableStyle([
+        ("BACKGROUND", (0, 0), (-1, 0), colors.grey),
+        ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
+        ("ALIGN", (0, 0), (-1, -1), "LEFT"),
+        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+        ("FONTSIZE", (0, 0), (-1, 0), 8),
+        ("BOTTOMPADDING", (0, 0), (-1, 0), 8),
+        ("TOPPADDING", (0, 0), (-1, 0), 8),
+        ("BACKGROUND", (0, 1), (-1, -1), colors.beige),
+        ("FONTNAME", (0, 1), (-1, -1), "Helvetica"),
+        ("FONTSIZE", (0, 1), (-1, -1), 7),
+        ("GRID", (0, 0), (-1, -1), 0.5, colors.black),
+        ("VALIGN", (0, 0), (-1, -1), "TOP"),
+        ("LEFTPADDING", (0, 0), (-1, -1), 3),
+        ("RIGHTPADDING", (0, 0), (-1, -1), 3),
+    ])
+
+
+@lru_cache(maxsize=1)
+def _paragraph_styles():
+    """Sample stylesheet and title style, built once per process"""
+    styles = rl_styles.getSampleStyleSheet()
+    title_style = rl_styles.ParagraphStyle(
+        "CustomTitle",
+        parent=styles["Heading1"],
+        fontSize=14,
+        spaceAfter=20,
+        alignment=1,
+    )
+    return styles, title_style
+
+
+def _as_text(series: pd.Series) -> pd.Series:
+    """str() of every value, computed for the whole column"""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.dt.strftime("%Y-%m-%d %H:%M:%S").fillna("NaT")
+    return series.astype(str)
+
+
+def truncate_frame(frame: pd.DataFrame, limits, default_limit) -> list:
+    """
+    Table rows (header first) with every cell cut to the limit of its column
+    Args:
+        limits: (max_chars, ellipsis) per column position; ellipsis appends "..." to cut values
+        default_limit: (max_chars, ellipsis) of the columns beyond limits
+    """
+    columns = []
+    for position, name in enumerate(frame.columns):
+        max_chars, ellipsis = limits[position] if position < len(limits) else default_limit
+        text = _as_text(frame[name])
+        cut = text.str.slice(0, max_chars)
+        if ellipsis:
+            cut = cut.where(text.str.len() <= max_chars, cut + "...")
+        columns.append(cut.tolist())
+    return [[str(name) for name in frame.columns]] + [list(row) for row in zip(*columns)]
+
+
+def render_report(title: str, sections: list, generated_on: str) -> bytes:
+    """
+    Builds the PDF (runs in the worker process for large reports)
+    Args:
+        sections: [(section name or None, table rows with the header first)]
+        generated_on: date printed under the title
+    """
+    styles, title_style = _paragraph_styles()
+    buffer = io.BytesIO()
+    doc = platypus.SimpleDocTemplate(buffer, pagesize=pagesizes.A4, **PAGE_MARGINS)
+
+    elements = [
+        platypus.Paragraph(title, title_style),
+        platypus.Spacer(1, 8),
+        platypus.Paragraph(f"Generated on: {generated_on}", styles["Normal"]),
+        platypus.Spacer(1, 12),
+    ]
+    available_width = pagesizes.A4[0] - PAGE_MARGINS["leftMargin"] - PAGE_MARGINS["rightMargin"]
+
+    for section_name, rows in sections:
+        if section_name:
+            elements.append(platypus.Paragraph(section_name, styles["Heading2"]))
+            elements.append(platypus.Spacer(1, 6))
+
+        header, body = rows[0], rows[1:]
+        col_widths = [available_width / len(header)] * len(header)
+        for start in range(0, len(body), PDF_TABLE_CHUNK_ROWS):
+            table = platypus.LongTable([header] + body[start:start + PDF_TABLE_CHUNK_ROWS],
+                                       colWidths=col_widths, repeatRows=1)
+            table.setStyle(table_style())
+            elements.append(table)
+
+        if section_name:
+            elements.append(platypus.Spacer(1, 12))
+
+    doc.build(elements)
+    return buffer.getvalue()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Single worker process, started on first use ('spawn': forking a threaded server is unsafe)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+            atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+        return _pool
+
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def build_pdf_report(data: dict, title: str, limits, default_limit, section_titles: bool = True,
+                     use_worker: bool = True) -> bytes:
+    """
+    PDF report with one table per non-empty DataFrame
+    Args:
+        data: {section name: DataFrame}
+        limits, default_limit: cell truncation (see truncate_frame)
+        section_titles: print the section names (only when there are several sections)
+        use_worker: False when already running in a worker (export jobs)
+    """
+    sections = [
+        (section_name if section_titles and len(data) > 1 else None,
+         truncate_frame(frame, limits, default_limit))
+        for section_name, frame in data.items()
+        if not frame.empty
+    ]
+    generated_on = datetime.now().strftime("%d/%m/%Y %H:%M")
+
+    if use_worker and sum(len(rows) - 1 for _, rows in sections) >= PDF_WORKER_MIN_ROWS:
+        try:
+            future = _get_pool().submit(render_report, title, sections, generated_on)
+            return future.result(timeout=PDF_WORKER_TIMEOUT)
+        except BrokenProcessPool as e:
+            debug_logger.warning("PDF worker unavailable, rendering in-process: %s", e)
+            _reset_pool()
+    return render_report(title, sections, generated_on)
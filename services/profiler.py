@@ -0,0 +1,284 @@
+"""
+Per-rerun profiler (opt-in)
+
+    FIXTOP_PROFILE=1             enables the instrumentation (read at start-up)
+    FIXTOP_PROFILE_LOG=<file>    JSON lines log of the reruns (default: logs/profile.jsonl)
+
+A rerun is recorded between show_sidebar() and show_rerun_profile() (see
+components/sidebar): wall time, SQL statements, rows fetched, and one entry
+per instrumented call with its inclusive time and SQL activity:
+- tab display() functions (@profiled("tab"))
+- DatabaseManager methods (@profile_methods("db"))
+- cached loaders (@profiled_cache), with cache hit or miss
+
+SQL statements and rows are counted by the DatabaseManager cursors (see
+services/query_log). Rerun durations and cache hits also feed the metrics
+when they are enabled (services/metrics). With neither FIXTOP_PROFILE nor
+the metrics, the decorators return the functions unchanged. Calls made
+outside a recorded rerun (fragments, worker processes) are not recorded.
+
+    python -m services.profiler [--log FILE] [--page PAGE] [--top N]
+"""
+
+import argparse
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+from services.metrics import CACHE_REQUESTS, METRICS_ENABLED, RERUN_SECONDS
+
+PROFILING_ENABLED = os.environ.get("FIXTOP_PROFILE", "") == "1"
+PROFILE_LOG = os.environ.get("FIXTOP_PROFILE_LOG") or os.path.join(
+    os.path.dirname(__file__), "..", "logs", "profile.jsonl"
+)
+
+SUMMARY_COLUMNS = ["kind", "name", "calls", "ms", "max_ms", "queries", "rows", "hits", "misses"]
+
+# Streamlit runs each session's script in its own thread: one rerun per thread at a time
+_local = threading.local()
+_log_lock = threading.Lock()
+
+
+class RerunProfile:
+    """Measurements of one rerun"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.wall_ms = None
+        self.queries = 0
+        self.rows = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.calls = []  # one record per instrumented call, in completion order
+        self.stack = []  # records of the calls in progress
+        self.panel = None  # sidebar placeholder, filled when the rerun ends
+
+    def to_record(self, page: str, **context) -> dict:
+        return {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "page": page,
+            **context,
+            "wall_ms": round(self.wall_ms, 2),
+            "queries": self.queries,
+            "rows": self.rows,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "calls": self.calls,
+        }
+
+
+def current_profile() -> Optional[RerunProfile]:
+    return getattr(_local, "profile", None)
+
+
+def start_rerun() -> Optional[RerunProfile]:
+    """Starts recording the current rerun (an unfinished, interrupted rerun is dropped)"""
+    if not (PROFILING_ENABLED or METRICS_ENABLED):
+        return None
+    _local.profile = RerunProfile()
+    return _local.profile
+
+
+def finish_rerun(page: str, **context) -> Optional[RerunProfile]:
+    """Stops recording, appends the rerun to the JSON log and to the rerun duration metric"""
+    profile = current_profile()
+    if profile is None:
+        return None
+    _local.profile = None
+    profile.wall_ms = (time.perf_counter() - profile.started) * 1000
+    RERUN_SECONDS.observe(profile.wall_ms / 1000, page=page)
+    if not PROFILING_ENABLED:
+        return profile
+
+    line = json.dumps(profile.to_record(page, **context), default=str)
+    try:
+        os.makedirs(os.path.dirname(PROFILE_LOG), exist_ok=True)
+        with _log_lock, open(PROFILE_LOG, "a") as log_file:
+            log_file.write(line + "\n")
+    except OSError:
+        pass
+    return profile
+
+
+# ==================== INSTRUMENTATION ====================
+
+def _call(name: str, kind: str, func, args, kwargs, extra: dict = None):
+    """
+    Runs func, recording it in the current rerun if there is one
+    extra is merged into the record once the call ends (cache result of the loaders).
+    """
+    profile = current_profile()
+    if profile is None:
+        return func(*args, **kwargs)
+
+    record = {"kind": kind, "name": name, "depth": len(profile.stack)}
+    queries, rows = profile.queries, profile.rows
+    profile.stack.append(record)
+    started = time.perf_counter()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        record["ms"] = round((time.perf_counter() - started) * 1000, 3)
+        record["queries"] = profile.queries - queries
+        record["rows"] = profile.rows - rows
+        profile.stack.pop()
+        if extra:
+            record.update(extra)
+        if record.get("cache") == "hit":
+            profile.cache_hits += 1
+        elif record.get("cache") == "miss":
+            profile.cache_misses += 1
+        profile.calls.append(record)
+
+
+def profiled(kind: str, name: str = None):
+    """Decorator recording each call of the function in the current rerun"""
+    def decorator(func):
+        if not PROFILING_ENABLED:
+            return func
+        label = name or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return _call(label, kind, func, args, kwargs)
+        return wrapper
+    return decorator
+
+
+def profile_methods(kind: str, exclude=()):
+    """Class decorator applying @profiled to every public method (generators excepted)"""
+    def decorator(cls):
+        if not PROFILING_ENABLED:
+            return cls
+        for attribute, value in list(vars(cls).items()):
+            if (attribute.startswith("_") or attribute in exclude or not inspect.isfunction(value)
+                    or inspect.isgeneratorfunction(value)):
+                continue
+            setattr(cls, attribute, profiled(kind, f"{cls.__name__}.{attribute}")(value))
+        return cls
+    return decorator
+
+
+def profiled_cache(cache=None, **options):
+    """
+    st.cache_data (or the given Streamlit cache decorator) recording hits and misses
+    A call is a miss when the function body runs, a hit otherwise.
+    """
+    import streamlit as st
+
+    cache = cache or st.cache_data
+
+    def decorator(func):
+        if not (PROFILING_ENABLED or METRICS_ENABLED):
+            return cache(**options)(func)
+        label = f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def compute(*args, **kwargs):
+            # Innermost loader call of this thread: its body runs, so it is a miss
+            _loader_calls()[-1]["cache"] = "miss"
+            return func(*args, **kwargs)
+
+        cached = cache(**options)(compute)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            result = {"cache": "hit"}
+            calls = _loader_calls()
+            calls.append(result)
+            try:
+                return _call(label, "loader", cached, args, kwargs, extra=result)
+            finally:
+                calls.pop()
+                CACHE_REQUESTS.inc(loader=label, result=result["cache"])
+        wrapper.clear = cached.clear
+        return wrapper
+    return decorator
+
+
+def _loader_calls() -> list:
+    """Cached loader calls in progress in this thread, innermost last"""
+    calls = getattr(_local, "loader_calls", None)
+    if calls is None:
+        calls = _local.loader_calls = []
+    return calls
+
+
+def count_sql(queries: int = 0, rows: int = 0):
+    """Adds statements and fetched rows to the current rerun (called by services/query_log cursors)"""
+    profile = current_profile()
+    if profile is not None:
+        profile.queries += queries
+        profile.rows += rows
+
+
+# ==================== ANALYSIS ====================
+
+def summarize_calls(calls: list):
+    """Calls grouped by (kind, name): count, total and max inclusive time, SQL activity, cache hits"""
+    import pandas as pd
+
+    if not calls:
+        return pd.DataFrame(columns=SUMMARY_COLUMNS)
+    frame = pd.DataFrame(calls).reindex(columns=["kind", "name", "ms", "queries", "rows", "cache"])
+    frame["hits"] = frame["cache"].eq("hit")
+    frame["misses"] = frame["cache"].eq("miss")
+    summary = frame.groupby(["kind", "name"], as_index=False).agg(
+        calls=("ms", "size"),
+        ms=("ms", "sum"),
+        max_ms=("ms", "max"),
+        queries=("queries", "sum"),
+        rows=("rows", "sum"),
+        hits=("hits", "sum"),
+        misses=("misses", "sum"),
+    )
+    return summary[SUMMARY_COLUMNS].sort_values("ms", ascending=False, ignore_index=True)
+
+
+def read_log(path: str = PROFILE_LOG, page: str = None) -> list:
+    reruns = []
+    with open(path) as log_file:
+        for line in log_file:
+            record = json.loads(line)
+            if page is None or record["page"] == page:
+                reruns.append(record)
+    return reruns
+
+
+def main():
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="Summary of the profiled reruns")
+    parser.add_argument("--log", default=PROFILE_LOG)
+    parser.add_argument("--page", help="only the reruns of this page (e.g. ticket_page)")
+    parser.add_argument("--top", type=int, default=15, help="number of calls listed")
+    args = parser.parse_args()
+
+    reruns = read_log(args.log, args.page)
+    if not reruns:
+        print("No rerun recorded")
+        return
+
+    pages = pd.DataFrame(reruns).groupby("page").agg(
+        reruns=("wall_ms", "size"),
+        median_ms=("wall_ms", "median"),
+        p95_ms=("wall_ms", lambda values: values.quantile(0.95)),
+        queries=("queries", "mean"),
+        rows=("rows", "mean"),
+        cache_hits=("cache_hits", "sum"),
+        cache_misses=("cache_misses", "sum"),
+    )
+    with pd.option_context("display.width", 200, "display.max_colwidth", 80):
+        print(pages.round(1).to_string())
+        print()
+        calls = summarize_calls([call for rerun in reruns for call in rerun["calls"]])
+        print(calls.head(args.top).round(1).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
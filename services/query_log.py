@@ -0,0 +1,365 @@
+"""
+Statement timing and slow-query log for DatabaseManager
+
+Every statement run on a DatabaseManager connection is timed, from execute()
+until its cursor is exhausted, reused or released, and aggregated per
+normalized SQL (literals and IN lists replaced by placeholders) in
+process-wide statistics. Statements slower than the threshold are also
+written to logs/slow_queries.jsonl (services/debug_logger) with their
+parameter shape, row count and EXPLAIN QUERY PLAN.
+
+    FIXTOP_SLOW_QUERY_MS=100     threshold in milliseconds (negative: no slow-query log)
+
+    python -m services.query_log [--log FILE] [--top N]
+"""
+
+import argparse
+import collections
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from functools import lru_cache
+
+from services.debug_logger import slow_query_logger
+from services.profiler import count_sql
+
+SLOW_QUERY_MS = float(os.environ.get("FIXTOP_SLOW_QUERY_MS", "100"))
+SLOW_QUERY_LOG = os.path.join(os.path.dirname(__file__), "..", "logs", "slow_queries.jsonl")
+
+# Statements EXPLAIN QUERY PLAN accepts
+EXPLAINABLE = ("select", "with", "insert", "update", "delete", "replace")
+
+STATS_COLUMNS = ["sql", "count", "total_ms", "mean_ms", "max_ms", "rows", "slow"]
+
+_COMMENT = re.compile(r"--[^\n]*")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACES = re.compile(r"\s+")
+
+# normalized SQL -> [count, total ms, max ms, rows, slow count]
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1024)
+def normalize_sql(sql: str) -> str:
+    """One line, comments dropped, literals as ? and lists of placeholders as (?+)"""
+    sql = _COMMENT.sub(" ", sql)
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _PLACEHOLDER_LIST.sub("(?+)", sql)
+    return _SPACES.sub(" ", sql).strip()
+
+
+def params_shape(params, many: bool = False) -> str:
+    """Types of the parameters, without their values: '(int, str x 3)', '{id: int}', '500 x (int)'"""
+    if many:
+        if isinstance(params, (list, tuple)) and params:
+            return f"{len(params)} x {params_shape(params[0])}"
+        return "many"
+    if isinstance(params, dict):
+        return "{" + ", ".join(f"{key}: {type(value).__name__}" for key, value in params.items()) + "}"
+
+    # Runs of the same type are collapsed (long IN lists)
+    runs = []
+    for value in params:
+        name = type(value).__name__
+        if runs and runs[-1][0] == name:
+            runs[-1][1] += 1
+        else:
+            runs.append([name, 1])
+    return "(" + ", ".join(name if count == 1 else f"{name} x {count}" for name, count in runs) + ")"
+
+
+def explain(connection, sql: str, params) -> list:
+    """EXPLAIN QUERY PLAN as indented lines (empty when the statement cannot be explained)"""
+    if not sql.lstrip().lower().startswith(EXPLAINABLE):
+        return []
+    try:
+        # Plain cursor: the plan query itself is neither timed nor counted
+        rows = sqlite3.Cursor(connection).execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    except sqlite3.Error:
+        return []
+    depths = {0: -1}
+    lines = []
+    for node_id, parent, _, detail in rows:
+        depths[node_id] = depths.get(parent, -1) + 1
+        lines.append("  " * depths[node_id] + detail)
+    return lines
+
+
+def record_statement(connection, sql: str, params, many: bool, seconds: float, rows: int):
+    """Adds a finished statement to the statistics; logs it when slower than the threshold"""
+    ms = seconds * 1000
+    normalized = normalize_sql(sql)
+    slow = 0 <= SLOW_QUERY_MS <= ms
+    with _stats_lock:
+        entry = _stats.setdefault(normalized, [0, 0.0, 0.0, 0, 0])
+        entry[0] += 1
+        entry[1] += ms
+        entry[2] = max(entry[2], ms)
+        entry[3] += rows
+        entry[4] += slow
+    if slow:
+        first_params = (params[0] if isinstance(params, (list, tuple)) and params else ()) if many else params
+        slow_query_logger.warning(json.dumps({
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "sql": normalized,
+            "params": params_shape(params, many),
+            "ms": round(ms, 2),
+            "rows": rows,
+            "plan": explain(connection, sql, first_params),
+        }))
+
+
+def statement_stats(top: int = None, by: str = "total_ms"):
+    """Statistics since start-up, one row per normalized statement, sorted by the given column"""
+    import pandas as pd
+
+    with _stats_lock:
+        rows = [[sql, count, total, total / count, max_ms, fetched, slow]
+                for sql, (count, total, max_ms, fetched, slow) in _stats.items()]
+    stats = pd.DataFrame(rows, columns=STATS_COLUMNS).sort_values(by, ascending=False, ignore_index=True)
+    return stats.head(top) if top else stats
+
+
+def reset_statement_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+# ==================== COUNTING ====================
+
+_counters = []  # QueryCounter blocks in progress, in any thread
+
+
+class QueryCounter:
+    """
+    Statements run and connections opened by DatabaseManager while the block runs, in every
+    thread (AppTest runs the page script in its own thread). Used to catch N+1 patterns:
+    the counts of a page or loader must not grow with the number of rows.
+
+        with QueryCounter() as counter:
+            get_available_managers()
+        counter.statements, counter.connections, counter.by_sql.most_common(5)
+    """
+
+    def __init__(self):
+        self.statements = 0
+        self.connections = 0
+        self.by_sql = collections.Counter()  # normalized SQL -> executions
+
+    def __enter__(self):
+        with _stats_lock:
+            _counters.append(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        with _stats_lock:
+            _counters.remove(self)
+        return False
+
+
+def _count(sql: str = None):
+    """Adds a statement (or a connection when sql is None) to the active counters"""
+    if not _counters:
+        return
+    normalized = normalize_sql(sql) if sql is not None else None
+    with _stats_lock:
+        for counter in _counters:
+            if normalized is None:
+                counter.connections += 1
+            else:
+                counter.statements += 1
+                counter.by_sql[normalized] += 1
+
+
+# ==================== CONNECTIONS ====================
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """
+    Cursor timing each statement (execute plus fetches) and counting its rows
+    A statement ends when its rows are exhausted, when the cursor runs another
+    statement, or when the cursor is closed or released.
+    """
+    _statement = None  # [sql, params, many, seconds, rows]
+
+    def _run(self, method, sql, params, many):
+        self._finish()
+        count_sql(queries=1)
+        _count(sql)
+        statement = [sql, params, many, 0.0, 0]
+        started = time.perf_counter()
+        result = method(sql, params)
+        statement[3] = time.perf_counter() - started
+        self._statement = statement
+        if self.description is None:
+            # No result rows (INSERT, UPDATE, DDL...): finished already
+            self._finish()
+        return result
+
+    def _fetched(self, started: float, rows: int, exhausted: bool):
+        count_sql(rows=rows)
+        statement = self._statement
+        if statement is not None:
+            statement[3] += time.perf_counter() - started
+            statement[4] += rows
+            if exhausted:
+                self._finish()
+
+    def _finish(self):
+        statement, self._statement = self._statement, None
+        if statement is not None:
+            try:
+                record_statement(self.connection, *statement)
+            except Exception:
+                pass
+
+    def execute(self, sql, parameters=()):
+        return self._run(super().execute, sql, parameters, False)
+
+    def executemany(self, sql, parameters):
+        return self._run(super().executemany, sql, parameters, True)
+
+    def executescript(self, script):
+        self._finish()
+        count_sql(queries=1)
+        _count(script)
+        return super().executescript(script)
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(started, row is not None, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        started = time.perf_counter()
+        rows = super().fetchmany(size)
+        self._fetched(started, len(rows), len(rows) < size)
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(started, len(rows), True)
+        return rows
+
+    def __next__(self):
+        started = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(started, 0, True)
+            raise
+        self._fetched(started, 1, False)
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        self._finish()
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose cursors, including the conn.execute() shortcuts, are InstrumentedCursor,
+    and whose explicit commits are timed"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        _count()
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    # The C shortcuts do not go through cursor(): route them explicitly
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, parameters):
+        return self.cursor().executemany(sql, parameters)
+
+    def executescript(self, script):
+        return self.cursor().executescript(script)
+
+    def commit(self):
+        # With the rollback journal a writer waits here for the readers: commits are timed too
+        started = time.perf_counter()
+        try:
+            super().commit()
+        finally:
+            try:
+                record_statement(self, "COMMIT", (), False, time.perf_counter() - started, 0)
+            except Exception:
+                pass
+
+
+# ==================== REPORT ====================
+
+def read_slow_log(path: str = SLOW_QUERY_LOG):
+    """Entries of the slow-query log, one row per logged statement"""
+    import pandas as pd
+
+    with open(path) as log_file:
+        return pd.DataFrame([json.loads(line) for line in log_file if line.strip()])
+
+
+def slow_query_report(entries):
+    """One row per normalized statement: count, total/mean/max time, last params and plan"""
+    report = entries.groupby("sql").agg(
+        count=("ms", "size"),
+        total_ms=("ms", "sum"),
+        mean_ms=("ms", "mean"),
+        max_ms=("ms", "max"),
+        rows=("rows", "mean"),
+        params=("params", "last"),
+        plan=("plan", "last"),
+        last_seen=("date", "max"),
+    ).reset_index()
+    report["sql"] = report["sql"].str.slice(0, 100)
+    return report
+
+
+def main():
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="Top slow statements from the slow-query log")
+    parser.add_argument("--log", default=SLOW_QUERY_LOG)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--plans", action="store_true", help="print the last plan of each statement")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.log):
+        print(f"No slow-query log at {args.log}")
+        return
+    entries = read_slow_log(args.log)
+    if entries.empty:
+        print("No slow query logged")
+        return
+
+    report = slow_query_report(entries)
+
+    columns = ["sql", "count", "total_ms", "mean_ms", "max_ms", "rows", "last_seen"]
+    with pd.option_context("display.width", 250, "display.max_colwidth", 100):
+        for by in ("total_ms", "count"):
+            top = report.sort_values(by, ascending=False).head(args.top)
+            print(f"== Top {args.top} by {by} ({len(entries)} slow statements logged)")
+            print(top[columns].round(1).to_string(index=False))
+            print()
+    if args.plans:
+        for _, row in report.sort_values("total_ms", ascending=False).head(args.top).iterrows():
+            print(f"-- {row['sql']}  params {row['params']}")
+            print("\n".join(row["plan"]) or "(no plan)")
+            print()
+
+
+if __name__ == "__main__":
+    main()
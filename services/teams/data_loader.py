@@ -1,20 +1,16 @@
 import streamlit as st
 import pandas as pd
 from database import db_manager
+from services.profiler import profiled_cache
 
 # Utility functions
-@st.cache_data(ttl=60)
+@profiled_cache(ttl=60)
 def load_teams_data():
     """Load teams data from database"""
     try:
-        teams = db_manager.get_teams()
-        if teams:
-            df = pd.DataFrame(teams)
-            # Convert dates
-            if 'created_at' in df.columns:
-                df['created_at'] = pd.to_datetime(df['created_at'])
-            if 'updated_at' in df.columns:
-                df['updated_at'] = pd.to_datetime(df['updated_at'])
+        # Typed DataFrame built directly from SQLite (dates already parsed)
+        df = db_manager.get_teams_frame()
+        if not df.empty:
             return df
         else:
             # Return empty DataFrame with expected columns
@@ -33,13 +29,9 @@ def get_available_managers():
                 managers = [user for user in all_users if
                             user['role_name'] == 'manager' and user['is_active'] == 1]
 
-                # Check which managers are not already assigned to a team
-                available_managers = []
-                for manager in managers:
-                    if db_manager.is_manager_available(manager['id']):
-                        available_managers.append(manager)
-
-                return available_managers
+                # Check which managers are not already assigned to a team (one query for all of them)
+                assigned_manager_ids = db_manager.get_assigned_manager_ids()
+                return [manager for manager in managers if manager['id'] not in assigned_manager_ids]
             return []
     except Exception as e:
         st.error(f"Error loading available managers: {str(e)}")
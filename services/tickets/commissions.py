@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+
+# Agent: 3% of the ticket amount, capped at 1500 NAIRA
+AGENT_COMMISSION_RATE = 0.03
+AGENT_COMMISSION_CAP = 1500
+
+# Manager (team of the agent): 150 NAIRA per ticket of at least 20000 NAIRA
+MANAGER_COMMISSION = 150
+MANAGER_COMMISSION_THRESHOLD = 20000
+
+
+def agent_commission(amounts) -> np.ndarray:
+    """Agent commission per ticket (0 for missing or non-positive amounts)"""
+    amounts = np.nan_to_num(np.asarray(amounts, dtype='float64'), nan=0.0)
+    return np.where(amounts > 0, np.minimum(amounts * AGENT_COMMISSION_RATE, AGENT_COMMISSION_CAP), 0.0)
+
+
+def manager_commission(amounts) -> np.ndarray:
+    """Manager commission per ticket (0 below the threshold)"""
+    amounts = np.nan_to_num(np.asarray(amounts, dtype='float64'), nan=0.0)
+    return np.where(amounts >= MANAGER_COMMISSION_THRESHOLD, float(MANAGER_COMMISSION), 0.0)
+
+
+def agent_commission_sql(amount: str) -> str:
+    """Same rule as agent_commission() as an SQL expression over amount (SQLite and DuckDB)"""
+    return (f"CASE WHEN {amount} <= 0 THEN 0 "
+            f"WHEN {amount} * {AGENT_COMMISSION_RATE} > {AGENT_COMMISSION_CAP} THEN {AGENT_COMMISSION_CAP} "
+            f"ELSE {amount} * {AGENT_COMMISSION_RATE} END")
+
+
+def manager_commission_sql(amount: str) -> str:
+    """Same rule as manager_commission() as an SQL expression over amount (SQLite and DuckDB)"""
+    return f"CASE WHEN {amount} >= {MANAGER_COMMISSION_THRESHOLD} THEN {MANAGER_COMMISSION} ELSE 0 END"
+
+
+def summarize_commissions(tickets: pd.DataFrame):
+    """
+    Agent and manager commission tables from ticket rows (duplicates by id are ignored)
+    Args:
+        tickets: frame with id, amount, created_by, created_by_name, te_id, team_name
+    Returns:
+        (agents, managers) DataFrames
+        agents: agent_id, name, team_name, tickets, total_amount, commission
+        managers: team_id, team_name, eligible_tickets, commission
+    """
+    unique = tickets.drop_duplicates(subset=["id"])
+    amounts = np.nan_to_num(unique["amount"].to_numpy(dtype='float64'), nan=0.0)
+    rows = pd.DataFrame({
+        "agent_id": unique["created_by"].to_numpy(),
+        "name": unique["created_by_name"].astype(object).fillna("Unknown").to_numpy(),
+        "team_id": unique["te_id"].to_numpy(),
+        "team_name": unique["team_name"].astype(object).fillna("N/A").to_numpy(),
+        "amount": amounts,
+        "agent_commission": agent_commission(amounts),
+        "manager_commission": manager_commission(amounts),
+    })
+
+    # Agent commissions: only tickets with a creator; team taken from the agent's first ticket
+    with_agent = rows[rows["agent_id"].notna() & (rows["agent_id"] != 0)]
+    agents = (
+        with_agent.groupby("agent_id", sort=False)
+        .agg(name=("name", "first"), team_name=("team_name", "first"),
+             tickets=("amount", "size"), total_amount=("amount", "sum"),
+             commission=("agent_commission", "sum"))
+        .reset_index()
+    )
+
+    # Manager commissions: only eligible tickets of agents that belong to a team
+    eligible = rows[rows["team_id"].notna() & (rows["team_id"] != 0)
+                    & (rows["amount"] >= MANAGER_COMMISSION_THRESHOLD)]
+    managers = (
+        eligible.groupby("team_id", sort=False)
+        .agg(team_name=("team_name", "first"), eligible_tickets=("amount", "size"),
+             commission=("manager_commission", "sum"))
+        .reset_index()
+    )
+    return agents, managers
+
+
+def summarize_tickets(tickets: pd.DataFrame) -> dict:
+    """
+    Key metrics and commission tables computed from ticket rows
+    Returns: dict with total_tickets, paid_tickets, total_amount, avg_amount,
+             agents and managers (see summarize_commissions)
+    """
+    positive = tickets["amount"][tickets["amount"] > 0]
+    agents, managers = summarize_commissions(tickets)
+    return {
+        "total_tickets": len(tickets),
+        "paid_tickets": int((tickets["is_paid"] == 1).sum()),
+        # Montant total basé sur les tickets uniques
+        "total_amount": tickets.drop_duplicates(subset=["id"])["amount"].fillna(0).sum(),
+        "avg_amount": positive.mean() if len(positive) else 0,
+        "agents": agents,
+        "managers": managers,
+    }
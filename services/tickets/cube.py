@@ -0,0 +1,332 @@
+"""
+Pre-aggregated ticket cube (problems_cube)
+
+One row per (day, agent, craft_ids, is_paid) with counts, amount sums and
+commission sums. Triggers on problems keep it current on every insert, update
+and delete; it is created and backfilled on first use. The team is not stored:
+it is joined at query time from the active team memberships, exactly like
+ALL_PROBLEMS_SQL does for the raw tickets.
+"""
+
+import pandas as pd
+
+from database import db_manager
+from services.profiler import profiled_cache
+from services.tickets.commissions import (
+    agent_commission_sql, manager_commission_sql, MANAGER_COMMISSION_THRESHOLD
+)
+
+CUBE_TABLE = "problems_cube"
+
+# Primary key order = storage order (WITHOUT ROWID): rollups aggregate per agent first,
+# so grouping by agent_id is a sequential scan instead of a sort
+CUBE_KEYS = ("agent_id", "day", "craft_ids", "is_paid")
+
+# Measure -> SQL expression for one ticket, {p} being NEW, OLD or the problems alias
+CUBE_MEASURES = {
+    "tickets": "1",
+    "amount_sum": "COALESCE({p}.amount, 0)",
+    "positive_tickets": "CASE WHEN COALESCE({p}.amount, 0) > 0 THEN 1 ELSE 0 END",
+    "positive_amount_sum": "CASE WHEN COALESCE({p}.amount, 0) > 0 THEN {p}.amount ELSE 0 END",
+    "agent_commission_sum": agent_commission_sql("COALESCE({p}.amount, 0)"),
+    "manager_eligible": f"CASE WHEN COALESCE({{p}}.amount, 0) >= {MANAGER_COMMISSION_THRESHOLD} THEN 1 ELSE 0 END",
+    "manager_commission_sum": manager_commission_sql("COALESCE({p}.amount, 0)"),
+}
+COUNT_MEASURES = ("tickets", "positive_tickets", "manager_eligible")
+
+# Key -> SQL expression (NULLs mapped to a value so the primary key applies)
+CUBE_KEY_EXPRESSIONS = {
+    "agent_id": "COALESCE({p}.created_by, 0)",
+    "day": "COALESCE(date({p}.created_at), '')",
+    "craft_ids": "COALESCE({p}.craft_ids, '')",
+    "is_paid": "CASE WHEN COALESCE({p}.is_paid, 0) = 0 THEN 0 ELSE 1 END",
+}
+
+# Period start for each rollup grain (weeks start on Monday)
+GRAIN_EXPRESSIONS = {
+    "day": "day",
+    "week": "date(day, '-6 days', 'weekday 1')",
+    "month": "substr(day, 1, 7) || '-01'",
+    "year": "substr(day, 1, 4) || '-01-01'",
+}
+
+# Columns a rollup can be grouped by (period, craft_ids and is_paid are cube columns)
+GROUP_EXPRESSIONS = {
+    "period": "c.period",
+    "agent_id": "c.agent_id",
+    "agent_name": "u.name",
+    "team_id": "tt.team_id",
+    "team_name": "tt.team_name",
+    "craft_ids": "c.craft_ids",
+    "is_paid": "c.is_paid",
+}
+
+TEAM_JOIN_SQL = """
+    LEFT JOIN (
+        SELECT t.id as team_id, t.name as team_name, tm.member_id as user_id
+        FROM team t
+        JOIN team_member tm ON t.id = tm.team_id
+        WHERE t.is_active = 1 AND tm.is_active = 1
+    ) tt ON c.agent_id = tt.user_id
+    LEFT JOIN "user" u ON c.agent_id = u.id
+"""
+
+# Databases (by path) whose cube is known to exist in this process
+_ready_databases = set()
+
+
+def _expressions(template: dict, prefix: str) -> list:
+    return [expression.format(p=prefix) for expression in template.values()]
+
+
+def _cube_ddl() -> list:
+    """CREATE statements for the cube table, its index and its triggers"""
+    keys = ", ".join(CUBE_KEYS)
+    measures = list(CUBE_MEASURES)
+    columns = ",\n        ".join(
+        ["agent_id INTEGER NOT NULL", "day TEXT NOT NULL", "craft_ids TEXT NOT NULL", "is_paid INTEGER NOT NULL"]
+        + [f"{name} {'INTEGER' if name in COUNT_MEASURES else 'REAL'} NOT NULL DEFAULT 0" for name in measures]
+    )
+
+    def add(prefix):
+        return f"""
+            INSERT INTO {CUBE_TABLE} ({keys}, {", ".join(measures)})
+            VALUES ({", ".join(_expressions(CUBE_KEY_EXPRESSIONS, prefix) + _expressions(CUBE_MEASURES, prefix))})
+            ON CONFLICT ({keys}) DO UPDATE SET
+                {", ".join(f"{name} = {name} + excluded.{name}" for name in measures)};"""
+
+    def remove(prefix):
+        match = " AND ".join(
+            f"{key} = {expression}"
+            for key, expression in zip(CUBE_KEYS, _expressions(CUBE_KEY_EXPRESSIONS, prefix))
+        )
+        return f"""
+            UPDATE {CUBE_TABLE} SET
+                {", ".join(f"{name} = {name} - ({expression})"
+                           for name, expression in zip(measures, _expressions(CUBE_MEASURES, prefix)))}
+            WHERE {match};
+            DELETE FROM {CUBE_TABLE} WHERE {match} AND tickets <= 0;"""
+
+    return [
+        f"CREATE TABLE IF NOT EXISTS {CUBE_TABLE} (\n        {columns},\n        PRIMARY KEY ({keys})\n    ) WITHOUT ROWID",
+        f"CREATE TRIGGER IF NOT EXISTS {CUBE_TABLE}_ai AFTER INSERT ON problems BEGIN {add('NEW')} END",
+        f"CREATE TRIGGER IF NOT EXISTS {CUBE_TABLE}_ad AFTER DELETE ON problems BEGIN {remove('OLD')} END",
+        f"CREATE TRIGGER IF NOT EXISTS {CUBE_TABLE}_au "
+        f"AFTER UPDATE OF created_at, created_by, craft_ids, is_paid, amount ON problems "
+        f"BEGIN {remove('OLD')} {add('NEW')} END",
+    ]
+
+
+def _cube_is_valid(conn) -> bool:
+    """The cube and its three triggers exist, and it counts every ticket of problems"""
+    objects = {name for (name,) in conn.execute(
+        "SELECT name FROM sqlite_master WHERE name = ? OR (type = 'trigger' AND tbl_name = 'problems')",
+        (CUBE_TABLE,))}
+    if not {CUBE_TABLE, f"{CUBE_TABLE}_ai", f"{CUBE_TABLE}_ad", f"{CUBE_TABLE}_au"} <= objects:
+        return False
+    cube_tickets = conn.execute(f"SELECT COALESCE(SUM(tickets), 0) FROM {CUBE_TABLE}").fetchone()[0]
+    return cube_tickets == conn.execute("SELECT COUNT(*) FROM problems").fetchone()[0]
+
+
+def ensure_cube(db=db_manager):
+    """
+    Creates the cube, its triggers and its content, once per database and process
+    An existing cube is checked first (triggers present, ticket count equal to
+    problems): a cube copied without its content, or missed by writes made
+    without the triggers, is rebuilt from the tickets.
+    """
+    if db.db_path in _ready_databases:
+        return
+
+    with db.get_connection() as conn:
+        # Write lock first: two processes must not both backfill the cube
+        conn.execute("BEGIN IMMEDIATE")
+        if not _cube_is_valid(conn):
+            for suffix in ("ai", "ad", "au"):
+                conn.execute(f"DROP TRIGGER IF EXISTS {CUBE_TABLE}_{suffix}")
+            conn.execute(f"DROP TABLE IF EXISTS {CUBE_TABLE}")
+            for statement in _cube_ddl():
+                conn.execute(statement)
+            # Backfill from the existing tickets, in the same transaction as the triggers
+            keys = _expressions(CUBE_KEY_EXPRESSIONS, "p")
+            conn.execute(f"""
+                INSERT INTO {CUBE_TABLE} ({", ".join(CUBE_KEYS)}, {", ".join(CUBE_MEASURES)})
+                SELECT {", ".join(keys)},
+                       {", ".join(f"SUM({expression})" for expression in _expressions(CUBE_MEASURES, "p"))}
+                FROM problems p
+                GROUP BY {", ".join(keys)}
+            """)
+    _ready_databases.add(db.db_path)
+
+
+def drop_cube(db=db_manager):
+    """Removes the cube and its triggers (it is rebuilt by the next ensure_cube)"""
+    with db.get_connection() as conn:
+        for suffix in ("ai", "ad", "au"):
+            conn.execute(f"DROP TRIGGER IF EXISTS {CUBE_TABLE}_{suffix}")
+        conn.execute(f"DROP TABLE IF EXISTS {CUBE_TABLE}")
+    _ready_databases.discard(db.db_path)
+
+
+def match_craft_values(values, craft_ids) -> list:
+    """craft_ids values ('1', '1,3', ...) containing one of the selected craft ids"""
+    selected = {str(craft_id) for craft_id in craft_ids}
+    return [
+        value for value in values
+        if not selected.isdisjoint(token.strip() for token in str(value).split(","))
+    ]
+
+
+def craft_values(craft_ids, db=db_manager) -> list:
+    """Distinct craft_ids values of the cube containing one of the selected craft ids"""
+    with db.get_connection() as conn:
+        values = [row[0] for row in conn.execute(f"SELECT DISTINCT craft_ids FROM {CUBE_TABLE}")]
+    return match_craft_values(values, craft_ids)
+
+
+def build_rollup_sql(grain: str = "month", group_by=("period",), is_paid=None, team_ids=None, agent_ids=None,
+                     craft_filter=None, start=None, end=None, grain_expressions=GRAIN_EXPRESSIONS):
+    """
+    SQL of a rollup over a problems_cube table (or view with the same columns)
+    Args: see rollup(); craft_filter lists the craft_ids values to keep (see match_craft_values),
+          grain_expressions lets another SQL dialect provide its date functions
+    Returns: (sql, params)
+    """
+    if grain not in grain_expressions:
+        raise ValueError(f"Unknown grain: {grain}")
+    unknown = set(group_by) - set(GROUP_EXPRESSIONS)
+    if unknown:
+        raise ValueError(f"Unknown group columns: {', '.join(sorted(unknown))}")
+
+    def in_list(column, values):
+        values = list(values)
+        params.extend(values)
+        return f"{column} IN ({', '.join('?' * len(values))})" if values else "1 = 0"
+
+    # 1. Aggregate the cube per agent (and per local group) before joining the teams:
+    #    the join then runs on a few rows per agent instead of every cube cell
+    conditions, params = [], []
+    if is_paid is not None:
+        conditions.append("is_paid = ?")
+        params.append(int(is_paid))
+    if start is not None:
+        conditions.append("day >= ?")
+        params.append(str(start))
+    if end is not None:
+        conditions.append("day <= ?")
+        params.append(str(end))
+    if agent_ids is not None:
+        conditions.append(in_list("agent_id", agent_ids))
+    if craft_filter is not None:
+        conditions.append(in_list("craft_ids", craft_filter))
+
+    local_groups = [
+        (name, grain_expressions[grain] if name == "period" else name)
+        for name in group_by if name in ("period", "craft_ids", "is_paid")
+    ]
+    inner_select = ["agent_id"] + [f"{expression} as {name}" for name, expression in local_groups]
+    inner_select += [f"SUM({name}) as {name}" for name in CUBE_MEASURES]
+    inner_sql = f"SELECT {', '.join(inner_select)} FROM {CUBE_TABLE}"
+    if conditions:
+        inner_sql += " WHERE " + " AND ".join(conditions)
+    inner_sql += " GROUP BY " + ", ".join(["agent_id"] + [name for name, _ in local_groups])
+
+    # 2. Join teams / agent names and aggregate to the requested groups
+    outer_conditions = []
+    if team_ids is not None:
+        outer_conditions.append(in_list("tt.team_id", team_ids))
+
+    groups = [(name, GROUP_EXPRESSIONS[name]) for name in group_by]
+    select = [f"{expression} as {name}" for name, expression in groups]
+    select += [f"SUM(c.{name}) as {name}" for name in CUBE_MEASURES if not name.startswith("manager_")]
+    # Manager commissions only exist for agents who belong to a team
+    select += [f"SUM(CASE WHEN tt.team_id IS NOT NULL THEN c.{name} ELSE 0 END) as {name}"
+               for name in ("manager_eligible", "manager_commission_sum")]
+
+    sql = f"SELECT {', '.join(select)} FROM ({inner_sql}) c {TEAM_JOIN_SQL}"
+    if outer_conditions:
+        sql += " WHERE " + " AND ".join(outer_conditions)
+    if groups:
+        # Explicit NULLS FIRST: SQLite and DuckDB sort NULLs differently by default
+        sql += " GROUP BY " + ", ".join(name for name, _ in groups) + " ORDER BY " + ", ".join(
+            f"{name} NULLS FIRST" for name, _ in groups)
+    return sql, params
+
+
+def rollup(grain: str = "month", group_by=("period",), is_paid=None, team_ids=None, agent_ids=None,
+           craft_ids=None, start=None, end=None, db=db_manager) -> pd.DataFrame:
+    """
+    Aggregates the cube
+    Args:
+        grain: 'day', 'week', 'month' or 'year' (used by the 'period' group)
+        group_by: columns of GROUP_EXPRESSIONS; empty for grand totals
+        is_paid: 1 / 0 to keep paid / unpaid tickets only
+        team_ids, agent_ids, craft_ids: keep only these teams / agents / crafts (None = all)
+        start, end: creation dates (inclusive)
+    Returns:
+        DataFrame with the group columns and the summed measures
+    """
+    ensure_cube(db)
+    sql, params = build_rollup_sql(
+        grain, group_by, is_paid, team_ids, agent_ids,
+        craft_values(craft_ids, db) if craft_ids is not None else None, start, end,
+    )
+    frame = db.fetch_frame(sql, tuple(params))
+    if "period" in frame.columns:
+        frame["period"] = pd.to_datetime(frame["period"], errors="coerce")
+    return frame
+
+
+@profiled_cache(ttl=600, max_entries=64, show_spinner=False)
+def cached_rollup(version, grain: str = "month", group_by=("period",), is_paid=None, team_ids=None,
+                  agent_ids=None, craft_ids=None, start=None, end=None) -> pd.DataFrame:
+    """
+    rollup() on the application database, cached per data version and arguments
+    Routed to the DuckDB mirror when FIXTOP_ANALYTICS_ENGINE=duckdb (see services/analytics)
+    """
+    from services.analytics.engine import get_analytics_engine
+
+    engine = get_analytics_engine()
+    if engine is not None:
+        return engine.rollup(grain, group_by, is_paid, team_ids, agent_ids, craft_ids, start, end)
+    return rollup(grain, group_by, is_paid, team_ids, agent_ids, craft_ids, start, end)
+
+
+def summarize_cube(version, **filters) -> dict:
+    """
+    Same result as commissions.summarize_tickets(), read from the cube
+    Args:
+        version: data version (cache key of cached_rollup)
+        filters: is_paid, team_ids, agent_ids, craft_ids, start, end (see rollup)
+    """
+    by_paid = cached_rollup(version, group_by=("is_paid",), **filters)
+    positive_tickets = by_paid["positive_tickets"].sum()
+
+    agents = cached_rollup(version, group_by=("agent_id", "agent_name", "team_name"), **filters)
+    agents = agents[(agents["agent_id"] != 0) & (agents["tickets"] > 0)]
+    agents = pd.DataFrame({
+        "agent_id": agents["agent_id"],
+        "name": agents["agent_name"].fillna("Unknown"),
+        "team_name": agents["team_name"].fillna("N/A"),
+        "tickets": agents["tickets"],
+        "total_amount": agents["amount_sum"],
+        "commission": agents["agent_commission_sum"],
+    }).reset_index(drop=True)
+
+    managers = cached_rollup(version, group_by=("team_id", "team_name"), **filters)
+    managers = managers[managers["team_id"].notna() & (managers["manager_eligible"] > 0)]
+    managers = pd.DataFrame({
+        "team_id": managers["team_id"],
+        "team_name": managers["team_name"].fillna("N/A"),
+        "eligible_tickets": managers["manager_eligible"],
+        "commission": managers["manager_commission_sum"],
+    }).reset_index(drop=True)
+
+    return {
+        "total_tickets": int(by_paid["tickets"].sum()),
+        "paid_tickets": int(by_paid.loc[by_paid["is_paid"] == 1, "tickets"].sum()),
+        "total_amount": by_paid["amount_sum"].sum(),
+        "avg_amount": by_paid["positive_amount_sum"].sum() / positive_tickets if positive_tickets else 0,
+        "agents": agents,
+        "managers": managers,
+    }
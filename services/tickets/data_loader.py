@@ -1,24 +1,35 @@
 import streamlit as st
 from database import db_manager
-from permissions import PermissionManager
+from services.identity import get_identity
+from services.tickets.ticket_store import get_ticket_store
+from services.profiler import profiled_cache
 
 # Utility functions
-@st.cache_data(ttl=60)
+@profiled_cache(ttl=60)
 def load_tickets():
     """Loads all tickets from the database"""
     return db_manager.get_all_problems()
 
-@st.cache_data(ttl=60)
+def load_tickets_frame():
+    """Loads all tickets as a typed DataFrame of read-only views into the shared ticket store
+
+    Not wrapped in st.cache_data on purpose: cache_data hands every session its own copy,
+    whereas the store is built once per data version and shared (see ticket_store).
+    """
+    return get_ticket_store().frame()
+
 def load_editable_tickets():
     """Loads tickets that the current user can edit based on their role"""
+    # Clé du cache : rôle et utilisateur (la liste d'un agent ne doit pas servir à un autre)
+    identity = get_identity()
+    if identity is None:
+        return []
+    return load_editable_tickets_for(identity.role, identity.user_id)
+
+@profiled_cache(ttl=60)
+def load_editable_tickets_for(current_user_role, current_user_id):
+    """Tickets the given user can edit with the given active role"""
     try:
-        # Récupérer l'utilisateur connecté et son rôle
-        current_user_id = PermissionManager.get_user_id()
-        current_user_role = PermissionManager.get_user_role()
-        
-        if not current_user_id:
-            return []
-        
         # Récupérer tous les tickets
         all_tickets = db_manager.get_all_problems()
         
@@ -43,32 +54,33 @@ def load_editable_tickets():
         st.error(f"Error loading editable tickets: {str(e)}")
         return []
 
-@st.cache_data(ttl=60)
 def load_deletable_tickets():
     """Loads tickets that the current user can delete based on their role"""
+    # Créateurs autorisés résolus à la connexion (clé du cache : une liste par équipe)
+    identity = get_identity()
+    if identity is None:
+        return []
+    creator_ids = identity.deletable_creator_ids()
+    return load_deletable_tickets_for(None if creator_ids is None else tuple(sorted(creator_ids)))
+
+@profiled_cache(ttl=60)
+def load_deletable_tickets_for(creator_ids):
+    """Tickets created by creator_ids, all tickets if None (see IdentityContext.deletable_creator_ids)"""
     try:
-        # Récupérer l'utilisateur connecté
-        current_user_id = PermissionManager.get_user_id()
-        if not current_user_id:
-            return []
-        
         # Récupérer tous les tickets
         all_tickets = db_manager.get_all_problems()
         
         # Filtrer selon les permissions de suppression
-        deletable_tickets = []
-        for ticket in all_tickets:
-            can_delete, reason = db_manager.can_delete_ticket(current_user_id, ticket['created_by'])
-            if can_delete:
-                deletable_tickets.append(ticket)
-        
-        return deletable_tickets
+        if creator_ids is None:
+            return all_tickets
+        creator_ids = set(creator_ids)
+        return [ticket for ticket in all_tickets if ticket['created_by'] in creator_ids]
         
     except Exception as e:
         st.error(f"Error loading deletable tickets: {str(e)}")
         return []
 
-@st.cache_data(ttl=60)
+@profiled_cache(ttl=60)
 def load_domains():
     """Loads all domains from the database"""
     try:
@@ -86,7 +98,7 @@ def load_domains():
         return []
 
 
-@st.cache_data(ttl=60)
+@profiled_cache(ttl=60)
 def load_teams():
     """Loads all teams from the database"""
     try:
@@ -103,7 +115,7 @@ def load_teams():
         st.error(f"Error loading teams: {str(e)}")
         return []
 
-@st.cache_data(ttl=60)
+@profiled_cache(ttl=60)
 def load_specialties_by_domain(domain_id):
     """Loads specialties for the selected domain"""
     if not domain_id:
@@ -123,7 +135,7 @@ def load_specialties_by_domain(domain_id):
         st.error(f"Error loading specialties: {str(e)}")
         return []
 
-@st.cache_data(ttl=60)
+@profiled_cache(ttl=60)
 def load_agents():
     """Loads all active agents from the database"""
     try:
@@ -0,0 +1,168 @@
+from collections import OrderedDict
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Number of filter combinations remembered per session
+FILTER_CACHE_SIZE = 16
+FILTER_CACHE_KEY = "ticket_filter_cache"
+
+# Relative cost of each kind of step: cheap steps run first, on the full frame,
+# expensive ones only on the rows that are left
+STEP_COSTS = {
+    "equals": 1,
+    "isin": 2,
+    "between": 3,
+    "tokens": 4,
+    "contains": 5,
+}
+
+
+def _category_mask(series: pd.Series, predicate) -> np.ndarray:
+    """Evaluates predicate once per category and maps the result through the codes"""
+    hits = np.fromiter((bool(predicate(value)) for value in series.cat.categories), dtype=bool)
+    # Code -1 (missing value) picks the trailing False
+    return np.append(hits, False)[series.cat.codes.to_numpy()]
+
+
+def _text_mask(series: pd.Series, text: str) -> np.ndarray:
+    """Case-insensitive literal substring match (NaN -> False)"""
+    needle = text.lower()
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return _category_mask(series, lambda value: needle in str(value).lower())
+    return series.str.contains(text, case=False, regex=False, na=False).to_numpy()
+
+
+class TicketFilterPlan:
+    """
+    Compiles the statistics filters into vectorized steps
+
+    Each builder method adds one step (and ignores empty selections). apply() runs
+    the steps cheapest first, each one on the rows kept by the previous steps, and
+    returns the positions of the matching rows. With a data version, the positions
+    are memoized in the session per filter combination.
+
+    Example:
+        plan = (TicketFilterPlan()
+                .equals("is_paid", 1)
+                .isin("created_by", [3, 4])
+                .between("created_at", start_date, end_date))
+        filtered = plan.filter(tickets_df, version=store.version)
+    """
+
+    def __init__(self):
+        self.steps = []
+
+    def _add(self, kind: str, column, values):
+        self.steps.append((kind, column, values))
+        return self
+
+    def equals(self, column: str, value):
+        """Rows where column == value"""
+        if value is None:
+            return self
+        return self._add("equals", column, value)
+
+    def isin(self, column: str, values):
+        """Rows where column is one of values (numeric ids or categorical labels)"""
+        if not values:
+            return self
+        return self._add("isin", column, tuple(sorted(set(values), key=str)))
+
+    def between(self, column: str, start: date, end: date):
+        """Rows whose datetime column falls between start and end (whole days, inclusive)"""
+        if start is None or end is None:
+            return self
+        return self._add("between", column, (start, end))
+
+    def tokens(self, column: str, values):
+        """Rows whose comma-separated id list (e.g. craft_ids '1,3') contains one of values"""
+        if not values:
+            return self
+        return self._add("tokens", column, tuple(sorted({str(value) for value in values})))
+
+    def contains(self, columns, text: str):
+        """Rows where any of columns contains text (case-insensitive, literal)"""
+        text = (text or "").strip()
+        if not text:
+            return self
+        return self._add("contains", tuple(columns), text)
+
+    @property
+    def key(self) -> tuple:
+        """Hashable description of the plan, independent of the order of the calls"""
+        return tuple(sorted(self.steps, key=repr))
+
+    @staticmethod
+    def _column(frame: pd.DataFrame, name: str, positions: np.ndarray) -> pd.Series:
+        """Only the rows still selected, for one column (not the whole frame)"""
+        series = frame[name]
+        return series if len(positions) == len(frame) else series.take(positions)
+
+    def _evaluate(self, kind: str, column, values, frame: pd.DataFrame, positions: np.ndarray) -> np.ndarray:
+        """Boolean mask of one step over the rows at positions"""
+        if kind == "contains":
+            mask = np.zeros(len(positions), dtype=bool)
+            for name in column:
+                if name in frame.columns:
+                    mask |= _text_mask(self._column(frame, name, positions), values)
+            return mask
+
+        if column not in frame.columns:
+            # Same behaviour as before: a filter on a missing column is ignored
+            return np.ones(len(positions), dtype=bool)
+        series = self._column(frame, column, positions)
+
+        if kind == "equals":
+            return (series == values).to_numpy()
+        if kind == "isin":
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                selected = set(values)
+                return _category_mask(series, lambda value: value in selected)
+            return np.isin(series.to_numpy(), values)
+        if kind == "between":
+            start, end = values
+            timestamps = series.to_numpy()
+            return (timestamps >= np.datetime64(start)) & (timestamps < np.datetime64(end + timedelta(days=1)))
+        if kind == "tokens":
+            selected = set(values)
+            return _category_mask(
+                series.astype("category"),
+                lambda value: not selected.isdisjoint(token.strip() for token in str(value).split(",")),
+            )
+        raise ValueError(f"Unknown filter step: {kind}")
+
+    def positions(self, frame: pd.DataFrame) -> np.ndarray:
+        """Positions (iloc) of the rows matching every step"""
+        positions = np.arange(len(frame))
+        for kind, column, values in sorted(self.steps, key=lambda step: STEP_COSTS[step[0]]):
+            if not len(positions):
+                break
+            positions = positions[self._evaluate(kind, column, values, frame, positions)]
+        return positions
+
+    def apply(self, frame: pd.DataFrame, version=None) -> np.ndarray:
+        """Like positions(), memoized in st.session_state when a data version is given"""
+        if version is None or not self.steps:
+            return self.positions(frame)
+
+        cache = st.session_state.setdefault(FILTER_CACHE_KEY, OrderedDict())
+        cache_key = (version, self.key)
+        if cache_key in cache:
+            cache.move_to_end(cache_key)
+            return cache[cache_key]
+
+        positions = self.positions(frame)
+        positions.flags.writeable = False
+        cache[cache_key] = positions
+        while len(cache) > FILTER_CACHE_SIZE:
+            cache.popitem(last=False)
+        return positions
+
+    def filter(self, frame: pd.DataFrame, version=None) -> pd.DataFrame:
+        """Returns the matching rows of frame"""
+        if not self.steps:
+            return frame
+        return frame.take(self.apply(frame, version))
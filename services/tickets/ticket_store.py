@@ -0,0 +1,110 @@
+import functools
+import sys
+import weakref
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from database import db_manager
+from services.profiler import profiled_cache
+
+# Tables whose changes invalidate the store (the ticket query joins users and team membership)
+STORE_SOURCE_TABLES = ('problems', 'user', 'team', 'team_member')
+# Free-text values measured per object column by nbytes (the rest is extrapolated)
+NBYTES_SAMPLE_SIZE = 1_000
+
+# Last store built in this process, without keeping it alive (see current_ticket_store)
+_last_store = None
+
+
+class TicketStore:
+    """Read-only columnar copy of all tickets, shared by every session of the process
+
+    Columns are numpy arrays (numeric ones flagged as non-writeable). frame() wraps them
+    in a new DataFrame without copying, so each session only pays for the rows it filters.
+    Callers must not modify existing columns in place; adding columns is fine.
+
+    The layout follows the dtypes of the source frame (see PROBLEM_DTYPES in database.py):
+    categoricals are stored as codes + one shared dictionary, datetimes as int64 seconds
+    since epoch (NaT kept as the int64 NaT sentinel).
+    """
+
+    def __init__(self, frame: pd.DataFrame, version):
+        self.version = version
+        self.columns = list(frame.columns)
+        self._arrays = {}
+        self._categories = {}
+        self._timestamps = set()
+
+        for name in self.columns:
+            series = frame[name]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                self._categories[name] = series.cat.categories
+                array = series.cat.codes.to_numpy()
+            elif pd.api.types.is_datetime64_any_dtype(series.dtype):
+                self._timestamps.add(name)
+                array = series.to_numpy(dtype='datetime64[s]').view('int64')
+            else:
+                array = series.to_numpy()
+            array = np.ascontiguousarray(array)
+            if array.dtype != object:
+                # Object (free text) columns stay writeable: some pandas Cython routines,
+                # e.g. memory_usage(deep=True), reject read-only object buffers
+                array.flags.writeable = False
+            self._arrays[name] = array
+
+    def __len__(self) -> int:
+        return len(self._arrays['id']) if 'id' in self._arrays else 0
+
+    def column(self, name: str):
+        """Returns a zero-copy, read-only view of one column with its pandas dtype"""
+        array = self._arrays[name]
+        if name in self._categories:
+            return pd.Categorical.from_codes(
+                array, dtype=pd.CategoricalDtype(self._categories[name]), validate=False
+            )
+        if name in self._timestamps:
+            return array.view('datetime64[s]')
+        return array
+
+    def frame(self, columns=None) -> pd.DataFrame:
+        """Builds a DataFrame whose columns are views into the shared arrays (no copy)"""
+        columns = columns or self.columns
+        return pd.DataFrame({name: self.column(name) for name in columns}, columns=columns, copy=False)
+
+    @functools.cached_property
+    def nbytes(self) -> int:
+        """
+        Approximate memory held by the store (arrays, dictionaries and Python strings),
+        computed once: the store never changes. Python strings are sized on an evenly
+        spaced sample of NBYTES_SAMPLE_SIZE values per column.
+        """
+        total = 0
+        for name, array in self._arrays.items():
+            total += array.nbytes
+            if array.dtype == object and len(array):
+                sample = array[::max(1, len(array) // NBYTES_SAMPLE_SIZE)]
+                total += int(sum(sys.getsizeof(value) for value in sample) * len(array) / len(sample))
+        for categories in self._categories.values():
+            total += categories.memory_usage(deep=True)
+        return total
+
+
+@profiled_cache(st.cache_resource, max_entries=1, show_spinner=False)
+def _load_ticket_store(version) -> TicketStore:
+    """Builds the shared store once per data version (cache_resource: no per-session copy)"""
+    global _last_store
+    store = TicketStore(db_manager.get_all_problems_frame(), version)
+    _last_store = weakref.ref(store)
+    return store
+
+
+def get_ticket_store() -> TicketStore:
+    """Returns the shared ticket store, rebuilt automatically when the underlying tables change"""
+    return _load_ticket_store(db_manager.get_data_version(STORE_SOURCE_TABLES))
+
+
+def current_ticket_store():
+    """The store already built by this process (None if no page loaded it yet), never builds one"""
+    return _last_store() if _last_store is not None else None
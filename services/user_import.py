@@ -0,0 +1,215 @@
+"""
+Bulk user provisioning from a CSV or Excel file
+
+The file is validated in one vectorized pass (pandas string operations on
+whole columns, no per-row Python loop), passwords are hashed with bcrypt in a
+pool of worker processes, then DatabaseManager.create_users_bulk inserts the
+users and their roles in a single transaction. Every rejected row is reported
+with its line number in the file and the reasons.
+
+    FIXTOP_HASH_WORKERS=<n>        hashing processes (default: CPU count)
+"""
+
+import atexit
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+import pandas as pd
+
+from services.debug_logger import debug_logger
+from services.password_policy import hash_password
+
+REQUIRED_COLUMNS = ("name", "email", "password")
+OPTIONAL_COLUMNS = ("nin", "roles")
+
+EMAIL_PATTERN = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+
+# Same rules as DatabaseManager.validate_password_strength
+PASSWORD_MIN_LENGTH = 8
+PASSWORD_SPECIAL_CHARS = "!@#$%^&*()_+-=[]{}|;:,.<>?"
+COMMON_PASSWORDS = (
+    "password", "123456", "123456789", "qwerty", "abc123",
+    "password123", "admin", "letmein", "welcome", "monkey",
+)
+
+HASH_WORKERS = int(os.environ.get("FIXTOP_HASH_WORKERS", os.cpu_count() or 2))
+# Passwords per task sent to a worker, and count below which hashing stays in-process
+HASH_CHUNK_ROWS = 8
+HASH_WORKER_MIN_ROWS = 8
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def read_user_file(uploaded_file) -> pd.DataFrame:
+    """
+    Reads an uploaded .csv, .xlsx or .xls file; every cell is kept as text
+    (a NIN or a password made of digits must not become a number)
+    """
+    name = getattr(uploaded_file, "name", str(uploaded_file)).lower()
+    if name.endswith((".xlsx", ".xls")):
+        frame = pd.read_excel(uploaded_file, dtype=str)
+    else:
+        frame = pd.read_csv(uploaded_file, dtype=str, keep_default_na=False, sep=None, engine="python")
+    frame.columns = [str(column).strip().lower() for column in frame.columns]
+    return frame
+
+
+def _text(frame: pd.DataFrame, column: str) -> pd.Series:
+    if column not in frame.columns:
+        return pd.Series("", index=frame.index)
+    return frame[column].fillna("").astype(str).str.strip()
+
+
+def validate_users(frame: pd.DataFrame, roles: list, existing_emails: set, allowed_roles=None,
+                   default_roles=None):
+    """
+    Validates all rows at once
+    Args:
+        frame: rows of read_user_file (columns name, email, password, optional nin and roles)
+        roles: role dicts of get_all_roles
+        existing_emails: emails already in the database (lowercase)
+        allowed_roles: role names the file may use (default: all roles)
+        default_roles: role names given to rows without roles
+    Returns: (valid rows with name, email, nin, password and role_ids columns,
+              errors with row, email and error columns, one line per rejected row)
+    Raises: ValueError when a required column is missing
+    """
+    missing = [column for column in REQUIRED_COLUMNS if column not in frame.columns]
+    if missing:
+        raise ValueError(f"Missing column(s): {', '.join(missing)} "
+                         f"(expected {', '.join(REQUIRED_COLUMNS + OPTIONAL_COLUMNS)})")
+
+    role_ids = {role["name"].lower(): role["id"] for role in roles}
+    allowed = {name.lower() for name in (allowed_roles or role_ids)} & set(role_ids)
+
+    rows = pd.DataFrame({
+        # Line number in the file (header is line 1)
+        "row": frame.index + 2,
+        "name": _text(frame, "name"),
+        "email": _text(frame, "email").str.lower(),
+        "nin": _text(frame, "nin"),
+        # Passwords are kept as typed, spaces included
+        "password": frame["password"].fillna("").astype(str),
+    }, index=frame.index)
+
+    # Roles: "agent, manager" -> one line per role name, then back to a list of ids per row
+    role_names = _text(frame, "roles").str.lower()
+    if default_roles:
+        role_names = role_names.mask(role_names == "", ", ".join(default_roles).lower())
+    exploded = role_names.str.split(r"\s*[,;]\s*").explode().str.strip()
+    exploded = exploded[exploded != ""]
+    unknown_role = (exploded[~exploded.isin(allowed)].groupby(level=0).size() > 0).reindex(
+        rows.index, fill_value=False)
+    rows["role_ids"] = exploded[exploded.isin(allowed)].map(role_ids).groupby(level=0).unique().map(
+        lambda ids: [int(role_id) for role_id in ids])
+
+    email, password = rows["email"], rows["password"]
+    has_password = password != ""
+    checks = [
+        (rows["name"] == "", "Name is required"),
+        (email == "", "Email is required"),
+        ((email != "") & ~email.str.match(EMAIL_PATTERN), "Invalid email format"),
+        ((email != "") & email.duplicated(keep="first"), "Email appears more than once in the file"),
+        (email.isin(existing_emails), "A user with this email already exists"),
+        (~has_password, "Password is required"),
+        (has_password & (password.str.len() < PASSWORD_MIN_LENGTH),
+         f"Password must contain at least {PASSWORD_MIN_LENGTH} characters"),
+        # lower()/upper() change the text only if it has upper/lowercase letters (Unicode-aware, like isupper)
+        (has_password & (password.str.lower() == password), "Password must contain at least one uppercase letter"),
+        (has_password & (password.str.upper() == password), "Password must contain at least one lowercase letter"),
+        (has_password & ~password.str.contains(r"\d"), "Password must contain at least one digit"),
+        (has_password & ~password.str.contains(f"[{re.escape(PASSWORD_SPECIAL_CHARS)}]"),
+         "Password must contain at least one special character"),
+        (password.str.lower().isin(COMMON_PASSWORDS), "This password is too common"),
+        (unknown_role, f"Unknown role (allowed: {', '.join(sorted(allowed))})"),
+        (rows["role_ids"].isna() & ~unknown_role, "At least one role is required"),
+    ]
+
+    errors = pd.concat(
+        [rows.loc[mask, ["row", "email"]].assign(error=message) for mask, message in checks if mask.any()]
+        or [pd.DataFrame(columns=["row", "email", "error"])]
+    )
+    errors = (errors.groupby(["row", "email"], sort=True)["error"].agg("; ".join).reset_index())
+
+    rejected = pd.concat([mask for mask, _ in checks], axis=1).any(axis=1)
+    valid = rows.loc[~rejected, ["row", "name", "email", "nin", "password", "role_ids"]]
+    return valid.reset_index(drop=True), errors
+
+
+def hash_password_chunk(passwords: list) -> list:
+    """bcrypt hashes of a list of passwords at the policy cost (services/password_policy)"""
+    return [hash_password(password) for password in passwords]
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Hashing processes, started on first use ('spawn': forking a threaded server is unsafe)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=HASH_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+            atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+        return _pool
+
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def hash_passwords(passwords: list, progress=None) -> list:
+    """
+    bcrypt hashes of the passwords, in the same order, computed in the worker processes
+    Args:
+        progress: optional callable(done, total) called as chunks finish
+    """
+    passwords = list(passwords)
+    total = len(passwords)
+    chunks = [passwords[start:start + HASH_CHUNK_ROWS] for start in range(0, total, HASH_CHUNK_ROWS)]
+    hashed = [None] * len(chunks)
+    done = 0
+
+    if total >= HASH_WORKER_MIN_ROWS and HASH_WORKERS > 1:
+        try:
+            futures = {_get_pool().submit(hash_password_chunk, chunk): index for index, chunk in enumerate(chunks)}
+            for future in as_completed(futures):
+                index = futures[future]
+                hashed[index] = future.result()
+                done += len(chunks[index])
+                if progress:
+                    progress(done, total)
+            return [value for chunk in hashed for value in chunk]
+        except BrokenProcessPool as e:
+            debug_logger.warning("Hashing workers unavailable, hashing in-process: %s", e)
+            _reset_pool()
+            hashed, done = [None] * len(chunks), 0
+
+    for index, chunk in enumerate(chunks):
+        hashed[index] = hash_password_chunk(chunk)
+        done += len(chunk)
+        if progress:
+            progress(done, total)
+    return [value for chunk in hashed for value in chunk]
+
+
+def provision_users(db, valid: pd.DataFrame, created_by: int, progress=None):
+    """
+    Hashes the passwords of the validated rows and creates the users in one transaction
+    Returns: (success, message, created user count) of create_users_bulk
+    """
+    if valid.empty:
+        return False, "No valid row to import", 0
+    hashes = hash_passwords(valid["password"].tolist(), progress)
+    users = [
+        {"name": name, "email": email, "nin": nin or None, "password": hashed, "role_ids": role_ids}
+        for name, email, nin, hashed, role_ids in zip(
+            valid["name"], valid["email"], valid["nin"], hashes, valid["role_ids"])
+    ]
+    return db.create_users_bulk(users, created_by=created_by)
@@ -13,14 +13,9 @@ def is_valid_email(email):
 def load_users_data():
     """Loads user data from the database"""
     try:
-        users = db_manager.get_all_users()
-        if users:
-            df = pd.DataFrame(users)
-            # Convert dates
-            if 'created_at' in df.columns:
-                df['created_at'] = pd.to_datetime(df['created_at'])
-            if 'updated_at' in df.columns:
-                df['updated_at'] = pd.to_datetime(df['updated_at'])
+        # Typed DataFrame built directly from SQLite (dates already parsed)
+        df = db_manager.get_all_users_frame()
+        if not df.empty:
             return df
         else:
             # Return empty DataFrame with expected columns
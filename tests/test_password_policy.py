@@ -0,0 +1,20 @@
+import threading
+import time
+
+from services import password_policy
+
+
+def test_busy_rehash_pool_does_not_delay_logins():
+    outdated = password_policy.hash_password("Old!pass1", rounds=4)
+    current = password_policy.hash_password("Abc!2345", rounds=password_policy.MIN_ROUNDS + 1)
+    release = threading.Event()
+    try:
+        # Every rehash thread stuck in store(), more rehashes queued behind them
+        for _ in range(password_policy.REHASH_THREADS * 3):
+            password_policy.schedule_rehash("Old!pass1", outdated, lambda new_hash: release.wait(10))
+        started = time.perf_counter()
+        assert password_policy.verify_password("Abc!2345", current)
+        assert not password_policy.verify_password("wrong", current)
+        assert time.perf_counter() - started < 5
+    finally:
+        release.set()
@@ -0,0 +1,32 @@
+import pytest
+
+from benchmarks.common import ROOT_DIR
+from benchmarks.query_guard import SCENARIOS, assert_constant_counts, query_counts
+from database import db_manager
+from services import query_log
+
+# Team/ticket loaders and the team list tab (02_teams renders the list as admin and manager)
+GUARDED = ("teams.get_available_managers", "tickets.load_deletable_tickets (manager)",
+           "teams.load_teams_data + members", "02_teams (admin)", "02_teams (manager)")
+
+
+@pytest.fixture
+def guard(monkeypatch, tmp_path_factory):
+    """Runs the guard scenarios on datasets shared by the tests, then restores the database path"""
+    monkeypatch.chdir(ROOT_DIR)
+    monkeypatch.setattr(query_log, "SLOW_QUERY_MS", -1)
+    monkeypatch.setattr(db_manager, "db_path", db_manager.db_path)
+    data_dir = str(tmp_path_factory.getbasetemp() / "query_guard")
+    scenarios = {name: SCENARIOS[name] for name in GUARDED}
+    return lambda team_counts: query_counts(scenarios, team_counts, data_dir=data_dir)
+
+
+def test_query_counts_do_not_grow_with_teams(guard):
+    counts = guard((10, 100))
+    assert_constant_counts(counts)
+    assert all(counter.statements for by_size in counts.values() for counter in by_size.values())
+
+
+@pytest.mark.slow
+def test_query_counts_do_not_grow_up_to_1000_teams(guard):
+    assert_constant_counts(guard((10, 100, 1000)))
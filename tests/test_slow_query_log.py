@@ -0,0 +1,41 @@
+import logging
+import sqlite3
+
+from services import query_log
+from services.debug_logger import SLOW_QUERY_LOGGER, SamplingFilter
+from services.query_log import InstrumentedConnection, read_slow_log, slow_query_report
+
+
+def _slow_query_logger(path, rate_limit):
+    """Same chain as setup_debug_logger: sampling filter, then one raw JSON message per line"""
+    logger = logging.Logger(SLOW_QUERY_LOGGER)
+    handler = logging.FileHandler(path, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    handler.addFilter(SamplingFilter(rate_limit=rate_limit, window=60))
+    logger.addHandler(handler)
+    return logger, handler
+
+
+def test_slow_queries_beyond_rate_limit_are_all_logged(tmp_path, monkeypatch):
+    log_path = tmp_path / "slow_queries.jsonl"
+    logger, handler = _slow_query_logger(log_path, rate_limit=5)
+    monkeypatch.setattr(query_log, "slow_query_logger", logger)
+    monkeypatch.setattr(query_log, "SLOW_QUERY_MS", 0)
+
+    conn = sqlite3.connect(":memory:", factory=InstrumentedConnection)
+    conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY)")
+    for value in range(30):
+        conn.execute("SELECT id FROM t WHERE id = ?", (value,))
+    conn.close()
+    handler.close()
+
+    entries = read_slow_log(str(log_path))
+    report = slow_query_report(entries).set_index("sql")
+    assert report.loc["SELECT id FROM t WHERE id = ?", "count"] == 30
+
+
+def test_other_messages_are_still_rate_limited():
+    sampling = SamplingFilter(rate_limit=5, window=60)
+    records = [logging.LogRecord("fixtop_debug", logging.WARNING, "app.py", 10, "slow page", None, None)
+               for _ in range(30)]
+    assert sum(sampling.filter(record) for record in records) == 5